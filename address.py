@@ -0,0 +1,128 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# USPS-style abbreviations. Directions are abbreviated right after the house number or at
+# the end ("Park Ave S"); suffixes only as the last word, so "Avenue of the Americas" stays put.
+DIRECTIONS = {'north': 'N', 'south': 'S', 'east': 'E', 'west': 'W',
+              'northeast': 'NE', 'northwest': 'NW', 'southeast': 'SE', 'southwest': 'SW'}
+SUFFIXES = {
+    'street': 'St', 'st': 'St', 'str': 'St', 'avenue': 'Ave', 'ave': 'Ave', 'av': 'Ave',
+    'boulevard': 'Blvd', 'blvd': 'Blvd', 'road': 'Rd', 'rd': 'Rd', 'place': 'Pl', 'pl': 'Pl',
+    'drive': 'Dr', 'dr': 'Dr', 'lane': 'Ln', 'ln': 'Ln', 'parkway': 'Pkwy', 'pkwy': 'Pkwy',
+    'square': 'Sq', 'sq': 'Sq', 'plaza': 'Plz', 'plz': 'Plz', 'court': 'Ct', 'ct': 'Ct',
+    'terrace': 'Ter', 'ter': 'Ter', 'highway': 'Hwy', 'hwy': 'Hwy', 'circle': 'Cir', 'cir': 'Cir',
+}
+ORDINALS = {'first': '1st', 'second': '2nd', 'third': '3rd', 'fourth': '4th', 'fifth': '5th',
+            'sixth': '6th', 'seventh': '7th', 'eighth': '8th', 'ninth': '9th', 'tenth': '10th',
+            'eleventh': '11th', 'twelfth': '12th'}
+
+MINOR_WORDS = {'of', 'the', 'and', 'at', 'de', 'la'}
+
+# Everything from a unit designator on: ", Suite 200", "Fl 5", "#12B", ", 85th Floor"
+UNIT = re.compile(
+    r'(?:,|\s)\s*(?:suite|ste|floor|fl|flr|unit|room|rm|apt)\b.*$'
+    r'|(?:,|\s)\s*\d+(?:st|nd|rd|th)?\s+(?:floor|fl|flr)\b.*$'
+    r'|\s*#.*$', re.IGNORECASE)
+# Trailing state and zip code without a comma: "29 W 38th St NY 10018"
+STATE_ZIP = re.compile(r'\s+[A-Za-z]{2}\s+\d{5}(?:-\d{4})?$')
+HOUSE_RANGE = re.compile(r'^(\d+)\s*-\s*(\d+)\b')
+# Widest frontage range collapsed to its first number; wider ones are more likely block-lot numbers
+MAX_RANGE_SPAN = 20
+# Queens numbers addresses block-lot style ("37-18 Northern Blvd"), so its dashes are never ranges
+QUEENS = re.compile(
+    r'\b(?:queens|long island city|lic|astoria|sunnyside|woodside|jackson heights|elmhurst|corona|'
+    r'flushing|college point|whitestone|bayside|fresh meadows|forest hills|rego park|kew gardens|'
+    r'jamaica|richmond hill|ozone park|howard beach|maspeth|middle village|ridgewood|far rockaway)\b',
+    re.IGNORECASE)
+ORDINAL_NUMBER = re.compile(r'^(\d+)(st|nd|rd|th)$', re.IGNORECASE)
+
+
+def _in_queens(address, city=None):
+    # Only the locality parts: "Jamaica Ave" or "Flushing Ave" can be streets in Brooklyn
+    localities = address.split(',', 1)[1] if ',' in address else ''
+    return bool(QUEENS.search(localities) or (isinstance(city, str) and QUEENS.search(city)))
+
+
+def _house_number(address, queens=False):
+    # "13-17 Crosby St" is a frontage range, so keep its first number: both ends on the
+    # same side of the street and close together. Queens-style block-lot numbers
+    # ("37-18 Northern Blvd", "10-63 Jackson Ave", "21-05 ...") are single addresses.
+    match = HOUSE_RANGE.match(address)
+    if not match or queens or match.group(2).startswith('0'):
+        return address
+    first, last = int(match.group(1)), int(match.group(2))
+    if first < last <= first + MAX_RANGE_SPAN and (last - first) % 2 == 0:
+        return match.group(1) + address[match.end():]
+    return address
+
+
+def _word(word):
+    match = ORDINAL_NUMBER.match(word)
+    if match:
+        return match.group(1) + match.group(2).lower()
+    lower = word.lower()
+    if lower in ORDINALS:
+        return ORDINALS[lower]
+    if lower in MINOR_WORDS:
+        return lower
+    if word.isdigit() or (len(word) <= 2 and word.isupper()):
+        return word
+    return word.capitalize()
+
+
+def canonical_address(address, city=None):
+    """Canonical street address used as the geocode cache key, or None if there is nothing to key on.
+
+    "29 West 38th Street", "29 W 38TH ST." and "29 W 38th St, New York, NY 10018" all become
+    "29 W 38th St": unit suffixes and the trailing city/state/zip are dropped, and
+    house-number ranges collapse to their first number, except in Queens (from `city` or
+    the address's own locality), where "37-18" is one address.
+    """
+    if not isinstance(address, str):
+        return None
+    return _canonical(address, _in_queens(address, city))
+
+
+def _canonical(address, queens):
+    address = UNIT.sub('', address.replace('.', ' ').strip())
+    # The street is everything before the first comma; the rest is city, state and zip
+    address = STATE_ZIP.sub('', address.split(',', 1)[0].strip())
+    address = _house_number(re.sub(r'\s+', ' ', address).strip(), queens)
+    words = [_word(w) for w in address.split(' ') if w]
+    if not words:
+        return None
+    first = 1 if words[0][:1].isdigit() else 0
+    if len(words) > first + 1 and words[first].lower() in DIRECTIONS:
+        words[first] = DIRECTIONS[words[first].lower()]
+    last = len(words) - 1
+    if last > first + 1 and words[last].lower() in DIRECTIONS:
+        words[last] = DIRECTIONS[words[last].lower()]
+        last -= 1
+    if last > first and words[last].lower() in SUFFIXES:
+        words[last] = SUFFIXES[words[last].lower()]
+    return ' '.join(words)
+
+
+def canonicalize(addresses, cities=None):
+    """Vectorized canonical_address: each distinct (raw string, in Queens) pair is normalized once."""
+    index = addresses.index if isinstance(addresses, pd.Series) else None
+    codes, uniques = pd.factorize(pd.Series(addresses), use_na_sentinel=True)
+    queens = np.zeros(len(codes), dtype=np.int64)
+    if cities is not None:
+        queens[pd.Series(cities).astype(object).str.contains(QUEENS, na=False).to_numpy()] = 1
+    keys, inverse = np.unique(codes * 2 + queens, return_inverse=True)
+    canonical = np.array([None if key < 0 else canonical_address(uniques[key // 2], 'Queens' if key % 2 else None)
+                          for key in keys], dtype=object)
+    return pd.Series(canonical[inverse], index=index, name='address')
+
+
+def address_map(addresses, cities=None):
+    """raw_address -> address (canonical) for every distinct raw value, for joining leases to the cache."""
+    if cities is None:
+        raw = pd.Series(pd.unique(pd.Series(addresses).dropna()), dtype=object)
+        return pd.DataFrame({'raw_address': raw, 'address': canonicalize(raw).to_numpy()}).dropna()
+    frame = pd.DataFrame({'raw_address': np.asarray(addresses, dtype=object), 'city': np.asarray(cities, dtype=object)})
+    frame['address'] = canonicalize(frame['raw_address'], frame['city']).to_numpy()
+    return frame.dropna(subset=['address']).drop_duplicates(['raw_address', 'address'])[['raw_address', 'address']]
@@ -0,0 +1,116 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Metro -> (states it spans, lower-case city names). Order matters only for a
+# city shared by several metros whose state is unknown: the first one wins.
+METROS = {
+    "NYC Metro": (["NY", "NJ"], ["new york", "manhattan", "brooklyn", "queens", "nyc", "bronx", "staten island"]),
+    "SF Bay Area": (["CA"], ["san francisco", "sf", "south bay/san jose", "oakland", "san jose", "berkeley", "palo alto", "mountain view", "redwood city", "menlo park", "cupertino", "fremont", "milpitas", "santa clara", "sunnyvale", "san mateo", "foster city", "burlingame", "san bruno", "daly city", "san leandro", "hayward", "union city", "alameda"]),
+    "LA Metro": (["CA"], ["los angeles", "beverly hills", "santa monica", "west hollywood", "culver city", "pasadena", "long beach", "glendale", "burbank", "inglewood", "el segundo", "redondo beach", "hermosa beach", "manhattan beach", "hawthorne", "torrance", "gardena", "compton", "carson", "san pedro", "venice", "marina del rey", "malibu", "encino", "sherman oaks", "studio city", "van nuys", "north hollywood", "reseda", "woodland hills", "calabasas", "agoura hills", "thousand oaks"]),
+    "Chicago Metro": (["IL"], ["chicago", "evanston", "oak park", "skokie", "naperville", "aurora", "wheaton", "oak brook", "schaumburg", "elgin", "joliet", "arlington heights", "des plaines", "cicero", "berwyn"]),
+    "Houston Metro": (["TX"], ["houston", "sugar land", "the woodlands", "katy", "pasadena", "pearland", "baytown"]),
+    "Dallas Metro": (["TX"], ["dallas", "fort worth", "plano", "irving", "arlington", "garland", "grand prairie", "mckinney", "frisco", "richardson", "lewisville", "carrollton", "allen", "flower mound"]),
+    "Atlanta Metro": (["GA"], ["atlanta", "marietta", "alpharetta", "roswell", "sandy springs", "johns creek", "lawrenceville"]),
+    "DC Metro": (["DC", "VA", "MD"], ["washington d.c.", "arlington", "alexandria", "bethesda", "silver spring", "rockville", "falls church", "tysons", "mclean"]),
+    "Miami Metro": (["FL"], ["miami", "fort lauderdale", "hollywood", "hialeah", "aventura", "coral gables", "miami beach", "doral", "homestead"]),
+    "Boston Metro": (["MA"], ["boston", "cambridge", "somerville", "brookline", "newton", "quincy", "waltham", "malden"]),
+    "Philadelphia Metro": (["PA", "NJ"], ["philadelphia", "camden", "cherry hill", "king of prussia", "norristown", "conshohocken", "ardmore"]),
+}
+
+# city -> candidate metros, in METROS order
+CITY_METROS = {}
+for _metro, (_states, _cities) in METROS.items():
+    for _city in _cities:
+        CITY_METROS.setdefault(_city, []).append(_metro)
+
+# Checked in order; the first group with a matching keyword wins
+INDUSTRY_RULES = [
+    ("Tech & Info", ["tech", "information", "software"]),
+    ("Finance & Insurance", ["finance", "bank", "insurance"]),
+    ("Legal", ["legal", "law"]),
+    ("Consulting & Business", ["consult", "business", "accounting"]),
+    ("Media & Advertising", ["media", "advertis"]),
+    ("Healthcare", ["health", "hospital", "medical"]),
+    ("Manufacturing & Engineering", ["manufactur", "industrial", "engineering"]),
+    ("Real Estate", ["real estate"]),
+    ("Retail", ["retail"]),
+    ("Education", ["education"]),
+    ("Non-Profit", ["non-profit"]),
+    ("Food & Hospitality", ["restaurant", "food"]),
+]
+INDUSTRY_PATTERNS = [(group, re.compile("|".join(map(re.escape, words)))) for group, words in INDUSTRY_RULES]
+
+
+def get_metro(city, state=None):
+    """Metro area for one city; the state settles cities like Arlington (TX/VA) or Pasadena (CA/TX)."""
+    if not isinstance(city, str):
+        return "Unknown"
+    city = city.strip().lower()
+    candidates = CITY_METROS.get(city)
+    if not candidates:
+        return city.title()
+    if isinstance(state, str):
+        state = state.strip().upper()
+        for metro in candidates:
+            if state in METROS[metro][0]:
+                return metro
+    return candidates[0]
+
+
+def clean_industry(ind):
+    if not isinstance(ind, str):
+        return "Other"
+    ind = ind.lower()
+    for group, pattern in INDUSTRY_PATTERNS:
+        if pattern.search(ind):
+            return group
+    return ind.title() if len(ind) < 30 else "Other"
+
+
+def _codes(values):
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=True)
+    return codes.astype(np.int64), list(uniques)
+
+
+def _from_unique_labels(codes, labels):
+    # Turn per-unique-value labels into a categorical over all rows without touching each row in Python
+    label_codes, categories = pd.factorize(pd.Series(labels, dtype=object))
+    return pd.Categorical.from_codes(label_codes[codes], categories=categories)
+
+
+def classify_metros(city, state=None):
+    """Vectorized get_metro: classifies each distinct (city, state) pair once. Returns a categorical Series."""
+    index = city.index if isinstance(city, pd.Series) else None
+    city_codes, cities = _codes(city)
+    if state is None:
+        state_codes, states = np.full(len(city_codes), -1, dtype=np.int64), []
+    else:
+        state_codes, states = _codes(state)
+    width = len(states) + 1
+    pair_codes, pairs = pd.factorize((city_codes + 1) * width + (state_codes + 1))
+    labels = []
+    for pair in pairs:
+        c, s = divmod(int(pair), width)
+        labels.append(get_metro(cities[c - 1] if c else None, states[s - 1] if s else None))
+    return pd.Series(_from_unique_labels(pair_codes, labels), index=index, name='metro')
+
+
+def classify_industries(industry):
+    """Vectorized clean_industry: classifies each distinct industry string once. Returns a categorical Series."""
+    index = industry.index if isinstance(industry, pd.Series) else None
+    codes, uniques = _codes(industry)
+    labels = [clean_industry(ind) for ind in uniques] + [clean_industry(None)]
+    # NaN rows carry code -1, which picks the trailing "missing" label
+    codes = np.where(codes < 0, len(uniques), codes)
+    return pd.Series(_from_unique_labels(codes, labels), index=index, name='industry_group')
+
+
+def keep_top(groups, top, other="Other"):
+    """Collapse every category not in `top` into `other`, without a per-row pass."""
+    groups = groups.astype('category')
+    labels = [cat if cat in top else other for cat in groups.cat.categories] + [other]
+    codes = groups.cat.codes.to_numpy().astype(np.int64)
+    codes = np.where(codes < 0, len(labels) - 1, codes)
+    return pd.Series(_from_unique_labels(codes, labels), index=groups.index, name=groups.name)
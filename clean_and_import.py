@@ -1,18 +1,35 @@
 import pandas as pd
 import numpy as np
 import os
+import io
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from typing import List
 
+from data_io import append_cleaned, cleaned_exists, next_part_id, parquet_schema, read_cleaned, write_cleaned
+from schema import apply_schema, canonical_columns
+from dates import add_date_columns
+from cube import CubeBuilder, combine_cubes
+from manifest import (APPENDED, CHANGED, UNCHANGED, classify_change, describe_source, load_manifest, refresh_entry,
+                      save_manifest)
+
 DATA_DIR = os.path.join(os.path.dirname(__file__), 'DF', 'data')
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), 'cleaned_data')
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Bump whenever the cleaned outputs change (columns, dtypes, row hashes), so sources
+# cleaned by an older pipeline are cleaned again instead of skipped as unchanged
+CLEAN_VERSION = 3
+
+# Row hashes of everything already in leases_clean, so appended rows can be deduped
+LEASE_HASHES_FILE = 'leases_row_hashes.npy'
+
 # Helper to clean column names
 def clean_columns(df):
-    df.columns = (
-        df.columns.str.strip().str.lower().str.replace(' ', '_').str.replace(r'["\']', '', regex=True)
-    )
-    return df
+    return canonical_columns(df)
 
 def clean_major_market_occupancy():
     path = os.path.join(DATA_DIR, 'Major Market Occupancy Data.csv')
@@ -20,7 +37,8 @@ def clean_major_market_occupancy():
     df = clean_columns(df)
     df = df.drop_duplicates()
     df = df.dropna(how='all')
-    df.to_csv(os.path.join(OUTPUT_DIR, 'major_market_occupancy_clean.csv'), index=False)
+    df = add_date_columns(apply_schema(df))
+    write_cleaned(df, 'major_market_occupancy_clean', OUTPUT_DIR)
     return df
 
 def clean_price_and_availability():
@@ -29,7 +47,8 @@ def clean_price_and_availability():
     df = clean_columns(df)
     df = df.drop_duplicates()
     df = df.dropna(how='all')
-    df.to_csv(os.path.join(OUTPUT_DIR, 'price_and_availability_clean.csv'), index=False)
+    df = add_date_columns(apply_schema(df))
+    write_cleaned(df, 'price_and_availability_clean', OUTPUT_DIR)
     return df
 
 def clean_unemployment():
@@ -38,31 +57,292 @@ def clean_unemployment():
     df = clean_columns(df)
     df = df.drop_duplicates()
     df = df.dropna(how='all')
-    df.to_csv(os.path.join(OUTPUT_DIR, 'unemployment_clean.csv'), index=False)
+    df = add_date_columns(apply_schema(df))
+    write_cleaned(df, 'unemployment_clean', OUTPUT_DIR)
     return df
 
-def clean_leases(chunk_size=100000):
+class RowHashSet:
+    """Set of 64-bit row hashes kept as a few sorted numpy runs.
+
+    Costs 8 bytes per distinct row instead of the row itself, so global
+    dedup over a streamed file never needs the full table in memory. Runs of
+    similar size are merged (like a binary counter) to keep lookups cheap.
+    """
+
+    def __init__(self):
+        self.runs = []
+
+    def __len__(self):
+        return sum(len(run) for run in self.runs)
+
+    def contains(self, hashes):
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self.runs:
+            if not len(run):
+                continue
+            pos = np.searchsorted(run, hashes)
+            pos[pos == len(run)] = 0
+            found |= run[pos] == hashes
+        return found
+
+    def add(self, hashes):
+        run = np.unique(hashes)
+        if not len(run):
+            return
+        while self.runs and len(self.runs[-1]) <= len(run):
+            run = np.union1d(self.runs.pop(), run)
+        self.runs.append(run)
+
+    def save(self, path):
+        runs = self.runs or [np.empty(0, dtype=np.uint64)]
+        np.save(path, np.sort(np.concatenate(runs)))
+
+    @classmethod
+    def load(cls, path):
+        seen = cls()
+        if os.path.exists(path):
+            run = np.load(path)
+            if len(run):
+                seen.runs.append(run)
+        return seen
+
+    def filter_new(self, hashes):
+        """Return a mask of first occurrences not seen before, and remember them."""
+        _, first = np.unique(hashes, return_index=True)
+        mask = np.zeros(len(hashes), dtype=bool)
+        mask[first] = True
+        mask &= ~self.contains(hashes)
+        self.add(hashes[mask])
+        return mask
+
+
+# Hash of a missing value in any column, whatever its dtype
+MISSING_HASH = np.uint64(0x9E3779B97F4A7C15)
+
+def row_hashes(df):
+    """64-bit hash of every row that depends on its values only, not on the dtypes pandas inferred.
+
+    Each chunk infers the columns outside the schema on its own (a zip column with a gap
+    reads as float64, without one as int64), so numbers are hashed as float64 and every
+    missing value alike; 78701 and 78701.0 give the same row hash.
+    """
+    combined = np.zeros(len(df), dtype=np.uint64)
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_numeric_dtype(values.dtype) and not isinstance(values.dtype, pd.CategoricalDtype):
+            values = pd.Series(values.to_numpy(dtype='float64', na_value=np.nan))
+        hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+        hashes[values.isna().to_numpy()] = MISSING_HASH
+        combined = (combined ^ hashes) * np.uint64(1099511628211)
+    return combined
+
+def dedup_chunk(chunk, seen):
+    return chunk[seen.filter_new(row_hashes(chunk))]
+
+def split_csv_ranges(path, chunk_bytes, start=None):
+    """Split a CSV into byte ranges that start and end on line boundaries.
+
+    Returns the header line and a list of (start, end) offsets, beginning at
+    `start` (a line boundary) if given. Assumes quoted fields never contain
+    newlines, which holds for the DataFest exports.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.readline()
+        offsets = [start if start is not None else f.tell()]
+        while offsets[-1] < size:
+            f.seek(offsets[-1] + chunk_bytes)
+            f.readline()
+            offsets.append(min(f.tell(), size))
+    return header, list(zip(offsets[:-1], offsets[1:]))
+
+def _clean_lease_chunk(chunk):
+    chunk = clean_columns(chunk)
+    return add_date_columns(apply_schema(chunk.dropna(how='all')))
+
+def _read_lease_range(path, header, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return _clean_lease_chunk(pd.read_csv(io.BytesIO(header + data)))
+
+def _lease_range_chunks(path, chunk_bytes, pool=None, start=None):
+    header, ranges = split_csv_ranges(path, chunk_bytes, start)
+    if pool is None:
+        for lo, hi in ranges:
+            yield _read_lease_range(path, header, lo, hi)
+        return
+    # Keep a bounded window of chunk tasks in flight and yield them in file order
+    window = 2 * getattr(pool, '_max_workers', os.cpu_count() or 1)
+    pending = deque()
+    for lo, hi in ranges:
+        pending.append(pool.submit(_read_lease_range, path, header, lo, hi))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def save_lease_cube(builder, append=False):
+    """Persist the aggregate cube and pin-map extract, folding in the previous ones when appending."""
+    cube, points = builder.cube(), builder.map_points()
+    if append and cleaned_exists('lease_cube', OUTPUT_DIR) and cleaned_exists('lease_map_points', OUTPUT_DIR):
+        cube = combine_cubes([read_cleaned('lease_cube', OUTPUT_DIR), cube])
+        points = apply_schema(pd.concat([read_cleaned('lease_map_points', OUTPUT_DIR), points], ignore_index=True))
+    write_cleaned(cube, 'lease_cube', OUTPUT_DIR)
+    write_cleaned(points, 'lease_map_points', OUTPUT_DIR)
+
+def _write_lease_stream(chunks, path, seen, part_id=0, schema=None, append=False):
+    rows = 0
+    builder = CubeBuilder()
+    for chunk in chunks:
+        chunk = dedup_chunk(chunk, seen)
+        if chunk.empty:
+            continue
+        schema = append_cleaned(chunk, 'leases_clean', part_id, OUTPUT_DIR, schema=schema,
+                                append=append or part_id > 0)
+        builder.add(chunk)
+        part_id += 1
+        rows += len(chunk)
+    if rows == 0 and not append:
+        # Nothing survived cleaning; still replace any stale output
+        write_cleaned(clean_columns(pd.read_csv(path, nrows=0)), 'leases_clean', OUTPUT_DIR)
+    save_lease_cube(builder, append)
+    return rows
+
+def clean_leases(chunk_size=100000, stream=True, pool=None, chunk_bytes=64 * 1024 * 1024, resume_from=None):
+    """Clean Leases.csv chunk by chunk.
+
+    With stream=True each cleaned chunk is written straight to the output and
+    only a row count is returned; duplicates are removed across the whole file
+    via a RowHashSet, which is saved next to the output. Passing a process pool
+    parses byte ranges of the file in the workers; chunks are still deduped and
+    written in file order. resume_from takes the manifest entry of a previous
+    run whose file has since been appended to: only the new tail is cleaned and
+    appended. The aggregate lease cube (cube.py) is built from the same
+    chunks. With stream=False the full cleaned frame is returned.
+    """
     path = os.path.join(DATA_DIR, 'Leases.csv')
-    cleaned_chunks = []
-    for chunk in pd.read_csv(path, chunksize=chunk_size):
-        chunk = clean_columns(chunk)
-        chunk = chunk.drop_duplicates()
-        chunk = chunk.dropna(how='all')
-        cleaned_chunks.append(chunk)
-    df = pd.concat(cleaned_chunks, ignore_index=True)
-    df.to_csv(os.path.join(OUTPUT_DIR, 'leases_clean.csv'), index=False)
-    return df
+    if not stream:
+        cleaned_chunks = []
+        for chunk in pd.read_csv(path, chunksize=chunk_size):
+            chunk = clean_columns(chunk)
+            chunk = chunk.drop_duplicates()
+            chunk = chunk.dropna(how='all')
+            cleaned_chunks.append(chunk)
+        df = pd.concat(cleaned_chunks, ignore_index=True)
+        df = add_date_columns(apply_schema(df.drop_duplicates()))
+        write_cleaned(df, 'leases_clean', OUTPUT_DIR)
+        builder = CubeBuilder()
+        builder.add(df)
+        save_lease_cube(builder)
+        return df
+
+    hashes_path = os.path.join(OUTPUT_DIR, LEASE_HASHES_FILE)
+    if resume_from is not None:
+        seen = RowHashSet.load(hashes_path)
+        chunks = _lease_range_chunks(path, chunk_bytes, pool, start=resume_from['size'])
+        rows = _write_lease_stream(chunks, path, seen, next_part_id('leases_clean', OUTPUT_DIR),
+                                   parquet_schema('leases_clean', OUTPUT_DIR), append=True)
+    else:
+        seen = RowHashSet()
+        if pool is not None:
+            chunks = _lease_range_chunks(path, chunk_bytes, pool)
+        else:
+            chunks = (_clean_lease_chunk(chunk) for chunk in pd.read_csv(path, chunksize=chunk_size))
+        rows = _write_lease_stream(chunks, path, seen)
+    seen.save(hashes_path)
+    return rows
+
+@contextmanager
+def timed(label, timings):
+    start = time.perf_counter()
+    yield
+    timings[label] = time.perf_counter() - start
+    print(f'  {label}: {timings[label]:.2f}s')
+
+CLEANERS = {
+    'Major Market Occupancy': clean_major_market_occupancy,
+    'Price and Availability': clean_price_and_availability,
+    'Unemployment': clean_unemployment,
+}
+
+# Source file and cleaned output name for every dataset, used by the manifest
+SOURCES = {
+    'Major Market Occupancy': ('Major Market Occupancy Data.csv', 'major_market_occupancy_clean'),
+    'Price and Availability': ('Price and Availability Data.csv', 'price_and_availability_clean'),
+    'Unemployment': ('Unemployment.csv', 'unemployment_clean'),
+    'Leases': ('Leases.csv', 'leases_clean'),
+}
+
+def source_change(name, manifest, sample=False):
+    source, output = SOURCES[name]
+    if not cleaned_exists(output, OUTPUT_DIR):
+        return CHANGED
+    if name == 'Leases' and not (os.path.exists(os.path.join(OUTPUT_DIR, LEASE_HASHES_FILE))
+                                 and cleaned_exists('lease_cube', OUTPUT_DIR)):
+        return CHANGED
+    return classify_change(os.path.join(DATA_DIR, source), manifest.get(name), sample, CLEAN_VERSION)
+
+def _run_cleaner(name):
+    # Runs in a worker; only the row count and timing travel back
+    start = time.perf_counter()
+    rows = len(CLEANERS[name]())
+    return rows, time.perf_counter() - start
 
-def main():
-    print('Cleaning Major Market Occupancy Data...')
-    clean_major_market_occupancy()
-    print('Cleaning Price and Availability Data...')
-    clean_price_and_availability()
-    print('Cleaning Unemployment Data...')
-    clean_unemployment()
-    print('Cleaning Leases Data (chunked)...')
-    clean_leases()
-    print('All datasets cleaned and saved to cleaned_data/')
+def main(parallel=False, workers=None, incremental=True, sample_check=False):
+    timings = {}
+    total = time.perf_counter()
+    manifest = load_manifest(OUTPUT_DIR) if incremental else {}
+    changes = {name: source_change(name, manifest, sample_check) for name in SOURCES}
+    for name, change in changes.items():
+        if change == UNCHANGED:
+            print(f'{name}: unchanged since last run, skipping')
+    todo = [name for name in CLEANERS if changes[name] != UNCHANGED]
+    leases_entry = manifest.get('Leases') if changes['Leases'] == APPENDED else None
+    rows = 0
+    if not parallel:
+        for name in todo:
+            print(f'Cleaning {name} Data...')
+            with timed(name, timings):
+                CLEANERS[name]()
+        if changes['Leases'] != UNCHANGED:
+            print('Cleaning Leases Data (streamed%s)...' % (', new rows only' if leases_entry else ''))
+            with timed('Leases', timings):
+                rows = clean_leases(resume_from=leases_entry)
+    else:
+        workers = workers or os.cpu_count()
+        print(f'Cleaning changed datasets with {workers} worker processes...')
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            small = {name: pool.submit(_run_cleaner, name) for name in todo}
+            if changes['Leases'] != UNCHANGED:
+                with timed('Leases', timings):
+                    rows = clean_leases(pool=pool, resume_from=leases_entry)
+            for name, future in small.items():
+                _, timings[name] = future.result()
+                print(f'  {name}: {timings[name]:.2f}s (in worker)')
+    for name, change in changes.items():
+        path = os.path.join(DATA_DIR, SOURCES[name][0])
+        if change == UNCHANGED:
+            manifest[name] = refresh_entry(path, manifest[name])
+        else:
+            manifest[name] = describe_source(path, manifest.get(name) if change == APPENDED else None,
+                                             CLEAN_VERSION)
+    save_manifest(manifest, OUTPUT_DIR)
+    if changes['Leases'] == UNCHANGED:
+        print('Leases unchanged')
+    else:
+        print(f'Wrote {rows:,} unique lease rows')
+    print(f'Total wall-clock: {time.perf_counter() - total:.2f}s')
+    print('All datasets cleaned and saved to cleaned_data/ (CSV + partitioned Parquet)')
+    return timings
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='Clean the DataFest source files into cleaned_data/.')
+    parser.add_argument('--parallel', action='store_true', help='run the cleaners in a process pool')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--full', action='store_true', help='ignore the manifest and re-clean every source')
+    parser.add_argument('--sample-check', action='store_true',
+                        help='treat a grown source as appended after re-hashing only its first and last old '
+                             'blocks instead of all of them (faster, misses edits in the middle)')
+    args = parser.parse_args()
+    main(parallel=args.parallel, workers=args.workers, incremental=not args.full, sample_check=args.sample_check)
@@ -0,0 +1,98 @@
+import pandas as pd
+
+from classify import classify_industries, classify_metros
+from schema import apply_schema
+
+# Grain of the lease cube; every dashboard lease figure is a roll-up of these keys
+CUBE_KEYS = ['market', 'metro', 'state', 'industry_group', 'year', 'quarter']
+
+# Additive measures: <col>_sum, plus <col>_count (non-null rows) where a mean is needed
+SUM_MEASURES = ['leasedsf', 'leasing', 'available_space', 'overall_rent']
+COUNT_MEASURES = ['overall_rent']
+
+# Metros whose individual leases are kept for the pin map
+MAP_METROS = ['NYC Metro']
+MAP_COLUMNS = ['address', 'city', 'company_name', 'industry_group', 'metro']
+
+
+def add_groups(leases):
+    """Attach metro and industry_group (classified once per distinct value)."""
+    leases = leases.copy(deep=False)
+    state = leases['state'] if 'state' in leases.columns else None
+    leases['metro'] = classify_metros(leases['city'], state)
+    leases['industry_group'] = classify_industries(leases['internal_industry'])
+    return leases
+
+
+def lease_cube(leases):
+    """Aggregate lease rows to CUBE_KEYS with count, sum and non-null count measures."""
+    if 'metro' not in leases.columns:
+        leases = add_groups(leases)
+    keys = [k for k in CUBE_KEYS if k in leases.columns]
+    grouped = leases.groupby(keys, observed=True, dropna=False)
+    cube = grouped.size().rename('lease_count').to_frame()
+    for col in SUM_MEASURES:
+        if col in leases.columns:
+            cube[f'{col}_sum'] = grouped[col].sum()
+    for col in COUNT_MEASURES:
+        if col in leases.columns:
+            cube[f'{col}_count'] = grouped[col].count()
+    return cube.reset_index()
+
+
+def combine_cubes(cubes):
+    """Merge partial cubes (e.g. one per chunk); all measures are additive."""
+    cubes = [c for c in cubes if c is not None and len(c)]
+    if not cubes:
+        return pd.DataFrame(columns=CUBE_KEYS + ['lease_count'])
+    cube = pd.concat(cubes, ignore_index=True)
+    keys = [k for k in CUBE_KEYS if k in cube.columns]
+    cube = cube.groupby(keys, observed=True, dropna=False, sort=False).sum(min_count=1).reset_index()
+    for col in ['lease_count'] + [f'{c}_count' for c in COUNT_MEASURES if f'{c}_count' in cube.columns]:
+        cube[col] = cube[col].fillna(0).astype('int64')
+    return apply_schema(cube)
+
+
+def map_points(leases):
+    leases = add_groups(leases) if 'metro' not in leases.columns else leases
+    points = leases[leases['metro'].isin(MAP_METROS)]
+    return points[[c for c in MAP_COLUMNS if c in points.columns]]
+
+
+def rollup(cube, by):
+    """Roll the cube up to `by`, adding <col>_mean wherever a sum and count exist."""
+    measures = [c for c in cube.columns if c not in CUBE_KEYS]
+    out = cube.groupby(by, observed=True)[measures].sum().reset_index()
+    for col in COUNT_MEASURES:
+        if f'{col}_sum' in out.columns:
+            out[f'{col}_mean'] = out[f'{col}_sum'] / out[f'{col}_count']
+    return out
+
+
+class CubeBuilder:
+    """Accumulates a lease cube and the pin-map extract chunk by chunk.
+
+    Partial cubes are compacted every `compact_every` chunks so memory tracks
+    the number of distinct keys, not the number of leases.
+    """
+
+    def __init__(self, compact_every=32):
+        self.compact_every = compact_every
+        self.cubes = []
+        self.points = []
+
+    def add(self, chunk):
+        chunk = add_groups(chunk)
+        self.cubes.append(lease_cube(chunk))
+        self.points.append(map_points(chunk))
+        if len(self.cubes) >= self.compact_every:
+            self.cubes = [combine_cubes(self.cubes)]
+
+    def cube(self):
+        return combine_cubes(self.cubes)
+
+    def map_points(self):
+        points = [p for p in self.points if len(p)]
+        if not points:
+            return pd.DataFrame(columns=MAP_COLUMNS)
+        return apply_schema(pd.concat(points, ignore_index=True))
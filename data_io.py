@@ -0,0 +1,182 @@
+import os
+import shutil
+
+import pandas as pd
+
+from schema import apply_schema
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:  # CSV-only mode
+    pa = None
+
+CLEANED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cleaned_data')
+
+# Which formats the cleaning pipeline writes. Parquet is skipped if pyarrow is missing.
+OUTPUT_FORMATS = ('csv', 'parquet')
+
+# Partition keys and their explicit types (hive-style directories: year=2021/quarter=Q1/)
+PARTITION_TYPES = {'year': 'int16', 'quarter': 'string'}
+
+
+def parquet_available():
+    return pa is not None
+
+
+def csv_path(name, base_dir=CLEANED_DIR):
+    return os.path.join(base_dir, f'{name}.csv')
+
+
+def parquet_path(name, base_dir=CLEANED_DIR):
+    return os.path.join(base_dir, f'{name}.parquet')
+
+
+def _partition_cols(df):
+    return [col for col in PARTITION_TYPES if col in df.columns]
+
+
+def _partitioning(cols):
+    schema = pa.schema([(col, getattr(pa, PARTITION_TYPES[col])()) for col in cols])
+    return ds.partitioning(schema, flavor='hive')
+
+
+def _prepare_partitions(df):
+    # Fix the partition key types so readers never have to infer them
+    df = df.copy(deep=False)
+    if 'year' in df.columns:
+        df['year'] = pd.to_numeric(df['year'], errors='coerce').astype('Int16')
+    if 'quarter' in df.columns:
+        df['quarter'] = df['quarter'].astype('string')
+    return df
+
+
+def _stable_field(f):
+    # A column that is all-null in the first chunk must still accept strings later on.
+    # Integer columns stay integer: a later chunk where pandas read one as float64
+    # (it has gaps) is cast back, its NaNs becoming nulls
+    if pa.types.is_null(f.type):
+        return pa.field(f.name, pa.string())
+    if pa.types.is_dictionary(f.type):
+        # Chunks differ in category count, so fix the index width
+        value_type = pa.string() if pa.types.is_null(f.type.value_type) else f.type.value_type
+        return pa.field(f.name, pa.dictionary(pa.int32(), value_type))
+    return f
+
+
+def _stable_schema(schema):
+    return pa.schema([_stable_field(f) for f in schema])
+
+
+def write_parquet(df, name, base_dir=CLEANED_DIR, append=False, part_id=0, schema=None):
+    """Write a cleaned frame as a Parquet dataset partitioned by year/quarter.
+
+    When appending chunks, pass the schema returned by the first call so every
+    part file agrees on column types. Returns the schema that was written.
+    """
+    path = parquet_path(name, base_dir)
+    if not append and os.path.exists(path):
+        shutil.rmtree(path)
+    df = _prepare_partitions(df)
+    cols = _partition_cols(df)
+    if schema is None:
+        schema = _stable_schema(pa.Schema.from_pandas(df, preserve_index=False))
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    ds.write_dataset(
+        table, path, format='parquet',
+        partitioning=_partitioning(cols) if cols else None,
+        basename_template=f'part-{part_id:05d}-{{i}}.parquet',
+        existing_data_behavior='overwrite_or_ignore',
+    )
+    return schema
+
+
+def write_csv(df, name, base_dir=CLEANED_DIR, append=False):
+    path = csv_path(name, base_dir)
+    header = not (append and os.path.exists(path))
+    df.to_csv(path, index=False, mode='a' if append else 'w', header=header)
+    return path
+
+
+def write_cleaned(df, name, base_dir=CLEANED_DIR, formats=OUTPUT_FORMATS):
+    """Write a cleaned dataset in every configured output format."""
+    os.makedirs(base_dir, exist_ok=True)
+    if 'csv' in formats:
+        write_csv(df, name, base_dir)
+    if 'parquet' in formats and parquet_available():
+        write_parquet(df, name, base_dir)
+
+
+def read_cleaned(name, base_dir=CLEANED_DIR, columns=None):
+    """Load a cleaned dataset with the shared schema applied, preferring the Parquet copy."""
+    path = parquet_path(name, base_dir)
+    if parquet_available() and os.path.isdir(path):
+        dataset = ds.dataset(path, format='parquet', partitioning='hive')
+        df = dataset.to_table(columns=columns).to_pandas()
+    else:
+        df = pd.read_csv(csv_path(name, base_dir), usecols=columns, low_memory=False)
+    return apply_schema(df)
+
+
+def file_version(path):
+    """(path, size, mtime) of a file, or (path, None, None) if it doesn't exist."""
+    if not os.path.exists(path):
+        return path, None, None
+    stat = os.stat(path)
+    return path, stat.st_size, stat.st_mtime_ns
+
+
+def cleaned_version(name, base_dir=CLEANED_DIR):
+    """Fingerprint (path, size, mtime of every file) of what read_cleaned would load."""
+    path = parquet_path(name, base_dir)
+    if parquet_available() and os.path.isdir(path):
+        files = sorted(os.path.join(root, f) for root, _, names in os.walk(path) for f in names)
+    else:
+        files = [csv_path(name, base_dir)]
+    return tuple((os.path.relpath(f, base_dir), os.path.getsize(f), os.stat(f).st_mtime_ns) for f in files)
+
+
+def append_cleaned(df, name, part_id, base_dir=CLEANED_DIR, formats=OUTPUT_FORMATS, schema=None,
+                   append=None):
+    """Write one chunk of a streamed dataset.
+
+    Unless append is given explicitly, part_id 0 replaces any previous output.
+    """
+    os.makedirs(base_dir, exist_ok=True)
+    if append is None:
+        append = part_id > 0
+    if 'csv' in formats:
+        write_csv(df, name, base_dir, append=append)
+    if 'parquet' in formats and parquet_available():
+        schema = write_parquet(df, name, base_dir, append=append, part_id=part_id, schema=schema)
+    return schema
+
+
+def cleaned_exists(name, base_dir=CLEANED_DIR, formats=OUTPUT_FORMATS):
+    if 'csv' in formats and not os.path.exists(csv_path(name, base_dir)):
+        return False
+    if 'parquet' in formats and parquet_available() and not os.path.isdir(parquet_path(name, base_dir)):
+        return False
+    return True
+
+
+def parquet_schema(name, base_dir=CLEANED_DIR):
+    """Schema of an existing Parquet dataset, partition keys included, for appending to it."""
+    path = parquet_path(name, base_dir)
+    if not parquet_available() or not os.path.isdir(path):
+        return None
+    schema = ds.dataset(path, format='parquet', partitioning='hive').schema
+    return pa.schema([
+        pa.field(f.name, getattr(pa, PARTITION_TYPES[f.name])()) if f.name in PARTITION_TYPES else f
+        for f in schema
+    ])
+
+
+def next_part_id(name, base_dir=CLEANED_DIR):
+    """First part number not yet used by a Parquet dataset's files."""
+    last = -1
+    for _, _, files in os.walk(parquet_path(name, base_dir)):
+        for f in files:
+            if f.startswith('part-') and f.endswith('.parquet'):
+                last = max(last, int(f.split('-')[1]))
+    return last + 1
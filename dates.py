@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+QUARTER_START_MONTH = {1: 1, 2: 4, 3: 7, 4: 10}
+
+
+def _by_unique(values, parse):
+    # Parse each distinct value once and broadcast the result back through the codes
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=True)
+    parsed = np.append(parse(pd.Series(uniques)).to_numpy(dtype='float64'), np.nan)
+    return parsed[codes]
+
+
+def quarter_number(quarter):
+    """'Q1'..'Q4' (or 1..4) -> 1..4 as floats, NaN where unparseable."""
+    return _by_unique(quarter, lambda u: pd.to_numeric(
+        u.astype(str).str.strip().str.upper().str.lstrip('Q'), errors='coerce'))
+
+
+def month_start(year, month):
+    """First day of each (year, month) as datetime64[ns]; NaT where either is missing."""
+    y = pd.to_numeric(pd.Series(year), errors='coerce').to_numpy(dtype='float64')
+    m = pd.to_numeric(pd.Series(month), errors='coerce').to_numpy(dtype='float64')
+    months = (y - 1970) * 12 + (m - 1)
+    out = np.full(len(months), np.datetime64('NaT'), dtype='datetime64[ns]')
+    valid = ~np.isnan(months)
+    out[valid] = months[valid].astype('int64').astype('datetime64[M]').astype('datetime64[ns]')
+    return out
+
+
+def quarter_start(year, quarter):
+    """First day of each (year, quarter) as datetime64[ns]."""
+    return month_start(year, (quarter_number(quarter) - 1) * 3 + 1)
+
+
+def add_date_columns(df):
+    """Add `date` (quarter start) and, for monthly data, `month_date` if not already present.
+
+    The cleaning pipeline stores both, so loaders only pay for this on raw files.
+    """
+    if 'date' not in df.columns and {'year', 'quarter'} <= set(df.columns):
+        df['date'] = quarter_start(df['year'], df['quarter'])
+    elif 'date' not in df.columns and {'year', 'month'} <= set(df.columns):
+        month = pd.to_numeric(df['month'], errors='coerce')
+        df['date'] = month_start(df['year'], (month - 1) // 3 * 3 + 1)
+    if 'month_date' not in df.columns and {'year', 'month'} <= set(df.columns):
+        df['month_date'] = month_start(df['year'], df['month'])
+    return df
+
+
+class DateIndex:
+    """A frame sorted on a date column, with the row offset where each distinct date starts.
+
+    Dates are quarter (or month) starts, so the boundary table is tiny and a date range
+    becomes two binary searches and a positional slice of the sorted frame.
+    """
+
+    def __init__(self, df, column='date'):
+        df = df.sort_values(column, kind='stable', na_position='last', ignore_index=True)
+        values = df[column].to_numpy()
+        valid = len(values) - int(np.isnat(values).sum())
+        self.df = df
+        self.bounds, offsets = np.unique(values[:valid], return_index=True)
+        self.offsets = np.append(offsets, valid)
+
+    def slice(self, start=None, end=None):
+        """Rows with start <= date <= end (either side open when None), without scanning the frame."""
+        lo = 0 if start is None else np.searchsorted(self.bounds, pd.Timestamp(start).to_datetime64(), 'left')
+        hi = len(self.bounds) if end is None else np.searchsorted(self.bounds, pd.Timestamp(end).to_datetime64(), 'right')
+        return self.df.iloc[self.offsets[lo]:self.offsets[hi]]
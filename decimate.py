@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+# Bins per trace across the visible x range: two points each is about one per pixel column
+BUCKETS = 600
+# Past this many points on screen, draw with WebGL (scattergl) instead of SVG
+WEBGL_POINTS = 5000
+
+
+def minmax(x, y, groups, buckets=BUCKETS, x_range=None):
+    """Indices of the points worth drawing from many line traces at once.
+
+    Rows are traces laid side by side (`groups` labels the trace of each row). Inside
+    x_range (all of x by default) every trace is cut into `buckets` equal-width bins and
+    only each bin's lowest and highest point are kept, with the trace's first and last
+    point, so spikes survive however far out the view is. A trace with at most
+    2 * buckets points in view is kept whole. Outside the range only the nearest point on
+    either side is kept, so lines still run off the edges of the view. Missing y values
+    are dropped. Returns row positions sorted by trace, then x.
+    """
+    x = np.asarray(x).astype('float64')
+    y = np.asarray(y, dtype='float64')
+    groups, _ = pd.factorize(np.asarray(groups), sort=True)
+    step = np.diff(groups)
+    if (step >= 0).all() and (np.diff(x)[step == 0] >= 0).all():
+        order = np.arange(len(x))
+    else:
+        order = np.lexsort((x, groups))
+    order = order[~np.isnan(y[order])]
+    x, y, g = x[order], y[order], groups[order]
+    n = len(x)
+    if not n:
+        return order
+    lo, hi = (x.min(), x.max()) if x_range is None else map(float, x_range)
+
+    same_next = np.r_[g[1:] == g[:-1], False]
+    same_prev = np.r_[False, same_next[:-1]]
+    inside = (x >= lo) & (x <= hi)
+    keep = ((x < lo) & same_next & (np.r_[x[1:], -np.inf] >= lo)) | \
+           ((x > hi) & same_prev & (np.r_[np.inf, x[:-1]] <= hi))
+
+    counts = np.bincount(g[inside], minlength=g.max() + 1)
+    dense = inside & (counts[g] > 2 * buckets)
+    keep |= inside & ~dense
+    rows = np.flatnonzero(dense)
+    if len(rows):
+        width = (hi - lo) / buckets if hi > lo else 1.0
+        key = g[rows] * buckets + np.minimum(((x[rows] - lo) / width).astype(np.int64), buckets - 1)
+        # Rows are sorted by trace and x, so every bin is a run: keep each run's first min and max
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+        run = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(rows)]))
+        values = y[rows]
+        for reduce in (np.minimum, np.maximum):
+            hit = values == reduce.reduceat(values, starts)[run]
+            keep[rows[np.minimum.reduceat(np.where(hit, np.arange(len(rows)), len(rows)), starts)]] = True
+        # First and last point in view of every dense trace
+        trace = g[rows]
+        keep[rows[np.r_[True, trace[1:] != trace[:-1]]]] = True
+        keep[rows[np.r_[trace[1:] != trace[:-1], True]]] = True
+    return order[keep]
@@ -0,0 +1,103 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from manifest import load_manifest, save_manifest
+
+# Bump when the renderers change in a way that should redraw every figure
+RENDER_VERSION = 1
+
+STYLE = 'seaborn-v0_8-whitegrid'
+CONTEXT = 'talk'
+
+
+def line_spec(file, data, x, y, title, xlabel, ylabel, figsize=(12, 7), marker='.', hue='market_short',
+              legend_outside=False, hline=None, ylim=None):
+    """A seaborn line plot of `data` coloured by market, saved as `file`."""
+    return dict(locals(), kind='line')
+
+
+def bar_spec(file, data, x, y, title, xlabel, ylabel, figsize=(12, 7), palette=None, vline=None):
+    """A horizontal seaborn bar plot of `data`, saved as `file`."""
+    return dict(locals(), kind='bar')
+
+
+def spec_hash(spec):
+    """Hash of everything a figure is drawn from: its data (content, not identity) and options."""
+    h = hashlib.sha256(repr(RENDER_VERSION).encode())
+    options = {k: v for k, v in spec.items() if k != 'data'}
+    h.update(repr(sorted(options.items())).encode())
+    data = spec['data']
+    h.update(repr(list(data.columns)).encode())
+    h.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _init_worker():
+    # Headless: never touch a display, and keep PNG encoding in the worker
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    plt.style.use(STYLE)
+    sns.set_context(CONTEXT)
+
+
+def render(spec, output_dir):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    fig = plt.figure(figsize=spec['figsize'])
+    if spec['kind'] == 'line':
+        sns.lineplot(data=spec['data'], x=spec['x'], y=spec['y'], hue=spec['hue'], marker=spec['marker'])
+        if spec['hline'] is not None:
+            plt.axhline(spec['hline'], color='grey', linestyle='--', linewidth=0.8)
+        if spec['ylim'] is not None:
+            plt.ylim(*spec['ylim'])
+        if spec['legend_outside']:
+            plt.legend(title='Market', bbox_to_anchor=(1.05, 1), loc='upper left')
+        else:
+            plt.legend(title='Market')
+    else:
+        # Colouring by palette needs a hue; one bar per category, so no legend
+        sns.barplot(data=spec['data'], x=spec['x'], y=spec['y'], hue=spec['y'], palette=spec['palette'], legend=False)
+        if spec['vline'] is not None:
+            plt.axvline(spec['vline'], color='grey', linestyle='-', linewidth=0.8)
+    plt.title(spec['title'])
+    plt.xlabel(spec['xlabel'])
+    plt.ylabel(spec['ylabel'])
+    # Leave room on the right for a legend placed outside the axes
+    plt.tight_layout(rect=[0, 0, 0.85, 1] if spec.get('legend_outside') else None)
+    fig.savefig(os.path.join(output_dir, spec['file']))
+    plt.close(fig)
+    return spec['file']
+
+
+def render_all(specs, output_dir, workers=None, force=False):
+    """Render figure specs in a process pool, skipping those whose inputs haven't changed.
+
+    A figure is redrawn when its PNG is missing or its spec_hash differs from the one
+    recorded in output_dir's manifest. Returns (rendered, skipped) lists of file names.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = load_manifest(output_dir)
+    hashes = {spec['file']: spec_hash(spec) for spec in specs}
+    todo, skipped = [], []
+    for spec in specs:
+        name = spec['file']
+        fresh = os.path.exists(os.path.join(output_dir, name)) and manifest.get(name, {}).get('sha256') == hashes[name]
+        (skipped if fresh and not force else todo).append(spec)
+    workers = min(workers or os.cpu_count() or 1, len(todo))
+    if not todo:
+        rendered = []
+    elif workers > 1:
+        with ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+            rendered = list(pool.map(render, todo, [output_dir] * len(todo)))
+    else:
+        _init_worker()
+        rendered = [render(spec, output_dir) for spec in todo]
+    for name in rendered:
+        manifest[name] = {'sha256': hashes[name]}
+    save_manifest(manifest, output_dir)
+    return rendered, [spec['file'] for spec in skipped]
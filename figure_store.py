@@ -0,0 +1,64 @@
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+
+FIGURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'figure_cache')
+
+# gzip level: 6 is close to 9 in size at a fraction of the time
+COMPRESS_LEVEL = 6
+
+
+def data_version(*parts):
+    """Short, stable version string for any reprs (file fingerprints, format numbers)."""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+
+class FigureStore:
+    """Plotly figures as gzip-compressed JSON on disk, one directory per data version.
+
+    The bytes are written once by a build step (or on first use) and served as-is, so
+    neither booting the dashboard nor switching tabs rebuilds or re-encodes a figure.
+    """
+
+    def __init__(self, version, directory=FIGURE_DIR):
+        self.version = version
+        self.directory = os.path.join(directory, version)
+
+    def path(self, name):
+        return os.path.join(self.directory, f'{name}.json.gz')
+
+    def __contains__(self, name):
+        return os.path.exists(self.path(name))
+
+    def put(self, name, figure):
+        """Serialize and store a figure; returns the compressed bytes."""
+        data = gzip.compress(figure.to_json().encode(), COMPRESS_LEVEL)
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, self.path(name))
+        return data
+
+    def get(self, name):
+        """Compressed JSON bytes of a stored figure, or None."""
+        try:
+            with open(self.path(name), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def get_or_build(self, name, build):
+        data = self.get(name)
+        return data if data is not None else self.put(name, build())
+
+    def prune(self):
+        """Remove the figures of every other data version."""
+        parent = os.path.dirname(self.directory)
+        if not os.path.isdir(parent):
+            return
+        for entry in os.scandir(parent):
+            if entry.is_dir() and entry.path != self.directory:
+                shutil.rmtree(entry.path, ignore_errors=True)
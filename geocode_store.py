@@ -0,0 +1,133 @@
+import argparse
+import contextlib
+import os
+import queue
+import sqlite3
+import time
+
+import pandas as pd
+
+from address import canonicalize
+
+STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'geocode_cache.sqlite')
+LEGACY_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nyc_geocode_cache.csv')
+LEGACY_METRO = 'NYC Metro'
+
+# Keep IN (...) lists well under SQLite's bound-parameter limit
+LOOKUP_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocodes (
+    address TEXT NOT NULL,
+    metro TEXT NOT NULL,
+    lat REAL,
+    lon REAL,
+    status TEXT NOT NULL DEFAULT 'found',
+    provider TEXT,
+    ts REAL,
+    PRIMARY KEY (address, metro)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS geocodes_metro ON geocodes (metro, status);
+CREATE TABLE IF NOT EXISTS migrations (name TEXT PRIMARY KEY, ts REAL);
+"""
+
+COLUMNS = ['address', 'metro', 'lat', 'lon', 'status', 'provider', 'ts']
+
+
+def connect(path=STORE_PATH):
+    """Writable connection, creating the store on first use."""
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def upsert(conn, records, metro):
+    """Insert or replace geocoder records (dicts with address, lat, lon, status, provider, ts)."""
+    rows = [(r['address'], metro, r.get('lat'), r.get('lon'), r.get('status', 'found'), r.get('provider'), r.get('ts'))
+            for r in records]
+    with conn:
+        conn.executemany(f"INSERT OR REPLACE INTO geocodes ({', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    return len(rows)
+
+
+def lookup(conn, addresses, metro=None, found_only=True):
+    """Bulk lookup of canonical addresses; returns a frame with one row per (address, metro) hit."""
+    addresses = list(dict.fromkeys(a for a in addresses if isinstance(a, str)))
+    where = ''
+    extra = []
+    if metro is not None:
+        where += ' AND metro = ?'
+        extra.append(metro)
+    if found_only:
+        where += " AND status = 'found'"
+    rows = []
+    for i in range(0, len(addresses), LOOKUP_CHUNK):
+        chunk = addresses[i:i + LOOKUP_CHUNK]
+        marks = ', '.join('?' * len(chunk))
+        rows += conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM geocodes WHERE address IN ({marks}){where}", chunk + extra).fetchall()
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def read_legacy_csv(csv_path=LEGACY_CSV, cities=None):
+    """The old address,lat,lon CSV cache keyed on canonical addresses.
+
+    Its addresses are raw lease addresses; `cities` ({raw address: city}, from the leases)
+    lets Queens addresses get the same keys the lease path builds for them.
+    """
+    cache = pd.read_csv(csv_path).dropna(subset=['lat', 'lon'])
+    city = cache['address'].map(cities) if cities is not None else None
+    cache['address'] = canonicalize(cache['address'], city)
+    return cache.dropna(subset=['address']).drop_duplicates('address', keep='last')
+
+
+def migrate_csv(conn, csv_path=LEGACY_CSV, metro=LEGACY_METRO, cities=None):
+    """One-time import of the old address,lat,lon CSV cache; later calls are no-ops."""
+    name = os.path.basename(csv_path)
+    if conn.execute('SELECT 1 FROM migrations WHERE name = ?', (name,)).fetchone() or not os.path.exists(csv_path):
+        return 0
+    cache = read_legacy_csv(csv_path, cities)
+    now = time.time()
+    rows = [(a, metro, lat, lon, 'csv', now) for a, lat, lon in zip(cache['address'], cache['lat'], cache['lon'])]
+    with conn:
+        # Don't clobber newer geocodes of the same address
+        conn.executemany(
+            f"INSERT OR IGNORE INTO geocodes ({', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, 'found', ?, ?)", rows)
+        conn.execute('INSERT INTO migrations VALUES (?, ?)', (name, now))
+    return len(rows)
+
+
+class ReadOnlyPool:
+    """A fixed set of read-only connections shared by the dashboard's callback threads."""
+
+    def __init__(self, path=STORE_PATH, size=4):
+        self.path = path
+        self.connections = queue.Queue()
+        for _ in range(size):
+            self.connections.put(sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False))
+
+    @contextlib.contextmanager
+    def connection(self):
+        conn = self.connections.get()
+        try:
+            yield conn
+        finally:
+            self.connections.put(conn)
+
+    def lookup(self, addresses, metro=None):
+        with self.connection() as conn:
+            return lookup(conn, addresses, metro)
+
+    def close(self):
+        while not self.connections.empty():
+            self.connections.get().close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Create the geocode store and import the legacy CSV cache.")
+    parser.add_argument('--csv', default=LEGACY_CSV)
+    parser.add_argument('--metro', default=LEGACY_METRO)
+    args = parser.parse_args()
+    conn = connect()
+    print(f"Migrated {migrate_csv(conn, args.csv, args.metro)} addresses into {STORE_PATH}")
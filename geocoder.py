@@ -0,0 +1,210 @@
+import asyncio
+import json
+import os
+import random
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+FOUND = 'found'
+NOT_FOUND = 'not_found'
+
+NOMINATIM_URL = 'https://nominatim.openstreetmap.org'
+
+# Journal records written (and fsynced) together
+JOURNAL_BATCH = 50
+
+
+class TransientGeocodeError(Exception):
+    """A failure worth retrying: rate limiting, server errors, timeouts."""
+
+
+class NominatimProvider:
+    """Nominatim-compatible HTTP provider (the public service, a self-hosted one, or a local stub).
+
+    Providers expose `name` and `async geocode(query)` returning (lat, lon) or None for
+    "no match", raising TransientGeocodeError for anything that should be retried.
+    """
+
+    name = 'nominatim'
+
+    def __init__(self, url=NOMINATIM_URL, user_agent='df_static_cache', timeout=10):
+        self.url = url.rstrip('/')
+        self.user_agent = user_agent
+        self.timeout = timeout
+
+    def _fetch(self, query):
+        params = urllib.parse.urlencode({'q': query, 'format': 'json', 'limit': 1})
+        request = urllib.request.Request(f'{self.url}/search?{params}', headers={'User-Agent': self.user_agent})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.load(response)
+        except urllib.error.HTTPError as e:
+            if e.code == 429 or e.code >= 500:
+                raise TransientGeocodeError(f'HTTP {e.code}') from e
+            raise
+        except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+            raise TransientGeocodeError(str(e)) from e
+
+    async def geocode(self, query):
+        # urllib blocks, so each request runs on a worker thread; the concurrency cap bounds the threads
+        hits = await asyncio.to_thread(self._fetch, query)
+        if not hits:
+            return None
+        return float(hits[0]['lat']), float(hits[0]['lon'])
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Journal:
+    """Append-only JSON-lines record of every resolved address, found or not.
+
+    Results are written as they arrive and fsynced once per batch, so an interrupted
+    run resumes where it stopped; when an address appears more than once the last
+    record wins. A byte offset kept next to the journal marks how much of it has been
+    copied into the geocode store, so only newer records are upserted.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.stored_path = path + '.stored'
+
+    def read(self, start=0):
+        """({address: record} of the complete lines from byte `start` on, offset after the last one)."""
+        records = {}
+        if not os.path.exists(self.path):
+            return records, 0
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            end = start
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # A torn last line from a killed run
+                    break
+                end += len(line)
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records[record['address']] = record
+        return records, end
+
+    def load(self):
+        return self.read()[0]
+
+    def append(self, records):
+        with open(self.path, 'a+b') as f:
+            # Start on a fresh line after a torn one, so it doesn't swallow the next record
+            if f.seek(0, os.SEEK_END):
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+            for record in records:
+                f.write(json.dumps(record).encode() + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def stored_offset(self):
+        if not os.path.exists(self.stored_path):
+            return 0
+        with open(self.stored_path) as f:
+            offset = int(f.read().strip() or 0)
+        # A journal that was deleted or rewritten since is read from the start
+        return offset if offset <= os.path.getsize(self.path) else 0
+
+    def mark_stored(self, offset):
+        with open(self.stored_path, 'w') as f:
+            f.write(str(offset))
+
+    def unstored(self):
+        """(records appended since the last mark_stored, offset to mark once they are stored)."""
+        if not os.path.exists(self.path):
+            return {}, 0
+        return self.read(self.stored_offset())
+
+
+def make_record(address, location, provider):
+    lat, lon = location if location else (None, None)
+    return {'address': address, 'lat': lat, 'lon': lon, 'status': FOUND if location else NOT_FOUND,
+            'provider': provider, 'ts': time.time()}
+
+
+async def _geocode_one(address, query, provider, bucket, retries, backoff):
+    for attempt in range(retries + 1):
+        await bucket.acquire()
+        try:
+            return await provider.geocode(query)
+        except TransientGeocodeError:
+            if attempt == retries:
+                raise
+            await asyncio.sleep(backoff * 2 ** attempt * (0.5 + random.random()))
+
+
+async def geocode_all(addresses, provider, journal, rate=0.5, burst=1, concurrency=4, retries=3, backoff=2.0,
+                      query=lambda address: address, retry_not_found=False, progress=print, batch_size=JOURNAL_BATCH):
+    """Geocode every address not yet in the journal, journaling results in batches of `batch_size`.
+
+    `concurrency` workers pull addresses from a queue, so memory doesn't grow with the
+    number of addresses. NOT FOUND results are journaled too and skipped on later runs
+    unless `retry_not_found`. Addresses that still fail after `retries` are left out of
+    the journal, so the next run picks them up. Returns (found, not_found, failed) counts
+    for this run.
+    """
+    done = journal.load()
+    todo = [a for a in dict.fromkeys(addresses)
+            if a not in done or (retry_not_found and done[a]['status'] == NOT_FOUND)]
+    bucket = TokenBucket(rate, burst)
+    pending = asyncio.Queue()
+    for item in enumerate(todo):
+        pending.put_nowait(item)
+    batch = []
+    counts = {FOUND: 0, NOT_FOUND: 0, 'failed': 0}
+
+    async def worker():
+        while not pending.empty():
+            i, address = pending.get_nowait()
+            try:
+                location = await _geocode_one(address, query(address), provider, bucket, retries, backoff)
+            except Exception as e:
+                counts['failed'] += 1
+                progress(f"{i+1}/{len(todo)}: {address} -> FAILED ({e})")
+                continue
+            record = make_record(address, location, provider.name)
+            batch.append(record)
+            if len(batch) >= batch_size:
+                journal.append(batch)
+                batch.clear()
+            counts[record['status']] += 1
+            if location:
+                progress(f"{i+1}/{len(todo)}: {address} -> ({location[0]}, {location[1]})")
+            else:
+                progress(f"{i+1}/{len(todo)}: {address} -> NOT FOUND")
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, len(todo)))))
+    finally:
+        # Interrupted or not, keep what was resolved
+        if batch:
+            journal.append(batch)
+    return counts[FOUND], counts[NOT_FOUND], counts['failed']
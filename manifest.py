@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+
+MANIFEST_NAME = 'manifest.json'
+
+# Source files are hashed in fixed-size blocks so the manifest entry of an
+# appended file only needs its new blocks hashed. Proving the old content is
+# intact still reads the old prefix once (sequentially, without parsing it);
+# only the appended rows are cleaned.
+BLOCK_SIZE = 16 * 1024 * 1024
+
+UNCHANGED = 'unchanged'
+APPENDED = 'appended'
+CHANGED = 'changed'
+
+
+def manifest_path(base_dir):
+    return os.path.join(base_dir, MANIFEST_NAME)
+
+
+def load_manifest(base_dir):
+    path = manifest_path(base_dir)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, base_dir):
+    path = manifest_path(base_dir)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _hash_range(f, start, end):
+    h = hashlib.sha256()
+    f.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        buf = f.read(min(remaining, 1024 * 1024))
+        if not buf:
+            break
+        h.update(buf)
+        remaining -= len(buf)
+    return h.hexdigest()
+
+
+def block_hashes(path, size=None, start_block=0, known=()):
+    """sha256 of every BLOCK_SIZE block of a file, reusing hashes already known."""
+    size = os.path.getsize(path) if size is None else size
+    hashes = list(known[:start_block])
+    with open(path, 'rb') as f:
+        for start in range(start_block * BLOCK_SIZE, size, BLOCK_SIZE):
+            hashes.append(_hash_range(f, start, min(start + BLOCK_SIZE, size)))
+    return hashes
+
+
+def content_hash(hashes):
+    return hashlib.sha256(''.join(hashes).encode()).hexdigest()
+
+
+def describe_source(path, previous=None, version=None):
+    """Build a manifest entry (size, mtime, block hashes, content hash) for a source file.
+
+    `version` is the version of the pipeline that cleaned it. When the file
+    only grew, the full blocks of the previous entry are reused so only the
+    appended bytes are hashed.
+    """
+    stat = os.stat(path)
+    known = ()
+    start_block = 0
+    if previous and stat.st_size >= previous['size']:
+        known = previous['blocks']
+        start_block = previous['size'] // BLOCK_SIZE
+    hashes = block_hashes(path, stat.st_size, start_block, known)
+    return {
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'blocks': hashes,
+        'sha256': content_hash(hashes),
+        'version': version,
+    }
+
+
+def refresh_entry(path, entry):
+    """The entry with the file's current mtime, once its content is known to be unchanged.
+
+    Without this a touched file would be re-hashed on every run.
+    """
+    return dict(entry, mtime=os.stat(path).st_mtime)
+
+
+def classify_change(path, entry, sample=False, version=None):
+    """Compare a source file against its manifest entry.
+
+    Returns UNCHANGED, APPENDED (old content is an intact prefix ending on a
+    line break) or CHANGED. An entry written by another pipeline `version` is
+    always CHANGED, as its outputs have another layout. Every block of the old content is re-hashed, a
+    sequential read of the old prefix. With sample=True only the first block
+    and the block holding the old end of file are re-read before calling a
+    grown file APPENDED: much cheaper for very large files, but an edit to a
+    middle block made while the file grew goes unnoticed.
+    """
+    if not entry or entry.get('version') != version or not os.path.exists(path):
+        return CHANGED
+    stat = os.stat(path)
+    if stat.st_size == entry['size'] and stat.st_mtime == entry['mtime']:
+        return UNCHANGED
+    old_size = entry['size']
+    if stat.st_size < old_size:
+        return CHANGED
+    if stat.st_size == old_size or not sample:
+        # Touched or grown: the old prefix must hash exactly as before
+        if block_hashes(path, old_size) != entry['blocks']:
+            return CHANGED
+        if stat.st_size == old_size:
+            return UNCHANGED
+    else:
+        last = (old_size - 1) // BLOCK_SIZE if old_size else 0
+        with open(path, 'rb') as f:
+            for block in {0, last}:
+                start = block * BLOCK_SIZE
+                end = min(start + BLOCK_SIZE, old_size)
+                if block >= len(entry['blocks']) or _hash_range(f, start, end) != entry['blocks'][block]:
+                    return CHANGED
+    if old_size:
+        with open(path, 'rb') as f:
+            f.seek(old_size - 1)
+            if f.read(1) != b'\n':
+                return CHANGED
+    return APPENDED
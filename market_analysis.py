@@ -0,0 +1,191 @@
+import os
+
+import pandas as pd
+
+from address import canonicalize
+from data_io import CLEANED_DIR, cleaned_version, file_version, read_cleaned
+from dates import add_date_columns
+from geocode_store import STORE_PATH, ReadOnlyPool
+from market_metrics import aggregate, market_metrics
+from result_cache import ResultCache
+from spatial_join import TEXAS_BOUNDARY, load_boundary, markets_within
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.analysis_cache')
+# Bump when a computation changes, so cached results from older code are not reused
+CACHE_VERSION = 2
+
+DATASETS = {
+    'leases': 'leases_clean',
+    'price': 'price_and_availability_clean',
+    'occupancy': 'major_market_occupancy_clean',
+}
+
+CONSTRUCTION = 'Construction, Engineering and Architecture'
+
+# Used for the TX-only plots when there are no geocodes to place the markets with
+TX_MARKETS = ['HOU', 'DFW', 'AUS']
+
+# Market names differ per file; each maps to the short name used in the plots
+MARKET_MAPPING = {
+    'price': {
+        'Houston': 'HOU', 'Dallas-Ft. Worth': 'DFW', 'Austin': 'AUS',
+        'Atlanta': 'ATL', 'Phoenix': 'PHX', 'Los Angeles': 'LA', 'San Francisco': 'SF'
+    },
+    'leases': {
+        'Houston': 'HOU', 'Dallas/Ft Worth': 'DFW', 'Austin': 'AUS',
+        'Atlanta': 'ATL', 'Phoenix': 'PHX', 'Los Angeles': 'LA', 'San Francisco': 'SF'
+    },
+    'occupancy': {
+        # ATL and PHX are not in the occupancy data
+        'Houston': 'HOU', 'Dallas/Ft Worth': 'DFW', 'Austin': 'AUS',
+        'Los Angeles': 'LA', 'San Francisco': 'SF'
+    },
+}
+
+DEFAULT_CONFIG = {
+    'markets': None,            # short names to compare; None = every market in the mapping
+    'market_mapping': MARKET_MAPPING,
+    'base_date': '2021-01-01',  # rent index base and start of the post-COVID window
+    'pre_covid_year': 2019,
+    'industry': CONSTRUCTION,
+}
+
+
+def make_config(**overrides):
+    config = dict(DEFAULT_CONFIG)
+    unknown = set(overrides) - set(config)
+    if unknown:
+        raise ValueError(f"Unknown config keys: {sorted(unknown)}")
+    config.update(overrides)
+    return config
+
+
+def selected_markets(config, dataset):
+    """{file market name: short name} for one dataset, restricted to config['markets']."""
+    mapping = config['market_mapping'][dataset]
+    if config['markets'] is None:
+        return dict(mapping)
+    return {name: short for name, short in mapping.items() if short in config['markets']}
+
+
+def base_quarter(base_date):
+    """'2021-Q1' for the base date, as used in column labels."""
+    base = pd.Timestamp(base_date)
+    return f"{base.year}-Q{base.quarter}"
+
+
+def _frozen(mapping):
+    return tuple(sorted(mapping.items()))
+
+
+class MarketAnalysis:
+    """Cleaned datasets, loaded on first use, plus a disk cache of what is computed from them.
+
+    Cache keys combine the fingerprints of the inputs a step reads with that step's
+    parameters. Per-market aggregates don't depend on the market selection, so every
+    competitor set shares them; a rerun on unchanged data doesn't load the data at all.
+    """
+
+    def __init__(self, input_dir=CLEANED_DIR, cache_dir=CACHE_DIR, maxsize=256):
+        self.input_dir = input_dir
+        self.cache = ResultCache(maxsize=maxsize, directory=cache_dir, namespace=CACHE_VERSION)
+        self.frames = {}
+
+    def frame(self, dataset):
+        if dataset not in self.frames:
+            self.frames[dataset] = add_date_columns(read_cleaned(DATASETS[dataset], self.input_dir))
+        return self.frames[dataset]
+
+    def cached(self, step, datasets, params, compute):
+        key = (step, tuple(cleaned_version(DATASETS[d], self.input_dir) for d in datasets), params)
+        return self.cache.get_or_compute(key, compute)
+
+    # --- Per-market aggregates, shared by every config ---
+
+    def market_series(self, dataset, value, how):
+        """One row per (market, date) of every market in the file: value aggregated with `how`."""
+        def compute():
+            return aggregate(self.frame(dataset), value, how)
+        return self.cached('market_series', [dataset], (value, how), compute)
+
+    def industry_leasing(self, industry):
+        """Leased SF per (market, date) for one industry, every market."""
+        def compute():
+            leases = self.frame('leases')
+            return aggregate(leases, 'leasedsf', 'sum', where=(leases['internal_industry'] == industry).to_numpy())
+        return self.cached('industry_leasing', ['leases'], (industry,), compute)
+
+    # --- Metrics ---
+
+    def rent_index(self, config):
+        """(series, growth): rent indexed to the base date per market, and total growth in %."""
+        mapping = selected_markets(config, 'price')
+        def compute():
+            # Markets without a value on the base date are indexed to their first later value
+            series, summary = market_metrics(self.market_series('price', 'overall_rent', 'mean'), 'overall_rent',
+                                             base_date=config['base_date'], markets=mapping)
+            rent = series.rename(columns={'market': 'market_short', 'base': 'base_rent', 'index': 'rent_index'})
+            rent = rent.dropna(subset=['rent_index'])
+            latest = summary[summary['latest_date'] == rent['date'].max()]
+            growth = (latest.set_index('market')['index'] - 100).sort_values(ascending=False).reset_index()
+            growth.columns = ['Market', f"Rent Growth % (Since {base_quarter(config['base_date'])})"]
+            return rent[['market_short', 'date', 'overall_rent', 'base_rent', 'rent_index']], growth
+        return self.cached('rent_index', ['price'], (_frozen(mapping), config['base_date']), compute)
+
+    def construction_leasing(self, config):
+        """(series, totals): quarterly leased SF of config['industry'], and millions of SF since the base date."""
+        mapping = selected_markets(config, 'leases')
+        def compute():
+            leasing = self.industry_leasing(config['industry'])
+            _, since = market_metrics(leasing, 'leasedsf', 'sum', base_date=config['base_date'], markets=mapping)
+            leasing = aggregate(leasing, 'leasedsf', 'sum', markets=mapping).rename(columns={'market': 'market_short'})
+            totals = (since.set_index('market')['total'].dropna() / 1_000_000).sort_values(ascending=False).reset_index()
+            totals.columns = ['Market', f"Total Construction Leased SF (Millions, Since {base_quarter(config['base_date'])})"]
+            return leasing, totals
+        params = (_frozen(mapping), config['industry'], config['base_date'])
+        return self.cached('construction_leasing', ['leases'], params, compute)
+
+    def occupancy_change(self, config):
+        """(series, change): occupancy per market, and the post- vs pre-COVID average in pct points."""
+        mapping = selected_markets(config, 'occupancy')
+        def compute():
+            pre_year, post_year = config['pre_covid_year'], pd.Timestamp(config['base_date']).year
+            windows = {'pre': (f'{pre_year}-01-01', f'{pre_year + 1}-01-01'), 'post': (f'{post_year}-01-01', None)}
+            occupancy, summary = market_metrics(self.market_series('occupancy', 'occupancy_proportion', 'mean'),
+                                                'occupancy_proportion', windows=windows, markets=mapping)
+            occupancy = occupancy[['market', 'date', 'occupancy_proportion']].rename(columns={'market': 'market_short'})
+            occupancy['year'] = occupancy['date'].dt.year
+            change = ((summary.set_index('market')['post'] - summary.set_index('market')['pre']) * 100).round(1)
+            change = change.sort_values(ascending=False).reset_index()
+            change.columns = ['Market', f"Occupancy Pct Point Change (Avg {post_year}+ vs Avg {pre_year})"]
+            return occupancy, change
+        params = (_frozen(mapping), config['base_date'], config['pre_covid_year'])
+        return self.cached('occupancy_change', ['occupancy'], params, compute)
+
+    def texas_markets(self, config):
+        """Short names of the markets whose geocoded leases fall mostly inside the Texas boundary.
+
+        Markets with no geocoded lease yet count as Texas if they are in TX_MARKETS.
+        """
+        if not (os.path.exists(STORE_PATH) and os.path.exists(TEXAS_BOUNDARY)):
+            return TX_MARKETS
+        mapping = selected_markets(config, 'leases')
+        def compute():
+            leases = self.frame('leases')
+            leases = leases[leases['market'].isin(list(mapping))]
+            address = canonicalize(leases['address'], leases['city'])
+            pool = ReadOnlyPool(STORE_PATH, size=1)
+            try:
+                located = pool.lookup(address.dropna().unique()).drop_duplicates('address').set_index('address')
+            finally:
+                pool.close()
+            lat = located['lat'].reindex(address).to_numpy(dtype='float64')
+            lon = located['lon'].reindex(address).to_numpy(dtype='float64')
+            short = leases['market'].map(mapping).astype(object)
+            fallback = [market for market in TX_MARKETS if market in mapping.values()]
+            return markets_within(short, lon, lat, load_boundary(), fallback=fallback)
+        # WAL-mode writes land in the -wal file until a checkpoint
+        store = (file_version(STORE_PATH), file_version(STORE_PATH + '-wal'))
+        params = (_frozen(mapping), store, file_version(TEXAS_BOUNDARY))
+        return self.cached('texas_markets', ['leases'], params, compute)
+
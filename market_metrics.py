@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+AGGREGATIONS = ('mean', 'sum')
+
+
+def _codes(values, mapping=None):
+    """Integer codes (-1 = dropped) and their sorted labels, without copying the column.
+
+    With `mapping`, labels are renamed through it and values it doesn't cover are dropped.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, labels = values.cat.codes.to_numpy(), pd.Index(values.cat.categories)
+    else:
+        codes, labels = pd.factorize(values)
+        labels = pd.Index(labels)
+    if mapping is not None:
+        labels = labels.map(lambda label: mapping.get(label, np.nan))
+    # Renumber so code order is label order (and merge labels a mapping made equal)
+    keep = labels.notna()
+    new_codes, new_labels = pd.factorize(labels[keep], sort=True)
+    lookup = np.full(len(labels) + 1, -1, dtype=np.int64)
+    lookup[:-1][keep] = new_codes
+    return lookup[codes], pd.Index(new_labels)
+
+
+def _aggregate(df, value, how, markets, where, market, date):
+    if how not in AGGREGATIONS:
+        raise ValueError(f"how must be one of {AGGREGATIONS}, got {how!r}")
+    m, labels = _codes(df[market], markets)
+    d, dates = _codes(df[date])
+    ok = (m >= 0) & (d >= 0)
+    if where is not None:
+        ok &= np.asarray(where, dtype=bool)
+    width = max(len(dates), 1)
+    key = m[ok] * width + d[ok]
+    values = df[value].to_numpy(dtype='float64')[ok]
+    has = ~np.isnan(values)
+    size = len(labels) * width
+    rows = np.bincount(key, minlength=size)
+    totals = np.bincount(key[has], weights=values[has], minlength=size)
+    if how == 'mean':
+        counts = np.bincount(key[has], minlength=size)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            totals = totals / counts
+    cells = np.flatnonzero(rows)
+    return cells // width, dates.to_numpy()[cells % width], totals[cells], labels
+
+
+def aggregate(df, value, how='mean', markets=None, where=None, market='market', date='date'):
+    """`value` per (market, date) from raw rows in one pass, sorted by market then date.
+
+    Same result as df[where].groupby([market, date], observed=True)[value].agg(how), but
+    the rows are never filtered or copied: markets/where only decide which rows count.
+    `markets` ({name: label}) selects and relabels markets.
+    """
+    group, when, values, labels = _aggregate(df, value, how, markets, where, market, date)
+    return pd.DataFrame({market: labels[group], date: when, value: values})
+
+
+def market_metrics(df, value, how='mean', base_date=None, windows=None, markets=None, where=None,
+                   market='market', date='date'):
+    """Per-market index, growth and totals of `value`, all from one grouped pass.
+
+    `df` may be raw rows or an aggregate with one row per (market, date). Returns
+    (series, summary):
+
+    series -- one row per (market, date) from base_date on: value, base (the market's
+        first value in that range), index (value / base * 100), growth (% change on the
+        previous period) and cumulative (running total).
+    summary -- one row per market: base, first_date, latest, latest_date, index (latest
+        vs base), total and mean over the same range, plus the mean of `value` within
+        each of `windows` ({name: (start, end)}, end exclusive, over all dates).
+    """
+    group, when, values, labels = _aggregate(df, value, how, markets, where, market, date)
+    n_markets = len(labels)
+    window_means = {}
+    for name, (start, end) in (windows or {}).items():
+        inside = ~np.isnan(values)
+        if start is not None:
+            inside &= when >= pd.Timestamp(start).to_datetime64()
+        if end is not None:
+            inside &= when < pd.Timestamp(end).to_datetime64()
+        total = np.bincount(group[inside], weights=values[inside], minlength=n_markets)
+        count = np.bincount(group[inside], minlength=n_markets)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            window_means[name] = total / count
+    present = np.zeros(n_markets, dtype=bool)
+    present[group] = True
+
+    if base_date is not None:
+        keep = when >= pd.Timestamp(base_date).to_datetime64()
+        group, when, values = group[keep], when[keep], values[keep]
+    n = len(group)
+    missing = np.isnan(values)
+    filled = np.where(missing, 0.0, values)
+    if n:
+        starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+        # First non-missing value of every market (n where there is none)
+        first = np.minimum.reduceat(np.where(missing, n, np.arange(n)), starts)
+        sums, counts = np.add.reduceat(filled, starts), np.add.reduceat(~missing, starts)
+    else:
+        starts = first = sums = counts = np.zeros(0, dtype=np.int64)
+    ends = np.append(starts[1:], n)[:len(starts)] - 1
+    row_group = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, n)))
+    has_base = first < n
+    first = np.minimum(first, n - 1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        base = np.where(has_base, values[first], np.nan)
+        previous = np.r_[np.nan, values[:-1]]
+        previous[starts] = np.nan
+        cumulative = np.cumsum(filled)
+        cumulative -= (cumulative[starts] - filled[starts])[row_group]
+        series = pd.DataFrame({
+            market: labels[group],
+            date: when,
+            value: values,
+            'base': base[row_group],
+            'index': values / base[row_group] * 100,
+            'growth': (values / previous - 1) * 100,
+            'cumulative': cumulative,
+        })
+        stats = pd.DataFrame({
+            'base': base,
+            'first_date': np.where(has_base, when[first], np.datetime64('NaT')),
+            'latest': values[ends],
+            'latest_date': when[ends],
+            'index': values[ends] / base * 100,
+            'total': cumulative[ends],
+            'mean': sums / counts,
+        }, index=labels[group[starts]])
+    summary = stats.reindex(labels[present])
+    for name, means in window_means.items():
+        summary[name] = means[present]
+    summary.index.name = market
+    return series, summary.reset_index()
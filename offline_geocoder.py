@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+
+from address import canonicalize
+
+# OpenAddresses column names; REGION (state) is optional
+GAZETTEER_COLUMNS = ['LON', 'LAT', 'NUMBER', 'STREET', 'REGION']
+
+EXACT = 'exact'
+INTERPOLATED = 'interpolated'
+
+# Don't interpolate between address points further apart than this many house numbers
+MAX_NUMBER_GAP = 100
+
+# House number, Queens-style lot after a dash ("37-18"), letter suffix ("12A"), street
+HOUSE = r'^\s*(\d+)(?:-(\d+))?([A-Za-z])?\s+(.+?)\s*$'
+
+# Queens "block-lot" numbers sort as block * LOT_BASE + lot: 37-18 -> 37018
+LOT_BASE = 1000
+
+
+def _split(addresses):
+    """(numbers, streets): every house number as one comparable float, and the street.
+
+    "29 W 38th St" -> (29, "W 38th St"), "37-18 Northern Blvd" -> (37018, ...), "12A Main St"
+    -> (12.01, ...), so equal numbers mean the whole house number matches and the integer
+    part's parity is the side of the street. Parsed once per distinct string; no house
+    number -> NaN, None.
+    """
+    codes, uniques = pd.factorize(pd.Series(addresses, dtype=object))
+    parts = pd.Series(uniques, dtype=object).str.extract(HOUSE)
+    numbers = pd.to_numeric(parts[0], errors='coerce').to_numpy(dtype='float64')
+    lots = pd.to_numeric(parts[1], errors='coerce').to_numpy(dtype='float64')
+    numbers = np.where(np.isnan(lots), numbers, numbers * LOT_BASE + lots)
+    letters = parts[2].str.upper().to_numpy(dtype=object)
+    has_letter = pd.notna(letters)
+    offsets = np.zeros(len(numbers))
+    offsets[has_letter] = [(ord(c) - ord('A') + 1) / 100 for c in letters[has_letter]]
+    numbers = np.append(numbers + offsets, np.nan)
+    streets = np.append(parts[3].to_numpy(dtype=object), None)
+    return numbers[codes], streets[codes]
+
+
+def _sides(codes, numbers):
+    # Odd and even numbers are on opposite sides of a street, so each side is indexed on its own
+    return codes * 2 + np.floor(np.nan_to_num(numbers)).astype(np.int64) % 2
+
+
+def _street_keys(streets, states=None):
+    """(codes, keys): each row's distinct (state, street) pair and that pair's canonical street key.
+
+    Street names are canonicalized once per distinct name, behind a dummy house number so the
+    direction/suffix rules match the ones applied to full addresses.
+    """
+    street_codes, street_names = pd.factorize(pd.Series(streets, dtype=object))
+    canonical = canonicalize('0 ' + pd.Series(street_names, dtype=object)).str.slice(2).to_numpy(dtype=object)
+    canonical = np.append(canonical, None)
+    if states is None:
+        return street_codes, pd.Series(canonical[:-1], dtype=object)
+    state_codes, state_names = pd.factorize(pd.Series(states, dtype=object))
+    state_names = np.append(pd.Series(state_names, dtype=object).astype(str).str.strip().str.upper().to_numpy(dtype=object), None)
+    width = len(state_names)
+    pair_codes, pairs = pd.factorize(street_codes.astype(np.int64) * width + (state_codes + 1))
+    street_of, state_of = np.divmod(pairs, width)
+    keys = pd.Series(state_names[state_of - 1], dtype=object) + '|' + pd.Series(canonical[street_of], dtype=object)
+    return pair_codes, keys
+
+
+class OfflineGeocoder:
+    """Street index over a local address-point file (e.g. an OpenAddresses CSV).
+
+    Address points are sorted on a combined (street side, house number) key, so a whole
+    batch of addresses is resolved with one searchsorted: exact where a point has the whole
+    house number, otherwise linear interpolation between the nearest numbers on the same
+    side of the same street.
+    """
+
+    name = 'offline'
+
+    def __init__(self, points):
+        by_state = 'REGION' in points.columns and points['REGION'].notna().any()
+        number_codes, number_values = pd.factorize(points['NUMBER'])
+        numbers, _ = _split(pd.Series(number_values, dtype=object).astype(str) + ' x')
+        numbers = np.append(numbers, np.nan)[number_codes]
+        pair_codes, keys = _street_keys(points['STREET'], points['REGION'] if by_state else None)
+        # Street spellings that canonicalize alike ("West 4th Street", "W 4TH ST") share one code
+        key_codes, self.streets = pd.factorize(keys)
+        codes = np.append(key_codes, -1)[pair_codes].astype(np.int64)
+        keep = ~np.isnan(numbers) & (codes >= 0)
+        self.by_state = by_state
+        self.streets = pd.Index(self.streets)
+        sides = _sides(codes[keep], numbers[keep])
+        order = np.lexsort((numbers[keep], sides))
+        self.sides = sides[order]
+        self.numbers = numbers[keep][order]
+        self.lat = points['LAT'].to_numpy(dtype='float64')[keep][order]
+        self.lon = points['LON'].to_numpy(dtype='float64')[keep][order]
+        # side * stride + house number is sorted exactly like (side, number)
+        self.stride = float(np.floor(self.numbers.max()) + 1) if len(self.numbers) else 1.0
+        self.keys = self.sides * self.stride + self.numbers
+
+    @classmethod
+    def from_csv(cls, path):
+        header = pd.read_csv(path, nrows=0).columns
+        usecols = [c for c in GAZETTEER_COLUMNS if c in header]
+        return cls(pd.read_csv(path, usecols=usecols, dtype={'NUMBER': str, 'STREET': str, 'REGION': str}))
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def resolve(self, addresses, states=None):
+        """Geocode canonical addresses in bulk; returns address, lat, lon, match (NaN/None on a miss)."""
+        addresses = pd.Series(addresses, dtype=object).reset_index(drop=True)
+        numbers, streets = _split(addresses)
+        pair_codes, keys = _street_keys(streets, states if self.by_state else None)
+        codes = np.append(self.streets.get_indexer(keys), -1)[pair_codes].astype(np.int64)
+        n = len(addresses)
+        lat, lon = np.full(n, np.nan), np.full(n, np.nan)
+        match = np.full(n, None, dtype=object)
+        ok = (codes >= 0) & ~np.isnan(numbers)
+        if len(self.numbers) and ok.any():
+            number = numbers[ok]
+            side = _sides(codes[ok], number)
+            # Numbers past the end of the index land after the side's last point
+            pos = np.searchsorted(self.keys, side * self.stride + np.minimum(number, self.stride - 0.5), 'left')
+            last = len(self.keys) - 1
+            nxt, prv = np.minimum(pos, last), np.maximum(pos - 1, 0)
+            has_next = (pos <= last) & (self.sides[nxt] == side)
+            has_prev = (pos > 0) & (self.sides[prv] == side)
+            exact = has_next & (self.numbers[nxt] == number)
+            gap = self.numbers[nxt] - self.numbers[prv]
+            between = ~exact & has_next & has_prev & (gap <= MAX_NUMBER_GAP)
+            t = np.where(between, (number - self.numbers[prv]) / np.where(gap == 0, 1, gap), 0)
+            q_lat = np.where(exact, self.lat[nxt], self.lat[prv] + t * (self.lat[nxt] - self.lat[prv]))
+            q_lon = np.where(exact, self.lon[nxt], self.lon[prv] + t * (self.lon[nxt] - self.lon[prv]))
+            hit = exact | between
+            idx = np.flatnonzero(ok)[hit]
+            lat[idx], lon[idx] = q_lat[hit], q_lon[hit]
+            match[idx] = np.where(exact[hit], EXACT, INTERPOLATED)
+        return pd.DataFrame({'address': addresses, 'lat': lat, 'lon': lon, 'match': match})
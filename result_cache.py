@@ -0,0 +1,151 @@
+import functools
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class MemoryBackend:
+    """Per-process LRU store; each gunicorn worker keeps its own copy."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return _MISSING
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class DiskBackend:
+    """LRU store in a local directory, shared by every worker on the host.
+
+    One pickle per key; a hit touches the file, so eviction drops the oldest mtimes.
+    Writes go through a temp file and os.replace, so readers never see partial entries.
+    """
+
+    def __init__(self, maxsize, directory):
+        self.maxsize = maxsize
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.directory, digest + '.pkl')
+
+    def _entries(self):
+        return [e for e in os.scandir(self.directory) if e.name.endswith('.pkl')]
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return _MISSING
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return value
+
+    def set(self, key, value):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))
+        self._evict()
+
+    def _evict(self):
+        entries = self._entries()
+        if len(entries) <= self.maxsize:
+            return
+        def mtime(entry):
+            try:
+                return entry.stat().st_mtime
+            except FileNotFoundError:
+                return 0
+        for entry in sorted(entries, key=mtime)[:len(entries) - self.maxsize]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def __len__(self):
+        return len(self._entries())
+
+    def clear(self):
+        for entry in self._entries():
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+class ResultCache:
+    """Size-bounded LRU cache for callback results, with hit/miss counters.
+
+    `namespace` (e.g. a data version) is folded into every key, so a shared disk
+    cache never serves results computed from older data.
+    """
+
+    def __init__(self, maxsize=64, directory=None, namespace=None):
+        self.backend = DiskBackend(maxsize, directory) if directory else MemoryBackend(maxsize)
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        key = (self.namespace, key)
+        value = self.backend.get(key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = compute()
+        self.backend.set(key, value)
+        return value
+
+    def memoize(self, func):
+        """Cache `func` on its arguments, which must have a stable repr."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = args + tuple(sorted(kwargs.items())) if kwargs else args
+            return self.get_or_compute(key, lambda: func(*args, **kwargs))
+        wrapper.cache = self
+        return wrapper
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.backend)}
+
+    def clear(self):
+        self.backend.clear()
+
+
+def from_env(prefix, namespace=None, maxsize=64):
+    """Cache configured by <prefix>_CACHE_DIR (disk backend if set) and <prefix>_CACHE_SIZE."""
+    directory = os.environ.get(f'{prefix}_CACHE_DIR') or None
+    maxsize = int(os.environ.get(f'{prefix}_CACHE_SIZE', maxsize))
+    return ResultCache(maxsize=maxsize, directory=directory, namespace=namespace)
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+
+STATS = ('mean', 'std', 'min', 'max')
+
+
+def _sparse_table(values, levels, combine):
+    # table[k, i] = combine of values[i:i + 2**k]; entries running past the end are NaN
+    n = len(values)
+    table = np.full((levels + 1, n), np.nan)
+    table[0] = values
+    for k in range(1, levels + 1):
+        half = 2 ** (k - 1)
+        if half >= n:
+            break
+        table[k, :n - half] = combine(table[k - 1, :n - half], table[k - 1, half:])
+    return table
+
+
+def rolling(values, starts, windows, stats=('mean',), min_periods=1):
+    """Trailing-window statistics of groups laid end to end in `values`.
+
+    Group k occupies values[starts[k]:starts[k + 1]]. Returns {(stat, window): array} for
+    every combination, matching groupby(...).rolling(window, min_periods).<stat>() (NaN
+    values are skipped, std uses ddof=1). One set of prefix sums serves every mean/std
+    window and one sparse table every min/max window.
+    """
+    unknown = set(stats) - set(STATS)
+    if unknown:
+        raise ValueError(f"Unknown rolling statistics: {sorted(unknown)}")
+    values = np.asarray(values, dtype='float64')
+    n = len(values)
+    if not len(windows) or not n:
+        return {(stat, w): np.full(n, np.nan) for stat in stats for w in windows}
+    pos = np.arange(n)
+    group_start = np.repeat(starts, np.diff(np.append(starts, n)))
+    valid = ~np.isnan(values)
+    counts = np.r_[0, np.cumsum(valid)]
+    if {'mean', 'std'} & set(stats):
+        # Centre the values so the sums of squares keep their precision
+        shift = values[valid].mean() if valid.any() else 0.0
+        centred = np.where(valid, values - shift, 0.0)
+        sums = np.r_[0.0, np.cumsum(centred)]
+        squares = np.r_[0.0, np.cumsum(centred ** 2)]
+    levels = int(np.log2(max(windows)))
+    tables = {stat: _sparse_table(values, levels, combine)
+              for stat, combine in (('min', np.fmin), ('max', np.fmax)) if stat in stats}
+
+    out = {}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for w in windows:
+            lo = np.maximum(group_start, pos - w + 1)
+            count = counts[pos + 1] - counts[lo]
+            enough = count >= min_periods
+            if 'mean' in stats or 'std' in stats:
+                total = sums[pos + 1] - sums[lo]
+                if 'mean' in stats:
+                    out[('mean', w)] = np.where(enough, total / count + shift, np.nan)
+                if 'std' in stats:
+                    var = np.maximum((squares[pos + 1] - squares[lo] - total ** 2 / count) / (count - 1), 0)
+                    out[('std', w)] = np.where(enough & (count > 1), np.sqrt(var), np.nan)
+            if tables:
+                # Two overlapping power-of-two blocks cover [lo, pos]
+                k = np.log2(pos - lo + 1).astype(np.int64)
+                for stat, table in tables.items():
+                    combine = np.fmin if stat == 'min' else np.fmax
+                    out[(stat, w)] = np.where(enough, combine(table[k, lo], table[k, pos - 2 ** k + 1]), np.nan)
+    return {(stat, w): out[(stat, w)] for stat in stats for w in windows}
+
+
+class RollingStats:
+    """Rolling statistics of one column per group, cached per (stat, window).
+
+    Columns come back aligned with the rows as given. A window that hasn't been asked
+    for before costs one vectorized pass, and append() only recomputes the rows whose
+    windows the new rows fall into, not the whole history.
+    """
+
+    def __init__(self, df, value, by='market', on='date', windows=(), stats=('mean',), min_periods=1):
+        self.value, self.by, self.on = value, by, on
+        self.min_periods = min_periods
+        self.values = df[value].to_numpy(dtype='float64')
+        self.keys = df[by].to_numpy(dtype=object)
+        self.dates = df[on].to_numpy()
+        self.columns = {}
+        self._sort()
+        self.compute(windows, stats)
+
+    def __len__(self):
+        return len(self.values)
+
+    def _sort(self):
+        codes, _ = pd.factorize(self.keys)
+        self.order = np.lexsort((self.dates, codes))
+        sorted_codes = codes[self.order]
+        self.starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]) if len(codes) else codes
+
+    def compute(self, windows, stats=('mean',)):
+        """Compute and cache every (stat, window) pair not computed yet."""
+        todo = [(stat, w) for stat in stats for w in windows if (stat, w) not in self.columns]
+        if not todo:
+            return
+        results = rolling(self.values[self.order], self.starts, sorted({w for _, w in todo}),
+                          sorted({stat for stat, _ in todo}), self.min_periods)
+        for key in todo:
+            column = np.empty(len(self.values))
+            column[self.order] = results[key]
+            self.columns[key] = column
+
+    def column(self, stat, window):
+        """Rolling `stat` over `window` rows per group, as an array aligned with the input rows."""
+        self.compute([window], [stat])
+        return self.columns[(stat, window)]
+
+    def append(self, df):
+        """Add rows (e.g. a new quarter) and update every cached column for them."""
+        old = len(self.values)
+        self.values = np.append(self.values, df[self.value].to_numpy(dtype='float64'))
+        self.keys = np.append(self.keys, df[self.by].to_numpy(dtype=object))
+        self.dates = np.append(self.dates, df[self.on].to_numpy())
+        self._sort()
+        n = len(self.values)
+        for key in self.columns:
+            self.columns[key] = np.append(self.columns[key], np.full(n - old, np.nan))
+        if not self.columns or n == old:
+            return
+        # Sorted position of every row, and the first new row of each group
+        position = np.empty(n, dtype=np.int64)
+        position[self.order] = np.arange(n)
+        sizes = np.diff(np.append(self.starts, n))
+        row_group = np.repeat(np.arange(len(self.starts)), sizes)
+        first_new = np.full(len(self.starts), n)
+        np.minimum.at(first_new, row_group[position[old:]], position[old:])
+        # Recompute from each touched group's first new row, with enough history before it
+        longest = max(w for _, w in self.columns)
+        touched = np.flatnonzero(first_new < n)
+        lo = np.maximum(self.starts[touched], first_new[touched] - longest + 1)
+        hi = self.starts[touched] + sizes[touched]
+        span = np.concatenate([np.arange(a, b) for a, b in zip(lo, hi)])
+        span_starts = np.r_[0, np.cumsum(hi - lo)[:-1]]
+        keep = span >= np.repeat(first_new[touched], hi - lo)
+        stats = sorted({stat for stat, _ in self.columns})
+        windows = sorted({w for _, w in self.columns})
+        results = rolling(self.values[self.order][span], span_starts, windows, stats, self.min_periods)
+        rows = self.order[span[keep]]
+        for key, column in self.columns.items():
+            column[rows] = results[key][keep]
@@ -0,0 +1,65 @@
+import pandas as pd
+
+# Low-cardinality strings (plus address, which repeats once per lease in a building)
+CATEGORY_COLUMNS = [
+    'market', 'city', 'state', 'region', 'quarter', 'internal_industry', 'internal_class',
+    'space_type', 'transaction_type', 'address', 'building_name', 'metro', 'industry_group',
+]
+
+# Small integer keys; nullable variants are used only when a column has gaps
+INTEGER_COLUMNS = {'year': 'int16', 'month': 'int8', 'monthsigned': 'int8'}
+
+# Proportions, rents and rates don't need double precision
+FLOAT32_COLUMNS = [
+    'occupancy_proportion', 'starting_occupancy_proportion', 'avg_occupancy_proportion',
+    'availability_proportion', 'direct_availability_proportion', 'sublet_availability_proportion',
+    'internal_class_rent', 'overall_rent', 'direct_internal_class_rent', 'direct_overall_rent',
+    'sublet_internal_class_rent', 'sublet_overall_rent', 'unemployment_rate',
+]
+
+# Square footage gets summed into totals in the hundreds of millions, so it stays float64
+FLOAT64_COLUMNS = [
+    'leasedsf', 'rba', 'available_space', 'direct_available_space', 'sublet_available_space', 'leasing',
+]
+
+# Precomputed by the cleaning pipeline (see dates.py); CSV round-trips them as text
+DATE_COLUMNS = ['date', 'month_date']
+
+
+def canonical_columns(df):
+    """Rename columns in place to the canonical snake_case names (leasedSF -> leasedsf)."""
+    df.columns = (
+        df.columns.str.strip().str.lower().str.replace(' ', '_').str.replace(r'["\']', '', regex=True)
+    )
+    return df
+
+
+def _integer(series, dtype):
+    series = pd.to_numeric(series, errors='coerce')
+    if series.isna().any():
+        return series.astype(dtype.capitalize())
+    return series.astype(dtype)
+
+
+def apply_schema(df):
+    """Canonical names plus compact dtypes: categoricals for repeated strings, downcast numerics.
+
+    Safe to call on a frame that already has the schema applied.
+    """
+    df = canonical_columns(df)
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    for col, dtype in INTEGER_COLUMNS.items():
+        if col in df.columns and df[col].dtype != dtype:
+            df[col] = _integer(df[col], dtype)
+    for col in FLOAT32_COLUMNS:
+        if col in df.columns and df[col].dtype != 'float32':
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float32')
+    for col in FLOAT64_COLUMNS:
+        if col in df.columns and df[col].dtype != 'float64':
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+    for col in DATE_COLUMNS:
+        if col in df.columns and not pd.api.types.is_datetime64_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], format='%Y-%m-%d', errors='coerce')
+    return df
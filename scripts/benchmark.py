@@ -0,0 +1,251 @@
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, base_dir)
+import synthetic
+
+# Lease rows per size; the other datasets keep the real files' fixed cardinalities
+SIZES = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+BASELINE_FILE = os.path.join(base_dir, 'benchmark_baseline.json')
+
+# A stage regresses when it is this much slower or larger than the baseline...
+TIME_THRESHOLD = 1.25
+RSS_THRESHOLD = 1.20
+# ...and the difference is above timer and allocator noise
+MIN_SECONDS = 0.1
+MIN_RSS_MB = 25
+
+# Occupancy views and date ranges the tech hub callback is timed on
+TECH_HUB_CALLS = [
+    ('2018-01-01', '2024-12-31', 'raw'),
+    ('2019-01-01', '2023-01-01', '2y'),
+    ('2020-01-01', '2022-12-31', '3y'),
+    ('2021-01-01', '2024-12-31', 'custom'),
+]
+
+
+# --- Stages ---
+# Each stage runs in a fresh process: setup(data_dir, cleaned_dir) returns the state run()
+# needs, and only run() is timed. Peak RSS covers the whole process.
+
+def _cleaner(data_dir, cleaned_dir):
+    import clean_and_import
+    clean_and_import.DATA_DIR, clean_and_import.OUTPUT_DIR = data_dir, cleaned_dir
+    os.makedirs(cleaned_dir, exist_ok=True)
+    return clean_and_import
+
+
+def _generate(data_dir, cleaned_dir, rows, seed):
+    synthetic.write_dataset(data_dir, rows, seed)
+
+
+def _clean_small(clean_and_import):
+    for cleaner in clean_and_import.CLEANERS.values():
+        cleaner()
+
+
+def _clean_leases(clean_and_import):
+    clean_and_import.clean_leases()
+
+
+def _dashboard_env(data_dir, cleaned_dir):
+    os.environ['DASHBOARD_DATA_DIR'] = cleaned_dir
+
+
+def _dashboard_load(_):
+    # Import loads the data; the memoized tables are what every tab starts from
+    import visualize_dashboard as dashboard
+    for table in (dashboard.top_industries, dashboard.grouped_leases, dashboard.pivot_metro,
+                  dashboard.lease_q, dashboard.unemp_monthly):
+        table()
+
+
+def _dashboard(data_dir, cleaned_dir):
+    _dashboard_env(data_dir, cleaned_dir)
+    import visualize_dashboard
+    return visualize_dashboard
+
+
+def _dashboard_figures(dashboard):
+    # Build and serialize every figure, as the figure store does
+    for build in dashboard.STORED_FIGURES.values():
+        build().to_json()
+
+
+def _dashboard_callbacks(dashboard):
+    for tab in ('tab-1', 'tab-2', 'tab-3', 'tab-4'):
+        dashboard.render_content(tab)
+    dashboard.update_unemp({'xaxis.range[0]': '2020-01-01', 'xaxis.range[1]': '2020-12-31'})
+    dashboard.update_nyc_map({'mapbox.center': {'lat': 40.75, 'lon': -73.98}, 'mapbox.zoom': 13})
+
+
+def _tech_hub_env(data_dir, cleaned_dir):
+    # The app reads the raw CSVs from the working directory
+    os.chdir(data_dir)
+    os.environ['TECH_HUB_CACHE_DIR'] = ''
+
+
+def _tech_hub_load(_):
+    import tech_hub_analysis  # noqa: F401
+
+
+def _tech_hub(data_dir, cleaned_dir):
+    _tech_hub_env(data_dir, cleaned_dir)
+    import tech_hub_analysis
+    return tech_hub_analysis
+
+
+def _tech_hub_callbacks(tech_hub):
+    for start, end, view in TECH_HUB_CALLS:
+        tech_hub.update_graphs(start, end, view)
+
+
+STAGES = {
+    'clean_small': (_cleaner, _clean_small),
+    'clean_leases': (_cleaner, _clean_leases),
+    'dashboard_load': (_dashboard_env, _dashboard_load),
+    'dashboard_figures': (_dashboard, _dashboard_figures),
+    'dashboard_callbacks': (_dashboard, _dashboard_callbacks),
+    'tech_hub_load': (_tech_hub_env, _tech_hub_load),
+    'tech_hub_callbacks': (_tech_hub, _tech_hub_callbacks),
+}
+# The dashboard reads what the cleaning stages write, so selecting it runs them too
+CLEANING_STAGES = ('clean_small', 'clean_leases')
+
+
+def _run_stage(name, data_dir, cleaned_dir, rows, seed):
+    import warnings
+    warnings.simplefilter('ignore')
+    with contextlib.redirect_stdout(io.StringIO()):
+        if name == 'generate':
+            start = time.perf_counter()
+            _generate(data_dir, cleaned_dir, rows, seed)
+        else:
+            setup, run = STAGES[name]
+            state = setup(data_dir, cleaned_dir)
+            start = time.perf_counter()
+            run(state)
+    seconds = time.perf_counter() - start
+    # ru_maxrss is in kB on Linux
+    return seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_stage(name, data_dir, cleaned_dir, rows, seed=0):
+    """(seconds, peak RSS in MB) of one stage, run in a new process."""
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(_run_stage, name, data_dir, cleaned_dir, rows, seed).result()
+
+
+def run_size(size, stages, work_dir, repeat=1, seed=0):
+    """{stage: {'seconds', 'peak_rss_mb'}} for one size: the best time and the worst RSS of `repeat` runs."""
+    rows = SIZES[size]
+    data_dir = os.path.join(work_dir, size, 'data')
+    cleaned_dir = os.path.join(work_dir, size, 'cleaned_data')
+    results = {}
+    for name in ['generate'] + [s for s in STAGES if s in stages]:
+        runs = [run_stage(name, data_dir, cleaned_dir, rows, seed) for _ in range(1 if name == 'generate' else repeat)]
+        results[name] = {'seconds': round(min(r[0] for r in runs), 4),
+                         'peak_rss_mb': round(max(r[1] for r in runs), 1)}
+        print(f"  {size:>4} {name:<20} {results[name]['seconds']:9.3f}s {results[name]['peak_rss_mb']:9.1f} MB",
+              flush=True)
+    return results
+
+
+def compare(results, baseline, time_threshold=TIME_THRESHOLD, rss_threshold=RSS_THRESHOLD):
+    """Rows of (size, stage, metric, current, baseline, ratio, regressed) for every measured stage."""
+    rows = []
+    for size, stages in results.items():
+        for stage, current in stages.items():
+            previous = baseline.get(size, {}).get(stage)
+            if previous is None:
+                continue
+            for metric, threshold, floor in (('seconds', time_threshold, MIN_SECONDS),
+                                             ('peak_rss_mb', rss_threshold, MIN_RSS_MB)):
+                now, then = current[metric], previous[metric]
+                ratio = now / then if then else float('inf')
+                rows.append((size, stage, metric, now, then, ratio, ratio > threshold and now - then > floor))
+    return rows
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline.get('data_version') != synthetic.VERSION:
+        print(f"{path} was measured on other synthetic data (version {baseline.get('data_version')}); not comparing")
+        return {}
+    return baseline['results']
+
+
+def save_baseline(path, results):
+    merged = load_baseline(path)
+    merged.update(results)
+    with open(path, 'w') as f:
+        json.dump({'data_version': synthetic.VERSION,
+                   'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                               'cpus': os.cpu_count()},
+                   'results': merged}, f, indent=2, sort_keys=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the ingest, aggregation and dashboard paths on synthetic data.")
+    parser.add_argument('--sizes', default='10k', help=f"comma-separated sizes from {', '.join(SIZES)}")
+    parser.add_argument('--stages', help=f"comma-separated stages (default: all of {', '.join(STAGES)})")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per stage; the fastest counts")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--work-dir', help="where to write the data (default: a temporary directory, removed after)")
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baseline")
+    parser.add_argument('--time-threshold', type=float, default=TIME_THRESHOLD)
+    parser.add_argument('--rss-threshold', type=float, default=RSS_THRESHOLD)
+    parser.add_argument('--output', help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    sizes = args.sizes.split(',')
+    stages = args.stages.split(',') if args.stages else list(STAGES)
+    unknown = (set(sizes) - set(SIZES)) | (set(stages) - set(STAGES))
+    if unknown:
+        parser.error(f"unknown sizes/stages: {', '.join(sorted(unknown))}")
+    if any(stage.startswith('dashboard') for stage in stages):
+        stages += CLEANING_STAGES
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='benchmark-')
+    results = {}
+    try:
+        for size in sizes:
+            results[size] = run_size(size, stages, work_dir, args.repeat, args.seed)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    rows = compare(results, load_baseline(args.baseline), args.time_threshold, args.rss_threshold)
+    if rows:
+        print(f"\nAgainst {args.baseline}:")
+        for size, stage, metric, now, then, ratio, regressed in rows:
+            print(f"  {size:>4} {stage:<20} {metric:<12} {now:10.3f} vs {then:10.3f} "
+                  f"({(ratio - 1) * 100:+6.1f}%){'  REGRESSION' if regressed else ''}")
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"Saved baseline to {args.baseline}")
+    elif any(row[-1] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import visualize_dashboard as dashboard
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-build the dashboard's figures for the current data.")
+    parser.add_argument('names', nargs='*', help=f"figures to build (default: all of {', '.join(dashboard.STORED_FIGURES)})")
+    parser.add_argument('--keep-old', action='store_true', help="don't delete figures of other data versions")
+    args = parser.parse_args()
+
+    unknown = set(args.names) - set(dashboard.STORED_FIGURES)
+    if unknown:
+        parser.error(f"unknown figures: {', '.join(sorted(unknown))}")
+    start = time.perf_counter()
+    built = dashboard.build_figures(args.names or None, prune=not args.keep_old)
+    store = dashboard.figure_store()
+    size = sum(os.path.getsize(store.path(name)) for name in dashboard.STORED_FIGURES if name in store)
+    print(f"Built {len(built)} figures in {time.perf_counter() - start:.1f}s "
+          f"(version {store.version}, {size / 1e3:,.0f} kB compressed in {store.directory})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, base_dir)
+import synthetic
+
+DATA_DIR = os.path.join(base_dir, 'DF', 'data')
+SUFFIXES = {'k': 10 ** 3, 'm': 10 ** 6, 'b': 10 ** 9}
+
+
+def row_count(text):
+    """'250000', '250_000', '250k', '1.5m' -> an int."""
+    text = text.strip().lower().replace('_', '')
+    if text and text[-1] in SUFFIXES:
+        return int(float(text[:-1]) * SUFFIXES[text[-1]])
+    return int(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic DataFest CSVs (Leases, Occupancy, Price, Unemployment).")
+    parser.add_argument('rows', type=row_count, help="lease rows, e.g. 200k, 10m, 100m")
+    parser.add_argument('--out', default=DATA_DIR, help="output directory (default: DF/data)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1, help="processes generating lease chunks")
+    parser.add_argument('--chunk-rows', type=row_count, default=synthetic.CHUNK_ROWS)
+    parser.add_argument('--force', action='store_true', help="overwrite existing CSVs in the output directory")
+    args = parser.parse_args()
+
+    existing = [name for name in (synthetic.LEASES_FILE, synthetic.OCCUPANCY_FILE, synthetic.PRICE_FILE,
+                                  synthetic.UNEMPLOYMENT_FILE) if os.path.exists(os.path.join(args.out, name))]
+    if existing and not args.force:
+        parser.error(f"{args.out} already has {', '.join(existing)}; pass --force to overwrite")
+
+    start = time.perf_counter()
+
+    def progress(rows, written):
+        elapsed = time.perf_counter() - start
+        print(f"\r  {rows:,} / {args.rows:,} leases, {written / 1e9:.2f} GB, "
+              f"{written / 1e9 / elapsed * 60:.1f} GB/min", end='', flush=True)
+
+    if args.workers > 1:
+        with ProcessPoolExecutor(args.workers) as pool:
+            synthetic.write_dataset(args.out, args.rows, args.seed, args.chunk_rows, pool, progress)
+    else:
+        synthetic.write_dataset(args.out, args.rows, args.seed, args.chunk_rows, progress=progress)
+    size = os.path.getsize(os.path.join(args.out, synthetic.LEASES_FILE))
+    print(f"\nWrote {args.rows:,} leases ({size / 1e9:.2f} GB) and the market tables to {args.out} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
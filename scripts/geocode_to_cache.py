@@ -1,52 +1,109 @@
-import pandas as pd
-from geopy.geocoders import Nominatim
-from geopy.extra.rate_limiter import RateLimiter
-import time
+import argparse
+import asyncio
 import os
+import re
+import sys
+
+import pandas as pd
 
-# Path to input addresses and output cache
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import geocode_store
+from address import canonicalize
+from classify import METROS, classify_metros
+from geocoder import NOMINATIM_URL, Journal, NominatimProvider, geocode_all, make_record
+from offline_geocoder import OfflineGeocoder
+
+# Path to input addresses
 ADDR_FILE = 'cleaned_data/leases_clean.csv'
-CACHE_FILE = 'nyc_geocode_cache.csv'
-
-# Load all unique NYC addresses
-leases = pd.read_csv(ADDR_FILE)
-nyc_cities = ["new york", "manhattan", "brooklyn", "queens", "nyc", "bronx", "staten island"]
-leases_nyc = leases[leases['city'].str.lower().isin(nyc_cities)]
-addresses = leases_nyc['address'].dropna().unique()
-
-# Load or initialize cache
-if os.path.exists(CACHE_FILE):
-    cache = pd.read_csv(CACHE_FILE)
-else:
-    cache = pd.DataFrame(columns=['address', 'lat', 'lon'])
-
-cached_addresses = set(cache['address'])
-todo = [addr for addr in addresses if addr not in cached_addresses]
-
-if not todo:
-    print('All addresses already cached!')
-    exit(0)
-
-geolocator = Nominatim(user_agent='df_static_cache')
-geocode = RateLimiter(geolocator.geocode, min_delay_seconds=2, max_retries=1, error_wait_seconds=10, swallow_exceptions=True)
-
-new_rows = []
-for i, addr in enumerate(todo):
-    q = f"{addr}, New York, NY"
-    loc = geocode(q)
-    if loc:
-        print(f"{i+1}/{len(todo)}: {addr} -> ({loc.latitude}, {loc.longitude})")
-        new_rows.append({'address': addr, 'lat': loc.latitude, 'lon': loc.longitude})
-    else:
-        print(f"{i+1}/{len(todo)}: {addr} -> NOT FOUND")
-    # Optionally save every 10 results
-    if (i+1) % 10 == 0:
-        cache = pd.concat([cache, pd.DataFrame(new_rows)], ignore_index=True)
-        cache.to_csv(CACHE_FILE, index=False)
-        new_rows = []
-
-if new_rows:
-    cache = pd.concat([cache, pd.DataFrame(new_rows)], ignore_index=True)
-    cache.to_csv(CACHE_FILE, index=False)
-
-print(f"Done. Cached {len(cache)} addresses.")
+# Every result (including NOT FOUND) lands in a per-metro journal first, then in the store
+JOURNAL_DIR = 'geocode_journal'
+# raw lease address -> canonical address (the store key) per metro, for joining leases to the store
+ADDRESS_MAP_FILE = 'geocode_address_map.csv'
+
+
+def metro_addresses(leases, metro):
+    """One row per canonical address in `metro`, with the city/state to put in the query."""
+    rows = leases[leases['metro'] == metro].dropna(subset=['canonical_address'])
+    return rows.drop_duplicates('canonical_address')[['canonical_address', 'city', 'state']]
+
+
+def journal_path(metro):
+    return os.path.join(JOURNAL_DIR, re.sub(r'\W+', '_', metro.lower()).strip('_') + '.jsonl')
+
+
+def geocode_offline(conn, todo, metro, gazetteer):
+    """Resolve what the local gazetteer can in one batch; returns the addresses it missed."""
+    resolved = gazetteer.resolve(todo['canonical_address'], todo['state'].to_numpy())
+    hits = resolved.dropna(subset=['lat', 'lon'])
+    geocode_store.upsert(conn, (make_record(a, (lat, lon), gazetteer.name)
+                                for a, lat, lon in zip(hits['address'], hits['lat'], hits['lon'])), metro)
+    print(f"{metro}: {len(hits)} resolved offline, {len(todo) - len(hits)} left for the online provider")
+    return todo[resolved['lat'].isna().to_numpy()]
+
+
+def store_journal(conn, journal, metro):
+    """Upsert the journal records not yet in the store, including those of interrupted runs."""
+    records, offset = journal.unstored()
+    geocode_store.upsert(conn, records.values(), metro)
+    journal.mark_stored(offset)
+
+
+def geocode_metro(conn, leases, metro, args, gazetteer=None):
+    todo = metro_addresses(leases, metro)
+    # With --retry-not-found only found addresses count as done
+    known = geocode_store.lookup(conn, todo['canonical_address'], metro, found_only=args.retry_not_found)
+    todo = todo[~todo['canonical_address'].isin(known['address'])]
+    print(f"{metro}: {len(todo)} addresses to geocode ({len(known)} already in the store)")
+    if gazetteer is not None and not todo.empty:
+        todo = geocode_offline(conn, todo, metro, gazetteer)
+    journal = Journal(journal_path(metro))
+    if todo.empty or args.offline_only:
+        store_journal(conn, journal, metro)
+        return
+    queries = {a: f"{a}, {c}, {s}" for a, c, s in zip(todo['canonical_address'], todo['city'], todo['state'])}
+    found, not_found, failed = asyncio.run(geocode_all(
+        list(queries), NominatimProvider(args.url), journal, rate=args.rate, burst=args.burst,
+        concurrency=args.concurrency, retries=args.retries, backoff=args.backoff, query=queries.get,
+        retry_not_found=args.retry_not_found))
+    store_journal(conn, journal, metro)
+    print(f"{metro}: {found} found, {not_found} not found, {failed} failed this run.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geocode lease addresses into the geocode store.")
+    parser.add_argument('--metro', default='NYC Metro', help="metro name from classify.METROS, or 'all'")
+    parser.add_argument('--url', default=NOMINATIM_URL, help="Nominatim-compatible endpoint (e.g. a local stub)")
+    parser.add_argument('--rate', type=float, default=0.5, help="requests per second")
+    parser.add_argument('--burst', type=int, default=1)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--backoff', type=float, default=2.0, help="base delay in seconds before the first retry")
+    parser.add_argument('--retry-not-found', action='store_true', help="retry addresses recorded as NOT FOUND")
+    parser.add_argument('--gazetteer', help="local OpenAddresses-style CSV (LON, LAT, NUMBER, STREET[, REGION]) tried first")
+    parser.add_argument('--offline-only', action='store_true', help="never call the online provider")
+    args = parser.parse_args()
+    metros = list(METROS) if args.metro == 'all' else [args.metro]
+
+    # Load lease addresses with their metro (classify.py) and canonical form (address.py)
+    leases = pd.read_csv(ADDR_FILE, usecols=['address', 'city', 'state'])
+    leases['metro'] = classify_metros(leases['city'], leases['state']).astype(str)
+    leases['canonical_address'] = canonicalize(leases['address'], leases['city'])
+    mapping = leases[leases['metro'].isin(metros)].dropna(subset=['canonical_address'])
+    mapping = mapping.drop_duplicates(['address', 'metro'])[['address', 'canonical_address', 'metro']]
+    mapping.rename(columns={'address': 'raw_address', 'canonical_address': 'address'}).to_csv(ADDRESS_MAP_FILE, index=False)
+
+    os.makedirs(JOURNAL_DIR, exist_ok=True)
+    conn = geocode_store.connect()
+    cities = leases.drop_duplicates('address').set_index('address')['city']
+    migrated = geocode_store.migrate_csv(conn, cities=cities)
+    if migrated:
+        print(f"Imported {migrated} addresses from {geocode_store.LEGACY_CSV}")
+    gazetteer = OfflineGeocoder.from_csv(args.gazetteer) if args.gazetteer else None
+    for metro in metros:
+        geocode_metro(conn, leases, metro, args, gazetteer)
+    total = conn.execute("SELECT COUNT(*) FROM geocodes WHERE status = 'found'").fetchone()[0]
+    print(f"Done. {total} addresses geocoded in {geocode_store.STORE_PATH}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Local stand-in for Nominatim's /search endpoint, for exercising geocode_to_cache.py offline.
+
+Answers from a CSV of address,lat,lon (matched on the text before the first comma of `q`),
+returns [] for anything else, and can inject 503s and latency to exercise retries.
+
+    python scripts/stub_geocoder.py --port 8089 --fail-rate 0.2
+    python scripts/geocode_to_cache.py --url http://127.0.0.1:8089 --rate 50 --concurrency 8
+"""
+import argparse
+import json
+import random
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+
+def make_handler(known, fail_rate=0.0, delay=0.0):
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            if url.path != '/search':
+                self.send_error(404)
+                return
+            time.sleep(delay)
+            if random.random() < fail_rate:
+                self.send_error(503)
+                return
+            query = urllib.parse.parse_qs(url.query).get('q', [''])[0]
+            hit = known.get(query.split(',')[0].strip().lower())
+            body = json.dumps([{'lat': str(hit[0]), 'lon': str(hit[1])}] if hit else []).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return StubHandler
+
+
+def serve(known, host='127.0.0.1', port=8089, fail_rate=0.0, delay=0.0):
+    """Start the stub (call serve_forever, or run it in a thread); port=0 picks a free port."""
+    known = {str(a).strip().lower(): (lat, lon) for a, (lat, lon) in known.items()}
+    return ThreadingHTTPServer((host, port), make_handler(known, fail_rate, delay))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Stub Nominatim /search server.")
+    parser.add_argument('--data', default='nyc_geocode_cache.csv', help="CSV with address,lat,lon")
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    parser.add_argument('--delay', type=float, default=0.0)
+    args = parser.parse_args()
+    data = pd.read_csv(args.data)
+    server = serve(dict(zip(data['address'], zip(data['lat'], data['lon']))), port=args.port,
+                   fail_rate=args.fail_rate, delay=args.delay)
+    print(f"Stub geocoder on http://127.0.0.1:{server.server_port}")
+    server.serve_forever()
@@ -0,0 +1,88 @@
+import functools
+
+import numpy as np
+import pandas as pd
+
+TILE_SIZE = 256
+# Cell edge in screen pixels: a 1200x800 map shows at most ~600 cells whatever the zoom
+CELL_PIXELS = 40
+# Below this many leases in view, send the leases themselves instead of cells
+MAX_POINTS = 1500
+# Last zoom level at which cells are still formed
+MAX_ZOOM = 20
+
+
+def mercator(lat, lon):
+    """lat/lon in degrees -> Web Mercator x, y in [0, 1), y growing southwards."""
+    lat = np.clip(np.asarray(lat, dtype='float64'), -85.05112878, 85.05112878)
+    x = (np.asarray(lon, dtype='float64') + 180) / 360
+    s = np.sin(np.radians(lat))
+    y = 0.5 - np.log((1 + s) / (1 - s)) / (4 * np.pi)
+    return x, y
+
+
+class PointIndex:
+    """Projected points sorted on x, aggregated on demand into quadtree cells.
+
+    Cells are aligned to the 2**zoom tile pyramid, so they stay put while the map pans and
+    each zoom level gives a consistent clustering. Results are cached per (zoom level,
+    cell-aligned viewport).
+    """
+
+    def __init__(self, lat, lon, category):
+        x, y = mercator(lat, lon)
+        valid = ~(np.isnan(x) | np.isnan(y))
+        order = np.flatnonzero(valid)[np.argsort(x[valid], kind='stable')]
+        self.rows = order
+        self.x, self.y = x[order], y[order]
+        self.lat = np.asarray(lat, dtype='float64')[order]
+        self.lon = np.asarray(lon, dtype='float64')[order]
+        codes, self.categories = pd.factorize(pd.Series(category).astype(str).to_numpy()[order])
+        self.codes = codes
+        self.aggregate = functools.lru_cache(maxsize=256)(self._aggregate)
+
+    def __len__(self):
+        return len(self.x)
+
+    def cells(self, zoom, west, south, east, north):
+        """Aggregate for a viewport: one row per leaf point or quadtree cell.
+
+        Columns: lat, lon (centroid), count, category (most common in the cell), row (the
+        point's position in the input for single leases, -1 for cells).
+        """
+        level = int(np.clip(np.floor(zoom), 0, MAX_ZOOM))
+        # Snap the viewport outwards to the cell grid so nearby views share a cache entry
+        n = 2 ** level * TILE_SIZE // CELL_PIXELS
+        (x0, x1), (y1, y0) = mercator([south, north], [west, east])
+        box = (int(np.floor(x0 * n)), int(np.floor(y0 * n)), int(np.ceil(x1 * n)), int(np.ceil(y1 * n)))
+        return self.aggregate(level, box)
+
+    def _aggregate(self, level, box):
+        n = 2 ** level * TILE_SIZE // CELL_PIXELS
+        lo, hi = np.searchsorted(self.x, [box[0] / n, box[2] / n], side='left')
+        y = self.y[lo:hi]
+        idx = lo + np.flatnonzero((y >= box[1] / n) & (y <= box[3] / n))
+        if len(idx) <= MAX_POINTS:
+            return pd.DataFrame({'lat': self.lat[idx], 'lon': self.lon[idx], 'count': 1,
+                                 'category': self.categories[self.codes[idx]], 'row': self.rows[idx]})
+        cx = np.floor(self.x[idx] * n).astype(np.int64)
+        cy = np.floor(self.y[idx] * n).astype(np.int64)
+        cell, inverse = np.unique(cx * (n + 1) + cy, return_inverse=True)
+        count = np.bincount(inverse)
+        lat = np.bincount(inverse, weights=self.lat[idx]) / count
+        lon = np.bincount(inverse, weights=self.lon[idx]) / count
+        ncat = max(len(self.categories), 1)
+        by_category = np.bincount(inverse * ncat + self.codes[idx], minlength=len(cell) * ncat)
+        dominant = by_category.reshape(len(cell), ncat).argmax(axis=1)
+        return pd.DataFrame({'lat': lat, 'lon': lon, 'count': count,
+                             'category': self.categories[dominant], 'row': -1})
+
+
+def viewport(lat, lon, zoom, width=1000, height=600):
+    """(west, south, east, north) of a width x height pixel map centred on lat/lon."""
+    x, y = mercator(lat, lon)
+    scale = TILE_SIZE * 2.0 ** zoom
+    dx, dy = width / 2 / scale, height / 2 / scale
+    def to_lat(y):
+        return float(np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y)))))
+    return float((x - dx) * 360 - 180), to_lat(y + dy), float((x + dx) * 360 - 180), to_lat(y - dy)
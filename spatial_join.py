@@ -0,0 +1,225 @@
+import os
+import struct
+
+import numpy as np
+import pandas as pd
+
+TEXAS_BOUNDARY = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'process', 'Texas_State_Boundary', 'State_Boundary.shp')
+
+POLYGON_TYPES = {5, 15, 25}  # Polygon, PolygonZ, PolygonM
+EARTH_RADIUS = 6378137.0
+
+OUTSIDE, INSIDE, BOUNDARY = 0, 1, 2
+
+# Caps the points x edges matrix of one exact-test batch
+EXACT_BATCH = 4_000_000
+
+
+def _read_dbf(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'rb') as f:
+        data = f.read()
+    count, header_len, record_len = struct.unpack('<IHH', data[4:12])
+    fields, pos = [], 32
+    while data[pos] != 0x0D:
+        name = data[pos:pos + 11].split(b'\0')[0].decode('latin-1')
+        fields.append((name, data[pos + 16]))
+        pos += 32
+    records = []
+    for i in range(count):
+        offset = header_len + i * record_len + 1  # skip the deletion flag
+        record = {}
+        for name, length in fields:
+            record[name] = data[offset:offset + length].decode('latin-1').strip()
+            offset += length
+        records.append(record)
+    return records
+
+
+def _is_web_mercator(shp_path):
+    prj = os.path.splitext(shp_path)[0] + '.prj'
+    if not os.path.exists(prj):
+        return False
+    with open(prj) as f:
+        text = f.read()
+    return 'Mercator_Auxiliary_Sphere' in text or 'Web_Mercator' in text or 'Pseudo-Mercator' in text
+
+
+def read_shapefile(path):
+    """Polygons of an ESRI shapefile as [(rings, attributes)], rings as (n, 2) lon/lat arrays.
+
+    Only polygon shapes are read; Web Mercator files (like the Texas boundary) are
+    converted back to degrees, anything else is assumed to be lon/lat already.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    mercator = _is_web_mercator(path)
+    attributes = _read_dbf(os.path.splitext(path)[0] + '.dbf')
+    shapes, pos = [], 100
+    while pos + 8 <= len(data):
+        _, words = struct.unpack('>ii', data[pos:pos + 8])
+        content = data[pos + 8:pos + 8 + words * 2]
+        pos += 8 + words * 2
+        if struct.unpack('<i', content[:4])[0] not in POLYGON_TYPES:
+            continue
+        n_parts, n_points = struct.unpack('<ii', content[36:44])
+        parts = np.frombuffer(content, '<i4', n_parts, 44)
+        points = np.frombuffer(content, '<f8', n_points * 2, 44 + 4 * n_parts).reshape(-1, 2).copy()
+        if mercator:
+            points[:, 0] = np.degrees(points[:, 0] / EARTH_RADIUS)
+            points[:, 1] = np.degrees(2 * np.arctan(np.exp(points[:, 1] / EARTH_RADIUS)) - np.pi / 2)
+        rings = np.split(points, parts[1:])
+        shapes.append((rings, attributes[len(shapes)] if len(shapes) < len(attributes) else {}))
+    return shapes
+
+
+class PreparedPolygon:
+    """A (multi)polygon prepared for fast vectorized point-in-polygon tests (even-odd rule).
+
+    A grid over the bounding box marks each cell as inside, outside or crossed by the
+    boundary; only points in boundary cells get an exact crossing-number test, and then
+    only against the edges that span their grid row.
+    """
+
+    def __init__(self, rings, grid=256, attributes=None):
+        self.attributes = attributes or {}
+        starts = np.concatenate([r[:-1] for r in rings if len(r) > 1])
+        ends = np.concatenate([r[1:] for r in rings if len(r) > 1])
+        # Drop horizontal edges: they never cross a horizontal ray
+        keep = starts[:, 1] != ends[:, 1]
+        self.x1, self.y1 = starts[keep, 0], starts[keep, 1]
+        self.x2, self.y2 = ends[keep, 0], ends[keep, 1]
+        allpoints = np.concatenate(rings)
+        self.bounds = (*allpoints.min(axis=0), *allpoints.max(axis=0))
+        west, south, east, north = self.bounds
+        self.grid = grid
+        self.dx, self.dy = (east - west) / grid or 1.0, (north - south) / grid or 1.0
+
+        # Edges bucketed by the grid rows their y-range touches (CSR layout)
+        lo = self._row(np.minimum(self.y1, self.y2))
+        hi = self._row(np.maximum(self.y1, self.y2))
+        spans = hi - lo + 1
+        edge = np.repeat(np.arange(len(lo)), spans)
+        row = np.repeat(lo, spans) + (np.arange(len(edge)) - np.repeat(np.cumsum(spans) - spans, spans))
+        order = np.argsort(row, kind='stable')
+        self.row_edges = edge[order]
+        self.row_offsets = np.searchsorted(row[order], np.arange(grid + 1))
+
+        # Cells the boundary passes through (sampled at half-cell steps, then dilated by one cell)
+        length = np.maximum(np.abs(self.x2 - self.x1) / self.dx, np.abs(self.y2 - self.y1) / self.dy)
+        steps = np.ceil(length * 2).astype(np.int64) + 1
+        t = np.arange(steps.sum()) - np.repeat(np.cumsum(steps) - steps, steps)
+        t = t / np.repeat(np.maximum(steps - 1, 1), steps)
+        e = np.repeat(np.arange(len(steps)), steps)
+        sx = self.x1[e] + t * (self.x2[e] - self.x1[e])
+        sy = self.y1[e] + t * (self.y2[e] - self.y1[e])
+        crossed = np.zeros((grid + 2, grid + 2), dtype=bool)
+        crossed[self._row(sy) + 1, self._col(sx) + 1] = True
+        dilated = crossed.copy()
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                dilated[1:-1, 1:-1] |= crossed[1 + dr:grid + 1 + dr, 1 + dc:grid + 1 + dc]
+        boundary = dilated[1:-1, 1:-1]
+
+        # Every other cell is wholly inside or outside: its centre decides
+        rows, cols = np.nonzero(~boundary)
+        centre_x = west + (cols + 0.5) * self.dx
+        centre_y = south + (rows + 0.5) * self.dy
+        self.cells = np.full((grid, grid), BOUNDARY, dtype=np.int8)
+        self.cells[rows, cols] = np.where(self._exact(centre_x, centre_y, rows), INSIDE, OUTSIDE)
+
+    def _row(self, y):
+        return np.clip(((y - self.bounds[1]) / self.dy).astype(np.int64), 0, self.grid - 1)
+
+    def _col(self, x):
+        return np.clip(((x - self.bounds[0]) / self.dx).astype(np.int64), 0, self.grid - 1)
+
+    def _exact(self, x, y, rows):
+        inside = np.zeros(len(x), dtype=bool)
+        order = np.argsort(rows, kind='stable')
+        bounds = np.searchsorted(rows[order], np.arange(self.grid + 1))
+        for r in np.flatnonzero(np.diff(bounds)):
+            points = order[bounds[r]:bounds[r + 1]]
+            edges = self.row_edges[self.row_offsets[r]:self.row_offsets[r + 1]]
+            if not len(edges):
+                continue
+            x1, y1, x2, y2 = self.x1[edges], self.y1[edges], self.x2[edges], self.y2[edges]
+            step = max(1, EXACT_BATCH // len(edges))
+            for i in range(0, len(points), step):
+                p = points[i:i + step]
+                px, py = x[p, None], y[p, None]
+                spans = (y1 > py) != (y2 > py)
+                cross_x = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+                inside[p] = np.count_nonzero(spans & (px < cross_x), axis=1) % 2 == 1
+        return inside
+
+    def contains(self, lon, lat):
+        """Boolean array: which lon/lat points fall inside the polygon (NaN -> False)."""
+        lon = np.asarray(lon, dtype='float64')
+        lat = np.asarray(lat, dtype='float64')
+        west, south, east, north = self.bounds
+        result = np.zeros(len(lon), dtype=bool)
+        candidate = np.flatnonzero((lon >= west) & (lon <= east) & (lat >= south) & (lat <= north))
+        rows, cols = self._row(lat[candidate]), self._col(lon[candidate])
+        state = self.cells[rows, cols]
+        result[candidate[state == INSIDE]] = True
+        edge = state == BOUNDARY
+        exact = candidate[edge]
+        result[exact] = self._exact(lon[exact], lat[exact], rows[edge])
+        return result
+
+
+class RegionIndex:
+    """Several prepared polygons behind a bounding-box index, for assigning points to regions.
+
+    Points are sorted on longitude once, so each polygon only looks at the slice inside
+    its bounding box before the prepared test runs.
+    """
+
+    def __init__(self, polygons, names):
+        self.polygons = list(polygons)
+        self.names = list(names)
+
+    @classmethod
+    def from_shapefile(cls, path, name_field=None, grid=256):
+        shapes = read_shapefile(path)
+        polygons = [PreparedPolygon(rings, grid, attrs) for rings, attrs in shapes]
+        names = [attrs.get(name_field, i) if name_field else i for i, (_, attrs) in enumerate(shapes)]
+        return cls(polygons, names)
+
+    def assign(self, lon, lat):
+        """Name of the first region containing each point, None where no region does."""
+        lon = np.asarray(lon, dtype='float64')
+        lat = np.asarray(lat, dtype='float64')
+        order = np.argsort(lon, kind='stable')
+        sorted_lon = lon[order]
+        out = np.full(len(lon), None, dtype=object)
+        for polygon, name in zip(self.polygons, self.names):
+            west, south, east, north = polygon.bounds
+            lo = np.searchsorted(sorted_lon, west, side='left')
+            hi = np.searchsorted(sorted_lon, east, side='right')
+            idx = order[lo:hi]
+            idx = idx[out[idx] == None]  # noqa: E711 (elementwise on an object array)
+            out[idx[polygon.contains(lon[idx], lat[idx])]] = name
+        return out
+
+
+def load_boundary(path=TEXAS_BOUNDARY, grid=256):
+    """Every polygon in the shapefile merged into one prepared geometry (e.g. the Texas outline)."""
+    shapes = read_shapefile(path)
+    rings = [ring for shape_rings, _ in shapes for ring in shape_rings]
+    return PreparedPolygon(rings, grid, shapes[0][1] if shapes else None)
+
+
+def markets_within(markets, lon, lat, polygon, share=0.5, fallback=()):
+    """Markets with at least `share` of their located points inside `polygon`.
+
+    Markets in `fallback` without a single located point can't be placed and are
+    counted as inside.
+    """
+    located = pd.DataFrame({'market': np.asarray(markets, dtype=object), 'inside': polygon.contains(lon, lat)})
+    located = located[~(np.isnan(np.asarray(lon, dtype='float64')) | np.isnan(np.asarray(lat, dtype='float64')))]
+    inside = located.groupby('market')['inside'].mean()
+    return sorted(set(inside[inside >= share].index) | (set(fallback) - set(inside.index)))
@@ -0,0 +1,437 @@
+import functools
+import os
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:  # pandas writer, about ten times slower
+    pa = None
+
+# Market -> (state, region, cities, share of leases, first zip code). The first city of a
+# market gets most of its buildings. Names follow the DataFest files (see
+# classify.METROS and market_analysis.MARKET_MAPPING).
+MARKETS = {
+    'Manhattan': ('NY', 'Northeast', ['New York', 'Manhattan', 'Brooklyn'], 14, 10001),
+    'Los Angeles': ('CA', 'West', ['Los Angeles', 'Santa Monica', 'Pasadena', 'Burbank', 'Glendale', 'Culver City'], 8, 90001),
+    'Chicago': ('IL', 'Midwest', ['Chicago', 'Evanston', 'Oak Brook', 'Schaumburg'], 7, 60601),
+    'Dallas/Ft Worth': ('TX', 'South', ['Dallas', 'Fort Worth', 'Plano', 'Irving', 'Arlington', 'Frisco'], 7, 75201),
+    'Washington D.C.': ('DC', 'South', ['Washington D.C.'], 6, 20001),
+    'Houston': ('TX', 'South', ['Houston', 'Sugar Land', 'The Woodlands', 'Katy'], 5, 77001),
+    'Atlanta': ('GA', 'South', ['Atlanta', 'Alpharetta', 'Marietta', 'Sandy Springs'], 5, 30301),
+    'Boston': ('MA', 'Northeast', ['Boston', 'Cambridge', 'Waltham'], 5, 2108),
+    'San Francisco': ('CA', 'West', ['San Francisco'], 5, 94102),
+    'Northern Virginia': ('VA', 'South', ['Arlington', 'Alexandria', 'Tysons', 'McLean'], 4, 22201),
+    'Philadelphia': ('PA', 'Northeast', ['Philadelphia', 'King of Prussia', 'Conshohocken'], 4, 19102),
+    'Seattle': ('WA', 'West', ['Seattle', 'Bellevue', 'Redmond'], 4, 98101),
+    'Denver': ('CO', 'West', ['Denver', 'Englewood'], 3, 80202),
+    'Phoenix': ('AZ', 'West', ['Phoenix', 'Scottsdale', 'Tempe'], 3, 85003),
+    'Austin': ('TX', 'South', ['Austin', 'Round Rock'], 3, 78701),
+    'South Bay/San Jose': ('CA', 'West', ['San Jose', 'Santa Clara', 'Sunnyvale', 'Palo Alto', 'Mountain View'], 3, 95110),
+    'South Florida': ('FL', 'South', ['Miami', 'Fort Lauderdale', 'Coral Gables'], 3, 33101),
+    'Charlotte': ('NC', 'South', ['Charlotte'], 2, 28202),
+    'Nashville': ('TN', 'South', ['Nashville', 'Franklin'], 2, 37201),
+    'San Diego': ('CA', 'West', ['San Diego'], 2, 92101),
+    'Tampa': ('FL', 'South', ['Tampa'], 1, 33602),
+    'Raleigh/Durham': ('NC', 'South', ['Raleigh', 'Durham'], 1, 27601),
+    'Baltimore': ('MD', 'South', ['Baltimore'], 1, 21201),
+    'Salt Lake City': ('UT', 'West', ['Salt Lake City'], 1, 84101),
+}
+
+# The price file spells a few markets differently
+PRICE_MARKETS = {'Dallas/Ft Worth': 'Dallas-Ft. Worth'}
+
+# Industry -> share of leases; None is the leases without an industry
+INDUSTRIES = {
+    'Technology, Advertising, Media, and Information': 20,
+    'Financial Services and Insurance': 16,
+    'Legal Services': 9,
+    'Business, Professional, and Consulting Services (except Financial and Legal) - Including Accounting': 12,
+    'Healthcare': 6,
+    'Real Estate (except coworking providers)': 5,
+    'Construction, Engineering and Architecture': 5,
+    'Retail': 3,
+    'Manufacturing': 3,
+    'Education': 2,
+    'Associations and Non-profit Organizations (except Education and Government)': 2,
+    'Government': 2,
+    'Coworking and Executive Suite Companies': 2,
+    None: 13,
+}
+
+STATES = [
+    'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'DC', 'FL', 'GA', 'HI', 'ID', 'IL', 'IN', 'IA', 'KS', 'KY',
+    'LA', 'ME', 'MD', 'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ', 'NM', 'NY', 'NC', 'ND', 'OH',
+    'OK', 'OR', 'PA', 'RI', 'SC', 'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY',
+]
+STREETS = ['Main', 'Broadway', 'Market', 'Park', 'Madison', 'Lexington', 'Elm', 'Oak', 'Pine', 'Maple', 'Washington',
+           'Lake', 'Hill', 'Church', 'Commerce', 'Congress', 'Peachtree', 'Wilshire', 'Michigan', 'Mission']
+SUFFIXES = ['St', 'Ave', 'Blvd', 'Rd', 'Pl', 'Way']
+QUARTERS = ['Q1', 'Q2', 'Q3', 'Q4']
+CLASSES = ['A', 'O']
+TRANSACTION_TYPES = {'New': 0.55, 'Renewal': 0.3, 'Expansion': 0.1, 'Extension': 0.05}
+SPACE_TYPES = {'New': 0.2, 'Relet': 0.7, 'Sublet': 0.1}
+
+# Years covered, with fewer leases signed in 2020-21
+YEARS = range(2018, 2025)
+YEAR_WEIGHTS = [1.0, 1.0, 0.6, 0.8, 0.9, 0.9, 0.8]
+
+# One building per this many leases, one company per this many, within these bounds
+LEASES_PER_BUILDING = 4
+LEASES_PER_COMPANY = 2
+BUILDINGS = (2000, 1_000_000)
+COMPANIES = (5000, 5_000_000)
+# Share of lease rows that repeat an earlier row of their chunk, as the real file does
+DUPLICATE_SHARE = 0.01
+
+# Rows generated and written at a time
+CHUNK_ROWS = 500_000
+
+# Bump when the generated data changes, so benchmark baselines of older data aren't compared
+VERSION = 2
+
+LEASES_FILE = 'Leases.csv'
+OCCUPANCY_FILE = 'Major Market Occupancy Data.csv'
+PRICE_FILE = 'Price and Availability Data.csv'
+UNEMPLOYMENT_FILE = 'Unemployment.csv'
+
+
+class Codes:
+    """A string column as integer codes into `labels` (-1 is missing)."""
+
+    def __init__(self, codes, labels):
+        self.codes, self.labels = codes, labels
+
+    def take(self, rows):
+        return Codes(self.codes[rows], self.labels)
+
+
+class Text:
+    """A string column joined row by row from constants, integer arrays and Codes."""
+
+    def __init__(self, *parts):
+        self.parts = parts
+
+    def take(self, rows):
+        return Text(*(part if isinstance(part, str) else _take(part, rows) for part in self.parts))
+
+
+def _take(column, rows):
+    return column.take(rows) if isinstance(column, (Codes, Text)) else column[rows]
+
+
+def _choice(rng, options, size):
+    """Codes drawn from {label: weight}."""
+    return Codes(rng.choice(len(options), size, p=_shares(options.values())), list(options))
+
+
+def _shares(weights):
+    weights = np.asarray(list(weights), dtype='float64')
+    return weights / weights.sum()
+
+
+def _skewed(rng, size, n):
+    # Integers in [0, n) where low numbers are far more common (a few busy buildings/companies)
+    return np.minimum((n * rng.random(size) ** 3).astype(np.int64), n - 1)
+
+
+def _quarters():
+    """Every (year, quarter label, quarter number) in the covered period."""
+    return [(year, f'Q{q}', q) for year in YEARS for q in range(1, 5)]
+
+
+def _covid_shape(year, quarter):
+    """0 before 2020 Q2, -1 at the trough, recovering about halfway by the end of the period."""
+    t = (np.asarray(year) - 2020) * 4 + np.asarray(quarter) - 2
+    return np.where(t < 0, 0.0, -np.exp(-np.maximum(t, 0) / 12.0))
+
+
+def _whole(values):
+    # Square feet and dollars stay integers: the same CSV text, much faster to format
+    return np.round(values).astype(np.int64)
+
+
+def _with_missing(rng, values, share):
+    values = values.copy()
+    values[rng.random(len(values)) < share] = np.nan
+    return values
+
+
+class Buildings:
+    """Buildings and companies shared by every lease chunk, held as small numeric arrays.
+
+    Their counts follow the row count (within BUILDINGS/COMPANIES), so cardinalities stay
+    realistic at any size, and names and addresses are derived from the numbers when a
+    chunk is written, so memory stays flat even for 100M rows.
+    """
+
+    def __init__(self, rows, seed=0):
+        rng = np.random.default_rng([seed, 0])
+        n = int(np.clip(rows // LEASES_PER_BUILDING, *BUILDINGS))
+        markets = list(MARKETS.values())
+        self.markets = list(MARKETS)
+        self.market = rng.choice(len(markets), n, p=_shares(m[3] for m in markets)).astype(np.int8)
+        offsets = np.cumsum([0] + [len(m[2]) for m in markets])
+        # Some city names (Arlington) belong to two markets but are one label
+        cities = [city for m in markets for city in m[2]]
+        self.cities = list(dict.fromkeys(cities))
+        city = offsets[self.market] + np.minimum(rng.geometric(0.55, n) - 1, np.diff(offsets)[self.market] - 1)
+        self.city = np.array([self.cities.index(c) for c in cities])[city]
+        self.states = sorted({m[0] for m in markets})
+        self.state = np.array([self.states.index(m[0]) for m in markets])[self.market]
+        self.regions = sorted({m[1] for m in markets})
+        self.region = np.array([self.regions.index(m[1]) for m in markets])[self.market]
+        self.zip = np.array([m[4] for m in markets])[self.market] + rng.integers(0, 90, n)
+        self.number = rng.integers(1, 2000, n)
+        self.street = rng.integers(0, len(STREETS), n)
+        self.suffix = rng.integers(0, len(SUFFIXES), n)
+        self.rba = (np.round(np.exp(rng.normal(np.log(250_000), 0.8, n)), -2)).astype(np.int64)
+        self.class_a = rng.random(n) < 0.55
+        self.cbd = rng.random(n) < 0.45
+        self.rent = np.exp(rng.normal(np.log(38), 0.3, len(markets)))
+        n_companies = int(np.clip(rows // LEASES_PER_COMPANY, *COMPANIES))
+        self.industries = [industry for industry in INDUSTRIES if industry is not None]
+        codes = np.array([-1 if industry is None else self.industries.index(industry) for industry in INDUSTRIES])
+        self.industry = codes[rng.choice(len(INDUSTRIES), n_companies, p=_shares(INDUSTRIES.values()))].astype(np.int8)
+
+    def __len__(self):
+        return len(self.market)
+
+
+@functools.lru_cache(maxsize=4)
+def buildings_for(rows, seed=0):
+    return Buildings(rows, seed)
+
+
+def lease_columns(buildings, rows, seed=0, chunk=0):
+    """{column: values} of `rows` synthetic leases, in Leases.csv order.
+
+    Every chunk number draws from its own random stream, so a file comes out the same
+    whichever order or process its chunks are generated in.
+    """
+    rng = np.random.default_rng([seed, 1, chunk])
+    b = _skewed(rng, rows, len(buildings))
+    company = _skewed(rng, rows, len(buildings.industry))
+    year = np.array(YEARS)[rng.choice(len(YEARS), rows, p=_shares(YEAR_WEIGHTS))]
+    month = rng.integers(1, 13, rows)
+    quarter = (month - 1) // 3 + 1
+    class_a = buildings.class_a[b]
+    rba = buildings.rba[b]
+    # Availability rises after COVID; a slice of it is sublet space
+    availability = np.clip(rng.beta(2, 9, rows) - 0.1 * _covid_shape(year, quarter), 0, 1)
+    sublet_share = rng.beta(1, 6, rows)
+    rent = buildings.rent[buildings.market[b]] * np.where(class_a, 1.25, 0.9) * (1 + 0.02 * (year - 2018))
+    overall_rent = rent * np.exp(rng.normal(0, 0.08, rows))
+    sublet_discount = rng.uniform(0.7, 0.95, rows)
+    columns = {
+        'year': year,
+        'quarter': Codes(quarter - 1, QUARTERS),
+        'monthsigned': month,
+        'market': Codes(buildings.market[b], buildings.markets),
+        'building_name': Text('Building ', b),
+        'building_id': b,
+        'address': Text(buildings.number[b], ' ', Codes(buildings.street[b], STREETS), ' ',
+                        Codes(buildings.suffix[b], SUFFIXES)),
+        'region': Codes(buildings.region[b], buildings.regions),
+        'city': Codes(buildings.city[b], buildings.cities),
+        'state': Codes(buildings.state[b], buildings.states),
+        'zip': buildings.zip[b],
+        'internal_class': Codes(np.where(class_a, 0, 1), CLASSES),
+        'internal_industry': Codes(buildings.industry[company], buildings.industries),
+        'transaction_type': _choice(rng, TRANSACTION_TYPES, rows),
+        'space_type': _choice(rng, SPACE_TYPES, rows),
+        'company_name': Text('Company ', company),
+        'CBD_suburban': Codes(np.where(buildings.cbd[b], 0, 1), ['CBD', 'Suburban']),
+        'leasedSF': _whole(np.clip(np.exp(rng.normal(np.log(7000), 1.1, rows)), 500, 1_000_000)),
+        'RBA': rba,
+        'available_space': _whole(rba * availability),
+        'availability_proportion': np.round(availability, 4),
+        'internal_class_rent': np.round(rent, 2),
+        'overall_rent': _with_missing(rng, np.round(overall_rent, 2), 0.05),
+        'direct_available_space': _whole(rba * availability * (1 - sublet_share)),
+        'direct_availability_proportion': np.round(availability * (1 - sublet_share), 4),
+        'direct_internal_class_rent': np.round(rent * 1.02, 2),
+        'direct_overall_rent': _with_missing(rng, np.round(overall_rent * 1.02, 2), 0.05),
+        'sublet_available_space': _whole(rba * availability * sublet_share),
+        'sublet_availability_proportion': np.round(availability * sublet_share, 4),
+        'sublet_internal_class_rent': _with_missing(rng, np.round(rent * sublet_discount, 2), 0.3),
+        'sublet_overall_rent': _with_missing(rng, np.round(overall_rent * sublet_discount, 2), 0.3),
+        'leasing': _whole(np.round(np.exp(rng.normal(np.log(2e6), 0.7, rows)), -2)),
+    }
+    # Repeat a few earlier rows of the chunk verbatim
+    repeat = np.flatnonzero(rng.random(rows) < DUPLICATE_SHARE)
+    repeat = repeat[repeat > 0]
+    if len(repeat):
+        source = np.arange(rows)
+        source[repeat] = (rng.random(len(repeat)) * repeat).astype(np.int64)
+        columns = {name: _take(values, source) for name, values in columns.items()}
+    return columns
+
+
+# --- Writing ---
+
+def _arrow_column(values):
+    if isinstance(values, Codes):
+        codes = np.asarray(values.codes, dtype=np.int32)
+        return pa.DictionaryArray.from_arrays(pa.array(codes, mask=codes < 0), pa.array(values.labels, pa.string()))
+    if isinstance(values, Text):
+        parts = [pa.scalar(part) if isinstance(part, str) else _arrow_column(part).cast(pa.string())
+                 for part in values.parts]
+        return pc.binary_join_element_wise(*parts, '')
+    # NaN is written as an empty field, like pandas does
+    return pa.array(values, from_pandas=True)
+
+
+def _pandas_column(values):
+    if isinstance(values, Codes):
+        return pd.Categorical.from_codes(values.codes, values.labels)
+    if isinstance(values, Text):
+        text = ''
+        for part in values.parts:
+            text = text + (part if isinstance(part, str) else pd.Series(_pandas_column(part)).astype(str).to_numpy())
+        return text
+    return values
+
+
+def _csv_fields(values):
+    # Each value as Arrow's writer formats it: strings quoted, missing values empty,
+    # floats in shortest form without a trailing ".0"
+    if isinstance(values, (Codes, Text)):
+        strings = pd.Series(_pandas_column(values), dtype=object)
+        return ('"' + strings.str.replace('"', '""', regex=False) + '"').fillna('').to_numpy(dtype=object)
+    values = np.asarray(values)
+    text = pd.Series(values.astype(str), dtype=object)
+    if values.dtype.kind == 'f':
+        text = text.str.removesuffix('.0').mask(np.isnan(values), '')
+    return text.to_numpy(dtype=object)
+
+
+def encode_csv(columns, header=True):
+    """CSV of a {column: values} chunk, as bytes or an Arrow buffer (both file.write-able)."""
+    if pa is not None:
+        table = pa.table({name: _arrow_column(values) for name, values in columns.items()})
+        sink = pa.BufferOutputStream()
+        pa_csv.write_csv(table, sink, pa_csv.WriteOptions(include_header=header, quoting_style='needed'))
+        return sink.getvalue()
+    # Without pyarrow, the same bytes joined column by column
+    lines = None
+    for values in columns.values():
+        fields = _csv_fields(values)
+        lines = fields if lines is None else lines + ',' + fields
+    text = ''.join(line + '\n' for line in lines) if lines is not None else ''
+    if header:
+        text = ','.join(f'"{name}"' for name in columns) + '\n' + text
+    return text.encode()
+
+
+def _lease_csv(rows, total_rows, seed, chunk):
+    return encode_csv(lease_columns(buildings_for(total_rows, seed), rows, seed, chunk), header=chunk == 0)
+
+
+def write_leases(path, rows, seed=0, chunk_rows=CHUNK_ROWS, pool=None, progress=None):
+    """Stream `rows` leases into a CSV one chunk at a time; returns the bytes written.
+
+    With a process pool the chunks are generated in the workers (a bounded window of
+    them in flight) and written in order, so the file is the same either way.
+    progress(rows_done, bytes_done) is called after every chunk.
+    """
+    sizes = [(chunk, min(chunk_rows, rows - start)) for chunk, start in enumerate(range(0, rows, chunk_rows))]
+    if pool is None:
+        encoded = (_lease_csv(n, rows, seed, chunk) for chunk, n in sizes)
+    else:
+        encoded = _in_order(pool, [(n, rows, seed, chunk) for chunk, n in sizes])
+    written = done = 0
+    with open(path, 'wb') as f:
+        if not sizes:
+            f.write(encode_csv(lease_columns(buildings_for(0, seed), 0, seed)))
+        for (_, n), data in zip(sizes, encoded):
+            f.write(data)
+            written += len(data)
+            done += n
+            if progress is not None:
+                progress(done, written)
+    return written
+
+
+def _in_order(pool, tasks):
+    # Keep a bounded window of chunk tasks in flight and yield them in file order
+    window = 2 * getattr(pool, '_max_workers', os.cpu_count() or 1)
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.submit(_lease_csv, *task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def occupancy_data(seed=0):
+    """Quarterly occupancy per market: high before COVID, a sharp drop, a slow partial recovery."""
+    rng = np.random.default_rng([seed, 2])
+    rows = [(market, year, label, q) for market in MARKETS for year, label, q in _quarters()]
+    df = pd.DataFrame(rows, columns=['market', 'year', 'quarter', 'q'])
+    depth = rng.uniform(0.35, 0.6, len(MARKETS))[pd.factorize(df['market'])[0]]
+    occupancy = np.clip(0.95 + depth * _covid_shape(df['year'], df['q']) + rng.normal(0, 0.01, len(df)), 0.2, 1)
+    df['starting_occupancy_proportion'] = np.round(occupancy + rng.normal(0, 0.01, len(df)), 4)
+    df['avg_occupancy_proportion'] = np.round(occupancy + rng.normal(0, 0.005, len(df)), 4)
+    df['occupancy_proportion'] = np.round(occupancy, 4)
+    return df.drop(columns='q')
+
+
+def price_data(seed=0):
+    """Quarterly rent and availability per market and class."""
+    rng = np.random.default_rng([seed, 3])
+    rows = [(PRICE_MARKETS.get(market, market), MARKETS[market][1], year, label, q, cls)
+            for market in MARKETS for year, label, q in _quarters() for cls in CLASSES]
+    df = pd.DataFrame(rows, columns=['market', 'region', 'year', 'quarter', 'q', 'internal_class'])
+    n = len(df)
+    class_a = (df['internal_class'] == 'A').to_numpy()
+    rba = np.exp(rng.normal(np.log(8e7), 0.6, n))
+    availability = np.clip(0.15 - 0.08 * _covid_shape(df['year'], df['q']) + rng.normal(0, 0.01, n), 0.02, 0.6)
+    sublet_share = rng.uniform(0.05, 0.25, n)
+    rent = np.exp(rng.normal(np.log(38), 0.3, n)) * np.where(class_a, 1.25, 0.9) * (1 + 0.02 * (df['year'] - 2018))
+    overall_rent = rent * np.exp(rng.normal(0, 0.05, n))
+    df['RBA'] = np.round(rba, -3)
+    df['available_space'] = np.round(rba * availability, -2)
+    df['availability_proportion'] = np.round(availability, 4)
+    df['internal_class_rent'] = np.round(rent, 2)
+    df['overall_rent'] = np.round(overall_rent, 2)
+    df['direct_available_space'] = np.round(rba * availability * (1 - sublet_share), -2)
+    df['direct_availability_proportion'] = np.round(availability * (1 - sublet_share), 4)
+    df['direct_internal_class_rent'] = np.round(rent * 1.02, 2)
+    df['direct_overall_rent'] = np.round(overall_rent * 1.02, 2)
+    df['sublet_available_space'] = np.round(rba * availability * sublet_share, -2)
+    df['sublet_availability_proportion'] = np.round(availability * sublet_share, 4)
+    df['sublet_internal_class_rent'] = np.round(rent * 0.85, 2)
+    df['sublet_overall_rent'] = np.round(overall_rent * 0.85, 2)
+    df['leasing'] = np.round(np.exp(rng.normal(np.log(1.5e6), 0.8, n)), -2)
+    return df.drop(columns='q')
+
+
+def unemployment_data(seed=0):
+    """Monthly unemployment rate per state, with the 2020 spike."""
+    rng = np.random.default_rng([seed, 4])
+    rows = [(state, year, month) for state in STATES for year in YEARS for month in range(1, 13)]
+    df = pd.DataFrame(rows, columns=['state', 'year', 'month'])
+    q = (df['month'] - 1) // 3 + 1
+    df['quarter'] = 'Q' + q.astype(str)
+    level = rng.uniform(2.5, 5.5, len(STATES))[pd.factorize(df['state'])[0]]
+    spike = rng.uniform(6, 12, len(STATES))[pd.factorize(df['state'])[0]]
+    df['unemployment_rate'] = np.round(level - spike * _covid_shape(df['year'], q) + rng.normal(0, 0.15, len(df)), 1)
+    return df
+
+
+def write_dataset(out_dir, rows, seed=0, chunk_rows=CHUNK_ROWS, pool=None, progress=None):
+    """Write the four DataFest CSVs to out_dir, with `rows` leases; returns {file: path}."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {name: os.path.join(out_dir, name)
+             for name in (LEASES_FILE, OCCUPANCY_FILE, PRICE_FILE, UNEMPLOYMENT_FILE)}
+    occupancy_data(seed).to_csv(paths[OCCUPANCY_FILE], index=False)
+    price_data(seed).to_csv(paths[PRICE_FILE], index=False)
+    unemployment_data(seed).to_csv(paths[UNEMPLOYMENT_FILE], index=False)
+    write_leases(paths[LEASES_FILE], rows, seed, chunk_rows, pool, progress)
+    return paths
@@ -1,3 +1,4 @@
+import os
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
@@ -6,13 +7,21 @@ from dash import dcc, html
 import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output
 
+from schema import apply_schema
+from dates import DateIndex, add_date_columns
+from result_cache import from_env
+from rolling_stats import RollingStats
+
+DATA_FILES = ['Leases.csv', 'Major Market Occupancy Data.csv', 'Price and Availability Data.csv', 'Unemployment.csv']
+
+def data_version():
+    # Size and mtime of every input, so cached results are dropped when the data changes
+    return tuple((path, os.path.getsize(path), int(os.path.getmtime(path))) for path in DATA_FILES)
+
 # Load the real data
 def load_data():
-    # Load data files
-    leases_df = pd.read_csv('Leases.csv')
-    occupancy_df = pd.read_csv('Major Market Occupancy Data.csv')
-    price_df = pd.read_csv('Price and Availability Data.csv')
-    unemployment_df = pd.read_csv('Unemployment.csv')
+    # Load data files (canonical column names, categorical/downcast dtypes)
+    leases_df, occupancy_df, price_df, unemployment_df = (apply_schema(pd.read_csv(path)) for path in DATA_FILES)
     
     # Print data info for debugging
     print("Loaded data shapes:")
@@ -21,29 +30,9 @@ def load_data():
     print(f"Price: {price_df.shape}")
     print(f"Unemployment: {unemployment_df.shape}")
     
-    # Create date columns - using a more robust method
-    def create_date(row):
-        year = str(row['year'])
-        quarter = str(row['quarter']).replace('Q', '')
-        month = str((int(quarter) - 1) * 3 + 1).zfill(2)
-        return pd.to_datetime(f"{year}-{month}-01")
-    
-    leases_df['date'] = leases_df.apply(create_date, axis=1)
-    occupancy_df['date'] = occupancy_df.apply(create_date, axis=1)
-    price_df['date'] = price_df.apply(create_date, axis=1)
-    unemployment_df['date'] = unemployment_df.apply(create_date, axis=1)
-    
-    # Calculate moving averages for occupancy
-    # First sort by date for each market
-    occupancy_df = occupancy_df.sort_values(['market', 'date'])
-    # Calculate 2-year (8 quarters) moving average
-    occupancy_df['occupancy_ma_2y'] = occupancy_df.groupby('market')['occupancy_proportion'].transform(
-        lambda x: x.rolling(window=8, min_periods=1).mean()
-    )
-    # Calculate 3-year (12 quarters) moving average
-    occupancy_df['occupancy_ma_3y'] = occupancy_df.groupby('market')['occupancy_proportion'].transform(
-        lambda x: x.rolling(window=12, min_periods=1).mean()
-    )
+    # Create date columns (vectorized; a no-op where the cleaned data already has them)
+    for df in (leases_df, occupancy_df, price_df, unemployment_df):
+        add_date_columns(df)
     
     # Print unique markets for debugging
     print("\nUnique markets in each dataset:")
@@ -53,7 +42,7 @@ def load_data():
     print("Unemployment states:", sorted(unemployment_df['state'].unique()))
     
     # Aggregate unemployment data by market (state)
-    unemployment_df = unemployment_df.groupby(['date', 'state'])['unemployment_rate'].mean().reset_index()
+    unemployment_df = unemployment_df.groupby(['date', 'state'], observed=True)['unemployment_rate'].mean().reset_index()
     unemployment_df = unemployment_df.rename(columns={'state': 'market'})
     
     return leases_df, occupancy_df, price_df, unemployment_df
@@ -61,6 +50,22 @@ def load_data():
 # Load all data
 leases_df, occupancy_df, price_df, unemployment_df = load_data()
 
+# Sorted on date with per-quarter row offsets, so callbacks slice instead of masking every row
+leases_idx, occupancy_idx, price_idx, unemployment_idx = (
+    DateIndex(df) for df in (leases_df, occupancy_df, price_df, unemployment_df))
+
+# Rolling occupancy statistics per market, aligned with occupancy_idx's rows: the 2- and 3-year
+# moving averages (8 and 12 quarters) up front, custom windows from the UI on demand
+occupancy_df = occupancy_idx.df
+occupancy_rolling = RollingStats(occupancy_df, 'occupancy_proportion', windows=(8, 12))
+occupancy_df['occupancy_ma_2y'] = occupancy_rolling.column('mean', 8)
+occupancy_df['occupancy_ma_3y'] = occupancy_rolling.column('mean', 12)
+STAT_LABELS = {'mean': 'Moving Average', 'std': 'Rolling Std Dev', 'min': 'Rolling Minimum', 'max': 'Rolling Maximum'}
+
+# Callback results, keyed by the date range and occupancy view. Set TECH_HUB_CACHE_DIR to a
+# local directory to share the cache across gunicorn workers; TECH_HUB_CACHE_SIZE bounds it.
+graph_cache = from_env('TECH_HUB', namespace=data_version())
+
 # Initialize the Dash app
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.FLATLY])
 
@@ -92,12 +97,24 @@ app.layout = dbc.Container([
                 options=[
                     {'label': 'Raw Data', 'value': 'raw'},
                     {'label': '2-Year Moving Average', 'value': '2y'},
-                    {'label': '3-Year Moving Average', 'value': '3y'}
+                    {'label': '3-Year Moving Average', 'value': '3y'},
+                    {'label': 'Custom Window', 'value': 'custom'}
                 ],
                 value='raw',
                 inline=True,
                 className="mt-2"
             ),
+            dbc.Row([
+                dbc.Col([
+                    html.Small("Custom window (quarters)"),
+                    dcc.Slider(id='occupancy-window', min=2, max=20, step=1, value=4,
+                               marks={q: str(q) for q in range(4, 21, 4)}),
+                ], width=8),
+                dbc.Col([
+                    dcc.Dropdown(id='occupancy-stat', value='mean', clearable=False,
+                                 options=[{'label': label, 'value': stat} for stat, label in STAT_LABELS.items()]),
+                ], width=4),
+            ], className="mt-2"),
         ], width=6),
     ]),
     
@@ -116,6 +133,10 @@ app.layout = dbc.Container([
     ], className="mt-4")
 ])
 
+def plot_frame(df, column='market'):
+    # plotly groups a categorical over every category and fails on the unused ones
+    return df.assign(**{column: df[column].cat.remove_unused_categories()})
+
 # Callbacks
 @app.callback(
     [Output('price-trends', 'figure'),
@@ -125,29 +146,35 @@ app.layout = dbc.Container([
      Output('market-insights', 'children')],
     [Input('date-range', 'start_date'),
      Input('date-range', 'end_date'),
-     Input('occupancy-view', 'value')]
+     Input('occupancy-view', 'value'),
+     Input('occupancy-window', 'value'),
+     Input('occupancy-stat', 'value')]
 )
-def update_graphs(start_date, end_date, occupancy_view):
+def update_graphs(start_date, end_date, occupancy_view, occupancy_window=4, occupancy_stat='mean'):
+    # The window and stat only shape the custom view; fixing them otherwise keeps
+    # slider moves on the other views on one cache entry
+    if occupancy_view != 'custom':
+        occupancy_window, occupancy_stat = 4, 'mean'
+    # '2019-01-01' and '2019-01-01T00:00:00' are one cache entry
+    start_date, end_date = (None if d is None else pd.Timestamp(d) for d in (start_date, end_date))
+    return _graphs(start_date, end_date, occupancy_view, occupancy_window, occupancy_stat)
+
+@graph_cache.memoize
+def _graphs(start_date, end_date, occupancy_view, occupancy_window, occupancy_stat):
+    # No cache stats here: with a disk cache they scan its directory on every miss
     print(f"\nUpdating graphs for date range: {start_date} to {end_date}")
     
     # Filter data based on date range
-    mask = (price_df['date'] >= start_date) & (price_df['date'] <= end_date)
-    price_filtered = price_df[mask]
-    
-    mask = (occupancy_df['date'] >= start_date) & (occupancy_df['date'] <= end_date)
-    occupancy_filtered = occupancy_df[mask]
-    
-    mask = (leases_df['date'] >= start_date) & (leases_df['date'] <= end_date)
-    leases_filtered = leases_df[mask]
-    
-    mask = (unemployment_df['date'] >= start_date) & (unemployment_df['date'] <= end_date)
-    unemployment_filtered = unemployment_df[mask]
+    price_filtered = price_idx.slice(start_date, end_date)
+    occupancy_filtered = occupancy_idx.slice(start_date, end_date)
+    leases_filtered = leases_idx.slice(start_date, end_date)
+    unemployment_filtered = unemployment_idx.slice(start_date, end_date)
     
     # Create figures
     # Price trends
-    price_agg = price_filtered.groupby(['date', 'market'])['overall_rent'].mean().reset_index()
+    price_agg = price_filtered.groupby(['date', 'market'], observed=True)['overall_rent'].mean().reset_index()
     
-    price_fig = px.line(price_agg, 
+    price_fig = px.line(plot_frame(price_agg), 
                        x='date', 
                        y='overall_rent',
                        color='market',
@@ -161,11 +188,17 @@ def update_graphs(start_date, end_date, occupancy_view):
     elif occupancy_view == '2y':
         y_col = 'occupancy_ma_2y'
         title_suffix = '2-Year Moving Average'
-    else:
+    elif occupancy_view == '3y':
         y_col = 'occupancy_ma_3y'
         title_suffix = '3-Year Moving Average'
+    else:
+        y_col = f'occupancy_{occupancy_stat}_{occupancy_window}q'
+        title_suffix = f'{occupancy_window}-Quarter {STAT_LABELS[occupancy_stat]}'
+        # The sliced frame keeps occupancy_idx's row positions as its index
+        custom = occupancy_rolling.column(occupancy_stat, occupancy_window)
+        occupancy_filtered = occupancy_filtered.assign(**{y_col: custom[occupancy_filtered.index]})
         
-    occupancy_fig = px.line(occupancy_filtered,
+    occupancy_fig = px.line(plot_frame(occupancy_filtered),
                            x='date',
                            y=y_col,
                            color='market',
@@ -173,16 +206,16 @@ def update_graphs(start_date, end_date, occupancy_view):
     occupancy_fig.update_layout(yaxis_title='Occupancy Rate')
     
     # Lease activity
-    lease_agg = leases_filtered.groupby('market')['leasedSF'].sum().reset_index()
+    lease_agg = leases_filtered.groupby('market', observed=True)['leasedsf'].sum().reset_index()
     
-    lease_fig = px.bar(lease_agg,
+    lease_fig = px.bar(plot_frame(lease_agg),
                       x='market',
-                      y='leasedSF',
+                      y='leasedsf',
                       title='Total Leased Space by Market')
     lease_fig.update_layout(yaxis_title='Total Leased Space (sq ft)')
     
     # Unemployment trends
-    unemployment_fig = px.line(unemployment_filtered,
+    unemployment_fig = px.line(plot_frame(unemployment_filtered),
                              x='date',
                              y='unemployment_rate',
                              color='market',
@@ -193,17 +226,15 @@ def update_graphs(start_date, end_date, occupancy_view):
     latest_date = price_filtered['date'].max()
     
     # Calculate key metrics
-    avg_prices = price_filtered[price_filtered['date'] == latest_date].groupby('market')['overall_rent'].mean()
+    avg_prices = price_idx.slice(latest_date, latest_date).groupby('market', observed=True)['overall_rent'].mean()
     
     # Use the selected occupancy view for insights
-    if occupancy_view == 'raw':
-        avg_occupancy = occupancy_filtered[occupancy_filtered['date'] == latest_date].groupby('market')['occupancy_proportion'].mean()
-    elif occupancy_view == '2y':
-        avg_occupancy = occupancy_filtered[occupancy_filtered['date'] == latest_date].groupby('market')['occupancy_ma_2y'].mean()
-    else:
-        avg_occupancy = occupancy_filtered[occupancy_filtered['date'] == latest_date].groupby('market')['occupancy_ma_3y'].mean()
+    occupancy_latest = occupancy_idx.slice(latest_date, latest_date)
+    if occupancy_view == 'custom':
+        occupancy_latest = occupancy_latest.assign(**{y_col: custom[occupancy_latest.index]})
+    avg_occupancy = occupancy_latest.groupby('market', observed=True)[y_col].mean()
     
-    total_leases = leases_filtered.groupby('market')['leasedSF'].sum()
+    total_leases = leases_filtered.groupby('market', observed=True)['leasedsf'].sum()
     
     # Find best markets
     best_price_market = avg_prices.idxmin() if not avg_prices.empty else "No data"
@@ -0,0 +1,29 @@
+import pandas as pd
+
+from address import canonical_address, canonicalize
+
+
+def test_queens_block_lot_numbers_are_kept():
+    assert canonical_address("10-63 Jackson Ave, Long Island City, NY") == "10-63 Jackson Ave"
+    assert canonical_address("10-63 Jackson Ave") == "10-63 Jackson Ave"
+    assert canonical_address("37-18 Northern Blvd") == "37-18 Northern Blvd"
+    assert canonical_address("21-05 31st St") == "21-05 31st St"
+
+
+def test_locality_is_dropped():
+    assert canonical_address("29 W 38th St, New York, NY") == "29 W 38th St"
+    assert canonical_address("29 West 38th Street, New York, NY 10018") == "29 W 38th St"
+    assert canonical_address("29 W 38th St NY 10018") == "29 W 38th St"
+    assert canonical_address("29 W 38th St, Suite 200, New York") == "29 W 38th St"
+
+
+def test_frontage_range_collapses():
+    assert canonical_address("13-17 Crosby St") == "13 Crosby St"
+    assert canonical_address("13-17 Crosby St", city="Astoria") == "13-17 Crosby St"
+
+
+def test_canonicalize_uses_city():
+    addresses = pd.Series(["13-17 Crosby St", "13-17 Crosby St", None])
+    cities = ["New York", "Long Island City", "Astoria"]
+    assert canonicalize(addresses, cities).tolist() == ["13 Crosby St", "13-17 Crosby St", None]
+    assert canonicalize(addresses).tolist() == ["13 Crosby St", "13 Crosby St", None]
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+import clean_and_import
+import synthetic
+from clean_and_import import RowHashSet
+
+
+def test_filter_new_all_duplicates():
+    seen = RowHashSet()
+    hashes = np.arange(10, dtype=np.uint64)
+    assert seen.filter_new(hashes).all()
+    assert not seen.filter_new(hashes).any()
+    assert list(seen.filter_new(np.arange(5, 15, dtype=np.uint64))) == [False] * 5 + [True] * 5
+    assert len(seen) == 15
+
+
+def test_load_empty_hash_file(tmp_path):
+    path = tmp_path / 'hashes.npy'
+    RowHashSet().save(path)
+    seen = RowHashSet.load(path)
+    assert list(seen.filter_new(np.array([3, 3, 4], dtype=np.uint64))) == [True, False, True]
+
+
+def test_clean_leases_chunk_of_duplicates(tmp_path, monkeypatch):
+    data_dir, output_dir = tmp_path / 'data', tmp_path / 'cleaned'
+    data_dir.mkdir()
+    output_dir.mkdir()
+    path = data_dir / 'Leases.csv'
+    synthetic.write_leases(str(path), 3000, 0)
+    df = pd.read_csv(path)
+    # The second chunk repeats the first one row for row
+    pd.concat([df.iloc[:1000], df.iloc[:1000], df.iloc[1000:]]).to_csv(path, index=False)
+    monkeypatch.setattr(clean_and_import, 'DATA_DIR', str(data_dir))
+    monkeypatch.setattr(clean_and_import, 'OUTPUT_DIR', str(output_dir))
+    assert clean_and_import.clean_leases(chunk_size=1000) == len(clean_and_import.clean_columns(df).drop_duplicates())
+
+
+def test_clean_leases_integer_column_with_gaps(tmp_path, monkeypatch):
+    data_dir, output_dir = tmp_path / 'data', tmp_path / 'cleaned'
+    data_dir.mkdir()
+    output_dir.mkdir()
+    path = data_dir / 'Leases.csv'
+    synthetic.write_leases(str(path), 3, 0)
+    df = pd.read_csv(path)
+    df['zip'] = df['zip'].astype('Int64')
+    df.loc[0, 'zip'] = None
+    # Chunks of two: the first reads zip as float64 (it has a gap), the second as int64,
+    # and the second repeats the first chunk's last row
+    pd.concat([df.iloc[:2], df.iloc[2:], df.iloc[1:2]]).to_csv(path, index=False)
+    monkeypatch.setattr(clean_and_import, 'DATA_DIR', str(data_dir))
+    monkeypatch.setattr(clean_and_import, 'OUTPUT_DIR', str(output_dir))
+    assert clean_and_import.clean_leases(chunk_size=2) == 3
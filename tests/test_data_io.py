@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_io import append_cleaned, file_version, read_cleaned
+
+
+def test_file_version_shape(tmp_path):
+    path = tmp_path / 'a.csv'
+    assert file_version(str(path)) == (str(path), None, None)
+    path.write_text('x\n')
+    _, size, mtime = file_version(str(path))
+    assert size == 2 and mtime
+
+
+def test_integer_columns_stay_integer(tmp_path):
+    pytest.importorskip('pyarrow')
+    first = pd.DataFrame({'year': [2021, 2021], 'quarter': ['Q1', 'Q1'], 'zip': [78701, 78702], 'lease_count': [3, 4]})
+    # pandas reads a zip column with a gap as float64
+    second = pd.DataFrame({'year': [2021], 'quarter': ['Q2'], 'zip': [np.nan], 'lease_count': [5]})
+    schema = append_cleaned(first, 'leases_clean', 0, str(tmp_path), formats=('parquet',))
+    append_cleaned(second, 'leases_clean', 1, str(tmp_path), formats=('parquet',), schema=schema)
+    df = read_cleaned('leases_clean', str(tmp_path)).sort_values('lease_count')
+    assert pd.api.types.is_integer_dtype(df['lease_count'])
+    assert df['lease_count'].tolist() == [3, 4, 5]
+    assert df['zip'].iloc[:2].tolist() == [78701, 78702] and pd.isna(df['zip'].iloc[2])
@@ -0,0 +1,22 @@
+import pandas as pd
+
+import geocode_store
+from address import canonicalize
+
+
+def test_legacy_cache_keys_match_lease_keys(tmp_path):
+    leases = pd.DataFrame({
+        'address': ['37-18 Northern Blvd', '13-17 Crosby St', '29 West 38th Street, New York, NY'],
+        'city': ['Astoria', 'New York', 'New York'],
+    }).astype('category')
+    csv_path = tmp_path / 'nyc_geocode_cache.csv'
+    pd.DataFrame({'address': leases['address'].astype(str), 'lat': [40.75, 40.72, 40.75],
+                  'lon': [-73.9, -74.0, -73.98]}).to_csv(csv_path, index=False)
+    cities = leases.drop_duplicates('address').set_index('address')['city']
+    conn = geocode_store.connect(str(tmp_path / 'store.sqlite'))
+    assert geocode_store.migrate_csv(conn, str(csv_path), cities=cities) == 3
+    keys = canonicalize(leases['address'], leases['city'])
+    assert keys.tolist() == ['37-18 Northern Blvd', '13 Crosby St', '29 W 38th St']
+    found = geocode_store.lookup(conn, keys)
+    assert sorted(found['address']) == sorted(keys)
+    assert sorted(geocode_store.read_legacy_csv(str(csv_path), cities)['address']) == sorted(keys)
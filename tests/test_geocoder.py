@@ -0,0 +1,83 @@
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+import geocoder
+from geocoder import FOUND, NOT_FOUND, Journal, NominatimProvider, TransientGeocodeError, geocode_all
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+from stub_geocoder import serve
+
+KNOWN = {'29 W 38th St': (40.7518, -73.9843), '104 E 25th St': (40.7411, -73.9849), '13 Crosby St': (40.7230, -73.9977)}
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(fail_rate=0.0):
+        server = serve(KNOWN, port=0, fail_rate=fail_rate)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return NominatimProvider(f'http://127.0.0.1:{server.server_port}')
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _run(addresses, provider, journal, **kwargs):
+    return asyncio.run(geocode_all(addresses, provider, journal, rate=1000, burst=10, concurrency=4,
+                                   backoff=0.001, progress=lambda message: None, **kwargs))
+
+
+def test_found_and_not_found(stub, tmp_path):
+    journal = Journal(str(tmp_path / 'nyc.jsonl'))
+    assert _run(list(KNOWN) + ['1 Nowhere Pl'], stub(), journal) == (3, 1, 0)
+    records = journal.load()
+    assert records['1 Nowhere Pl']['status'] == NOT_FOUND
+    assert records['29 W 38th St']['status'] == FOUND
+    assert records['29 W 38th St']['lat'] == pytest.approx(40.7518)
+
+
+def test_retries_transient_errors(stub, tmp_path):
+    journal = Journal(str(tmp_path / 'nyc.jsonl'))
+    # About a third of the requests get a 503; with 30 retries every address gets through
+    assert _run(list(KNOWN) * 5, stub(fail_rate=0.3), journal, retries=30) == (3, 0, 0)
+
+
+def test_gives_up_after_retries(tmp_path):
+    class Down:
+        name = 'down'
+        calls = 0
+
+        async def geocode(self, query):
+            Down.calls += 1
+            raise TransientGeocodeError('HTTP 503')
+
+    journal = Journal(str(tmp_path / 'nyc.jsonl'))
+    assert _run(['29 W 38th St'], Down(), journal, retries=2) == (0, 0, 1)
+    assert Down.calls == 3
+    # Failures aren't journaled, so the next run tries again
+    assert journal.load() == {}
+
+
+def test_resume_and_unstored(stub, tmp_path):
+    journal = Journal(str(tmp_path / 'nyc.jsonl'))
+    provider = stub()
+    assert _run(['29 W 38th St', '1 Nowhere Pl'], provider, journal, batch_size=1) == (1, 1, 0)
+    records, offset = journal.unstored()
+    assert set(records) == {'29 W 38th St', '1 Nowhere Pl'}
+    journal.mark_stored(offset)
+    # A killed run leaves a torn last line behind
+    with open(journal.path, 'a') as f:
+        f.write('{"address": "104 E')
+    assert _run(list(KNOWN) + ['1 Nowhere Pl'], provider, journal) == (2, 0, 0)
+    assert _run(['1 Nowhere Pl'], provider, journal, retry_not_found=True) == (0, 1, 0)
+    records, _ = journal.unstored()
+    assert set(records) == {'104 E 25th St', '13 Crosby St', '1 Nowhere Pl'}
+    assert set(journal.load()) == set(KNOWN) | {'1 Nowhere Pl'}
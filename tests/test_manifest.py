@@ -0,0 +1,42 @@
+import os
+
+import manifest
+from manifest import APPENDED, CHANGED, UNCHANGED, classify_change, describe_source, refresh_entry
+
+
+def _write(path, lines):
+    path.write_bytes(b''.join(b'row %d\n' % i for i in lines))
+
+
+def test_append_and_unchanged(tmp_path, monkeypatch):
+    monkeypatch.setattr(manifest, 'BLOCK_SIZE', 64)
+    path = tmp_path / 'Leases.csv'
+    _write(path, range(100))
+    entry = describe_source(str(path))
+    assert classify_change(str(path), entry) == UNCHANGED
+    _write(path, range(120))
+    assert classify_change(str(path), entry) == APPENDED
+
+
+def test_middle_edit_while_growing(tmp_path, monkeypatch):
+    monkeypatch.setattr(manifest, 'BLOCK_SIZE', 64)
+    path = tmp_path / 'Leases.csv'
+    _write(path, range(100))
+    entry = describe_source(str(path))
+    data = path.read_bytes().replace(b'row 50\n', b'row X0\n') + b'row 100\n'
+    path.write_bytes(data)
+    assert classify_change(str(path), entry) == CHANGED
+    # The sampled check only looks at the first and last old blocks
+    assert classify_change(str(path), entry, sample=True) == APPENDED
+
+
+def test_pipeline_version_and_touch(tmp_path):
+    path = tmp_path / 'Leases.csv'
+    _write(path, range(10))
+    entry = describe_source(str(path), version=1)
+    assert classify_change(str(path), entry, version=1) == UNCHANGED
+    assert classify_change(str(path), entry, version=2) == CHANGED
+    os.utime(path, (1, 1))
+    assert classify_change(str(path), entry, version=1) == UNCHANGED
+    entry = refresh_entry(str(path), entry)
+    assert entry['mtime'] == os.stat(path).st_mtime
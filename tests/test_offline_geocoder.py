@@ -0,0 +1,32 @@
+import pandas as pd
+
+from offline_geocoder import EXACT, INTERPOLATED, OfflineGeocoder
+
+
+def _gazetteer():
+    return OfflineGeocoder(pd.DataFrame({
+        'NUMBER': ['37-18', '37-24', '37-19', '10', '20', '11', '12A'],
+        'STREET': ['Northern Blvd'] * 3 + ['Main St'] * 3 + ['Elm St'],
+        'LAT': [40.0, 40.6, 41.0, 1.0, 2.0, 5.0, 9.0],
+        'LON': [-73.0, -73.6, -74.0, -1.0, -2.0, -5.0, -9.0],
+    }))
+
+
+def test_queens_numbers_match_whole():
+    found = _gazetteer().resolve(['37-18 Northern Blvd', '37-20 Northern Blvd', '37-21 Northern Blvd'])
+    assert found['match'].tolist() == [EXACT, INTERPOLATED, None]
+    assert found['lat'][0] == 40.0
+    # Between 37-18 and 37-24 on the even side, not towards 37-19 across the street
+    assert abs(found['lat'][1] - 40.2) < 1e-9
+
+
+def test_interpolation_keeps_to_one_side():
+    found = _gazetteer().resolve(['14 Main St', '13 Main St'])
+    assert found['match'].tolist() == [INTERPOLATED, None]
+    assert abs(found['lat'][0] - 1.4) < 1e-9
+
+
+def test_letter_suffix_is_part_of_the_number():
+    found = _gazetteer().resolve(['12A Elm St', '12 Elm St'])
+    assert found['match'].tolist() == [EXACT, None]
+    assert found['lat'][0] == 9.0
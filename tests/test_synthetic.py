@@ -0,0 +1,12 @@
+import pytest
+
+import synthetic
+
+
+@pytest.mark.parametrize('rows, chunk', [(3000, 0), (3000, 1), (0, 0)])
+def test_arrow_and_pandas_writers_match(rows, chunk, monkeypatch):
+    pytest.importorskip('pyarrow')
+    columns = synthetic.lease_columns(synthetic.buildings_for(10_000, 0), rows, 0, chunk)
+    arrow = synthetic.encode_csv(columns, header=chunk == 0).to_pybytes()
+    monkeypatch.setattr(synthetic, 'pa', None)
+    assert synthetic.encode_csv(columns, header=chunk == 0) == arrow
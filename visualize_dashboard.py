@@ -1,3 +1,5 @@
+import functools
+import gzip
 import pandas as pd
 import dash
 from dash import dcc, html, dash_table
@@ -5,138 +7,179 @@ import plotly.express as px
 import plotly.graph_objects as go
 import os
 import dash_bootstrap_components as dbc
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, MATCH
+from dash.exceptions import PreventUpdate
 import numpy as np
 from dash.dash_table.Format import Format, Scheme
+from flask import Response, abort, redirect, request
 
-CLEANED_DIR = os.path.join(os.path.dirname(__file__), 'cleaned_data')
+from data_io import cleaned_exists, cleaned_version, file_version, read_cleaned
+from dates import month_start, quarter_start
+from classify import keep_top
+from cube import add_groups, lease_cube as build_lease_cube, map_points, rollup
+from address import canonicalize
+from geocode_store import LEGACY_CSV, STORE_PATH, ReadOnlyPool, read_legacy_csv
+from spatial_agg import PointIndex, viewport
+from figure_store import FigureStore, data_version
+from decimate import WEBGL_POINTS, minmax
 
-# Load cleaned data
+# DASHBOARD_DATA_DIR points the dashboard at another cleaned_data directory (e.g. benchmark data)
+CLEANED_DIR = os.environ.get('DASHBOARD_DATA_DIR') or os.path.join(os.path.dirname(__file__), 'cleaned_data')
+
+# Load cleaned data (partitioned Parquet if present, CSV otherwise).
+# Leases come in pre-aggregated: the cube built by clean_and_import plus the small pin-map extract.
 def load_data():
-    leases = pd.read_csv(os.path.join(CLEANED_DIR, 'leases_clean.csv'), low_memory=False)
-    occupancy = pd.read_csv(os.path.join(CLEANED_DIR, 'major_market_occupancy_clean.csv'))
-    price_avail = pd.read_csv(os.path.join(CLEANED_DIR, 'price_and_availability_clean.csv'))
-    unemployment = pd.read_csv(os.path.join(CLEANED_DIR, 'unemployment_clean.csv'))
-    return leases, occupancy, price_avail, unemployment
+    if cleaned_exists('lease_cube', CLEANED_DIR) and cleaned_exists('lease_map_points', CLEANED_DIR):
+        lease_cube = read_cleaned('lease_cube', CLEANED_DIR)
+        lease_points = read_cleaned('lease_map_points', CLEANED_DIR)
+    else:
+        # Outputs from before the cube existed: aggregate the raw leases once here
+        leases = add_groups(read_cleaned('leases_clean', CLEANED_DIR))
+        lease_cube, lease_points = build_lease_cube(leases), map_points(leases)
+    occupancy = read_cleaned('major_market_occupancy_clean', CLEANED_DIR)
+    price_avail = read_cleaned('price_and_availability_clean', CLEANED_DIR)
+    unemployment = read_cleaned('unemployment_clean', CLEANED_DIR)
+    return lease_cube, lease_points, occupancy, price_avail, unemployment
 
-leases, occupancy, price_avail, unemployment = load_data()
+lease_cube, lease_points, occupancy, price_avail, unemployment = load_data()
 
 # --- Custom Style (Google Fonts + CSS) ---
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
+# The map callback targets a graph that only exists once tab-4 has been rendered
+app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP], suppress_callback_exceptions=True)
 app.title = "Commercial Real Estate Trends - DataFest"
 
-# --- Improved City-to-Metro mapping (expanded, typo-tolerant, includes NYC boroughs and SF/LA suburbs) ---
-def get_metro(city):
-    city = str(city).strip().lower()
-    nyc = ["new york", "manhattan", "brooklyn", "queens", "nyc", "bronx", "staten island"]
-    sf = ["san francisco", "sf", "south bay/san jose", "oakland", "san jose", "berkeley", "palo alto", "mountain view", "redwood city", "menlo park", "cupertino", "fremont", "milpitas", "santa clara", "sunnyvale", "san mateo", "foster city", "burlingame", "san bruno", "daly city", "san leandro", "hayward", "union city", "alameda"]
-    la = ["los angeles", "beverly hills", "santa monica", "west hollywood", "culver city", "pasadena", "long beach", "glendale", "burbank", "inglewood", "el segundo", "redondo beach", "hermosa beach", "manhattan beach", "hawthorne", "torrance", "gardena", "compton", "carson", "san pedro", "venice", "marina del rey", "malibu", "encino", "sherman oaks", "studio city", "van nuys", "north hollywood", "reseda", "woodland hills", "calabasas", "agoura hills", "thousand oaks"]
-    chicago = ["chicago", "evanston", "oak park", "skokie", "naperville", "aurora", "wheaton", "oak brook", "schaumburg", "elgin", "joliet", "arlington heights", "des plaines", "cicero", "berwyn"]
-    houston = ["houston", "sugar land", "the woodlands", "katy", "pasadena", "pearland", "baytown"]
-    dallas = ["dallas", "fort worth", "plano", "irving", "arlington", "garland", "grand prairie", "mckinney", "frisco", "richardson", "lewisville", "carrollton", "allen", "flower mound"]
-    atlanta = ["atlanta", "marietta", "alpharetta", "roswell", "sandy springs", "johns creek", "lawrenceville"]
-    dc = ["washington d.c.", "arlington", "alexandria", "bethesda", "silver spring", "rockville", "falls church", "tysons", "mclean"]
-    miami = ["miami", "fort lauderdale", "hollywood", "hialeah", "aventura", "coral gables", "miami beach", "doral", "homestead"]
-    boston = ["boston", "cambridge", "somerville", "brookline", "newton", "quincy", "waltham", "malden"]
-    philly = ["philadelphia", "camden", "cherry hill", "king of prussia", "norristown", "conshohocken", "ardmore"]
-    if city in nyc:
-        return "NYC Metro"
-    if city in sf:
-        return "SF Bay Area"
-    if city in la:
-        return "LA Metro"
-    if city in chicago:
-        return "Chicago Metro"
-    if city in houston:
-        return "Houston Metro"
-    if city in dallas:
-        return "Dallas Metro"
-    if city in atlanta:
-        return "Atlanta Metro"
-    if city in dc:
-        return "DC Metro"
-    if city in miami:
-        return "Miami Metro"
-    if city in boston:
-        return "Boston Metro"
-    if city in philly:
-        return "Philadelphia Metro"
-    return city.title()
-leases_sample = leases.copy()
-leases_sample["metro"] = leases_sample["city"].apply(get_metro)
-
-# --- Improved industry cleaning/grouping ---
-def clean_industry(ind):
-    if not isinstance(ind, str):
-        return "Other"
-    ind = ind.lower()
-    if "tech" in ind or "information" in ind or "software" in ind:
-        return "Tech & Info"
-    if "finance" in ind or "bank" in ind or "insurance" in ind:
-        return "Finance & Insurance"
-    if "legal" in ind or "law" in ind:
-        return "Legal"
-    if "consult" in ind or "business" in ind or "accounting" in ind:
-        return "Consulting & Business"
-    if "media" in ind or "advertis" in ind:
-        return "Media & Advertising"
-    if "health" in ind or "hospital" in ind or "medical" in ind:
-        return "Healthcare"
-    if "manufactur" in ind or "industrial" in ind or "engineering" in ind:
-        return "Manufacturing & Engineering"
-    if "real estate" in ind:
-        return "Real Estate"
-    if "retail" in ind:
-        return "Retail"
-    if "education" in ind:
-        return "Education"
-    if "non-profit" in ind:
-        return "Non-Profit"
-    if "restaurant" in ind or "food" in ind:
-        return "Food & Hospitality"
-    return ind.title() if len(ind) < 30 else "Other"
-leases_sample["industry_group"] = leases_sample["internal_industry"].apply(clean_industry)
-top_industries = leases_sample["industry_group"].value_counts().nlargest(10).index.tolist()
-def industry_group2(ind):
-    return ind if ind in top_industries else "Other"
-leases_sample["industry_group"] = leases_sample["industry_group"].apply(industry_group2)
+# --- Lazy figures ---
+# Tables and figures are built the first time a tab asks for them and kept until the
+# data is reloaded, so a worker only pays for the tabs it actually serves.
+_memoized = []
+
+def memoized(builder):
+    cached = functools.lru_cache(maxsize=None)(builder)
+    _memoized.append(cached)
+    return cached
+
+def invalidate_figures():
+    """Forget every memoized table and figure; call whenever the loaded data changes."""
+    for cached in _memoized:
+        cached.cache_clear()
+
+def reload_data():
+    global lease_cube, lease_points, occupancy, price_avail, unemployment
+    lease_cube, lease_points, occupancy, price_avail, unemployment = load_data()
+    invalidate_figures()
+
+# --- Industry grouping: top 10 industries, the rest folded into "Other" (metro/industry come from classify.py) ---
+@memoized
+def top_industries():
+    return rollup(lease_cube, "industry_group").nlargest(10, "lease_count")["industry_group"].astype(str).tolist()
+
+@memoized
+def grouped_leases():
+    top = top_industries()
+    cube = lease_cube.assign(industry_group=keep_top(lease_cube["industry_group"], top))
+    points = lease_points.assign(industry_group=keep_top(lease_points["industry_group"], top))
+    return cube, points
 
 # --- 1. Cleaned Industry × Metro Area Table (top 10 metros, top 10 industries, better normalization) ---
-metro_industry = leases_sample.groupby(["metro", "industry_group"]).size().reset_index(name="count")
-total_by_metro = metro_industry.groupby("metro")["count"].transform("sum")
-metro_industry["pct"] = metro_industry["count"] / total_by_metro * 100
-pivot_metro = metro_industry.pivot(index="metro", columns="industry_group", values="pct").fillna(0)
-top_metros = metro_industry.groupby("metro")["count"].sum().nlargest(10).index.tolist()
-pivot_metro = pivot_metro.loc[top_metros, top_industries]
-
-# --- 2. NYC Metro: Pin 300 random cached leases, color by industry ---
+@memoized
+def pivot_metro():
+    cube, _ = grouped_leases()
+    metro_industry = rollup(cube, ["metro", "industry_group"])[["metro", "industry_group", "lease_count"]]
+    metro_industry = metro_industry.rename(columns={"lease_count": "count"}).astype({"metro": str, "industry_group": str})
+    total_by_metro = metro_industry.groupby("metro")["count"].transform("sum")
+    metro_industry["pct"] = metro_industry["count"] / total_by_metro * 100
+    pivot = metro_industry.pivot(index="metro", columns="industry_group", values="pct").fillna(0)
+    top_metros = metro_industry.groupby("metro")["count"].sum().nlargest(10).index.tolist()
+    return pivot.loc[top_metros, top_industries()]
+
+# --- 2. NYC Metro: every geocoded lease, aggregated server-side per zoom level and viewport ---
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 from geopy.geocoders import Nominatim
 from geopy.extra.rate_limiter import RateLimiter
 import os
-nyc_leases = leases_sample[leases_sample["metro"] == "NYC Metro"].copy()
-# Load geocode cache
-geocode_cache_file = "nyc_geocode_cache.csv"
-if os.path.exists(geocode_cache_file):
-    geocode_cache = pd.read_csv(geocode_cache_file)
-else:
-    geocode_cache = pd.DataFrame(columns=["address", "lat", "lon"])
-# Merge only cached addresses
-nyc_leases = nyc_leases.merge(geocode_cache, on="address", how="inner")
-# Sample 300 random points for speed and visual clarity
-if len(nyc_leases) > 300:
-    nyc_leases_sample = nyc_leases.sample(n=300, random_state=42)
-else:
-    nyc_leases_sample = nyc_leases.copy()
-fig_nyc_map = px.scatter_mapbox(
-    nyc_leases_sample.dropna(subset=["lat", "lon"]),
-    lat="lat", lon="lon", color="industry_group", hover_name="address", hover_data=["company_name", "industry_group"],
-    mapbox_style="carto-positron", zoom=10.5, title="NYC Metro: 300 Random Leases by Industry (Pin Map)",
-    color_discrete_sequence=px.colors.qualitative.Safe
-)
-fig_nyc_map.update_layout(margin={"r":0,"t":40,"l":0,"b":0}, font_family="Inter")
+
+@functools.lru_cache(maxsize=None)
+def geocode_pool():
+    return ReadOnlyPool(STORE_PATH)
+
+def geocodes(addresses, metro, cities=None):
+    """address (canonical), lat, lon for the given canonical addresses.
+
+    cities ({raw address: city}) keys the legacy CSV the way the leases are keyed.
+    """
+    if os.path.exists(STORE_PATH):
+        return geocode_pool().lookup(addresses, metro)[["address", "lat", "lon"]]
+    # No store yet (geocode_store.py migrates the old CSV cache): read the legacy CSV
+    if os.path.exists(LEGACY_CSV):
+        cache = read_legacy_csv(LEGACY_CSV, cities)[["address", "lat", "lon"]]
+        return cache[cache["address"].isin(set(addresses))]
+    return pd.DataFrame(columns=["address", "lat", "lon"])
+
+@memoized
+def nyc_leases():
+    """Every geocoded NYC lease, with lat/lon from the geocode store."""
+    _, points = grouped_leases()
+    nyc_leases = points[points["metro"] == "NYC Metro"].copy()
+    # The geocode store is keyed on canonical addresses
+    nyc_leases["canonical_address"] = canonicalize(nyc_leases["address"], nyc_leases.get("city")).to_numpy()
+    cities = nyc_leases.drop_duplicates("address").set_index("address")["city"] if "city" in nyc_leases else None
+    located = geocodes(nyc_leases["canonical_address"].dropna().unique(), "NYC Metro", cities)
+    # Merge only geocoded addresses
+    nyc_leases = nyc_leases.merge(located.rename(columns={"address": "canonical_address"}), on="canonical_address", how="inner")
+    return nyc_leases.dropna(subset=["lat", "lon"]).reset_index(drop=True)
+
+@memoized
+def nyc_index():
+    leases = nyc_leases()
+    return PointIndex(leases["lat"], leases["lon"], leases["industry_group"])
+
+NYC_VIEW = {"lat": 40.738, "lon": -73.99, "zoom": 10.5}
+
+def nyc_map_figure(lat, lon, zoom, bounds=None):
+    """Every lease counts: quadtree cells sized to the zoom level, single leases once few are in view."""
+    index = nyc_index()
+    cells = index.cells(zoom, *(bounds or viewport(lat, lon, zoom)))
+    leases = nyc_leases()
+    colors = px.colors.qualitative.Safe
+    fig = go.Figure()
+    # One trace per industry, in a fixed order, so colors and legend don't shift between views
+    for i, industry in enumerate(index.categories):
+        part = cells[cells["category"] == industry]
+        single = (part["row"] >= 0).to_numpy()
+        rows = part["row"].to_numpy()[single]
+        text = np.where(single, "", part["count"].map("{:,} leases".format).to_numpy() + f" (mostly {industry})")
+        text[single] = (leases["address"].astype(str).to_numpy()[rows] + "<br>" +
+                        leases["company_name"].astype(str).to_numpy()[rows] + f"<br>{industry}")
+        fig.add_trace(go.Scattermapbox(
+            lat=part["lat"], lon=part["lon"], mode="markers", name=industry, text=text, hoverinfo="text",
+            marker=dict(size=np.clip(8 + 4 * np.log2(part["count"]), 8, 40), color=colors[i % len(colors)], opacity=0.8),
+        ))
+    fig.update_layout(
+        mapbox=dict(style="carto-positron", center=dict(lat=lat, lon=lon), zoom=zoom),
+        # Keep the user's pan/zoom when the callback swaps in a new level of detail
+        uirevision="nyc-map",
+        title=f"NYC Metro: {len(index):,} Geocoded Leases by Industry (clustered by zoom)",
+        margin={"r":0,"t":40,"l":0,"b":0}, font_family="Inter", legend_title_text="industry_group",
+    )
+    return fig
+
+@memoized
+def fig_nyc_map():
+    return nyc_map_figure(**NYC_VIEW)
+
+def map_view(relayout):
+    """lat, lon, zoom and bounds from a mapbox relayoutData event; None if the view didn't change."""
+    if not relayout or not any(key.startswith("mapbox.") for key in relayout):
+        return None
+    center = relayout.get("mapbox.center", {"lat": NYC_VIEW["lat"], "lon": NYC_VIEW["lon"]})
+    view = {"lat": center["lat"], "lon": center["lon"], "zoom": relayout.get("mapbox.zoom", NYC_VIEW["zoom"])}
+    corners = relayout.get("mapbox._derived", {}).get("coordinates")
+    if corners:
+        lons, lats = zip(*corners)
+        view["bounds"] = (min(lons), min(lats), max(lons), max(lats))
+    return view
 
 # --- 3. Metro Areas by Commercial Rent (Bar Chart, Indexed, improved grouping) ---
 metro_coli = {
@@ -144,173 +187,257 @@ metro_coli = {
     "Atlanta Metro": 0.93, "DC Metro": 1.15, "SF Bay Area": 1.27, "Boston Metro": 1.22, "Miami Metro": 1.08,
     # Fallback for others
 }
-rent_metro = leases_sample.groupby("metro").agg(avg_rent=("overall_rent", "mean"), lease_count=("overall_rent", "count")).reset_index()
-rent_metro = rent_metro[rent_metro["lease_count"] > 10]
-rent_metro["coli"] = rent_metro["metro"].map(metro_coli).fillna(1.0)
-rent_metro["indexed_rent"] = rent_metro["avg_rent"] / rent_metro["coli"]
-rent_metro = rent_metro.sort_values("indexed_rent", ascending=False).head(10)
-fig_rent_metro = px.bar(rent_metro, x="metro", y="indexed_rent", color="lease_count", title="Metro Areas by Commercial Rent (Cost-of-Living Indexed)", color_continuous_scale="Blues")
-fig_rent_metro.update_layout(yaxis_title="Indexed Avg Rent", xaxis_title="Metro Area", font_family="Inter")
+
+@memoized
+def fig_rent_metro():
+    rent_metro = rollup(lease_cube, "metro")[["metro", "overall_rent_mean", "overall_rent_count"]]
+    rent_metro = rent_metro.rename(columns={"overall_rent_mean": "avg_rent", "overall_rent_count": "lease_count"})
+    rent_metro["metro"] = rent_metro["metro"].astype(str)
+    rent_metro = rent_metro[rent_metro["lease_count"] > 10]
+    rent_metro["coli"] = rent_metro["metro"].map(metro_coli).fillna(1.0)
+    rent_metro["indexed_rent"] = rent_metro["avg_rent"] / rent_metro["coli"]
+    rent_metro = rent_metro.sort_values("indexed_rent", ascending=False).head(10)
+    fig = px.bar(rent_metro, x="metro", y="indexed_rent", color="lease_count", title="Metro Areas by Commercial Rent (Cost-of-Living Indexed)", color_continuous_scale="Blues")
+    fig.update_layout(yaxis_title="Indexed Avg Rent", xaxis_title="Metro Area", font_family="Inter")
+    return fig
 
 # --- 4. Top 10 Metro Areas by Available Space (unchanged) ---
-space_metro = leases_sample.groupby("metro")["available_space"].sum().reset_index()
-space_metro = space_metro.sort_values("available_space", ascending=False).head(10)
-fig_space_metro = px.bar(space_metro, x="metro", y="available_space", title="Top 10 Metro Areas by Total Available Space", template="plotly_white")
-fig_space_metro.update_layout(yaxis_title="Total Available Space (sq ft)", xaxis_title="Metro Area", font_family="Inter")
+@memoized
+def fig_space_metro():
+    space_metro = rollup(lease_cube, "metro").rename(columns={"available_space_sum": "available_space"})[["metro", "available_space"]]
+    space_metro["metro"] = space_metro["metro"].astype(str)
+    space_metro = space_metro.sort_values("available_space", ascending=False).head(10)
+    fig = px.bar(space_metro, x="metro", y="available_space", title="Top 10 Metro Areas by Total Available Space", template="plotly_white")
+    fig.update_layout(yaxis_title="Total Available Space (sq ft)", xaxis_title="Metro Area", font_family="Inter")
+    return fig
 
 # --- Graphs ---
 # 1. Occupancy Crash Around COVID (quarterly, all years) - now by market
-occ_q = occupancy.groupby(["year", "quarter", "market"]).agg({"occupancy_proportion": "mean"}).reset_index()
-occ_q["year_q"] = occ_q["year"].astype(str) + " " + occ_q["quarter"]
-occ_q = occ_q.reset_index(drop=True)
-# Assign a unique x_idx for each year_q for x-axis
-occ_q["x_idx"] = occ_q.groupby(["year_q"]).ngroup()
-fig_occ = px.line(occ_q, x="x_idx", y="occupancy_proportion", color="market", title=None, markers=True, template="plotly_white")
-# COVID vertical line at 2020 Q1
-if "2020 Q1" in occ_q["year_q"].values:
-    covid_idx = int(occ_q[occ_q["year_q"] == "2020 Q1"]["x_idx"].iloc[0])
-    fig_occ.add_vline(x=float(covid_idx), line_dash="dash", line_color="red", annotation_text="COVID-19 Pandemic", annotation_position="top left")
-else:
-    fig_occ.add_vline(x=float(10), line_dash="dash", line_color="red", annotation_text="COVID-19 Pandemic", annotation_position="top left")
-fig_occ.update_layout(yaxis_title="Avg Occupancy Proportion", xaxis_title="Quarter", font_family="Inter", title_font_size=24)
-# Only show x-ticks for unique year_q
-fig_occ.update_xaxes(tickvals=sorted(occ_q["x_idx"].unique()), ticktext=sorted(occ_q["year_q"].unique()))
+@memoized
+def fig_occ():
+    occ_q = occupancy.groupby(["year", "quarter", "market"], observed=True).agg({"occupancy_proportion": "mean"}).reset_index()
+    occ_q["year_q"] = occ_q["year"].astype(str) + " " + occ_q["quarter"].astype(str)
+    # Plain strings for plotly grouping (the aggregate is small)
+    occ_q["market"] = occ_q["market"].astype(str)
+    occ_q = occ_q.reset_index(drop=True)
+    # Assign a unique x_idx for each year_q for x-axis
+    occ_q["x_idx"] = occ_q.groupby(["year_q"]).ngroup()
+    fig = px.line(occ_q, x="x_idx", y="occupancy_proportion", color="market", title=None, markers=True, template="plotly_white")
+    # COVID vertical line at 2020 Q1
+    if "2020 Q1" in occ_q["year_q"].values:
+        covid_idx = int(occ_q[occ_q["year_q"] == "2020 Q1"]["x_idx"].iloc[0])
+        fig.add_vline(x=float(covid_idx), line_dash="dash", line_color="red", annotation_text="COVID-19 Pandemic", annotation_position="top left")
+    else:
+        fig.add_vline(x=float(10), line_dash="dash", line_color="red", annotation_text="COVID-19 Pandemic", annotation_position="top left")
+    fig.update_layout(yaxis_title="Avg Occupancy Proportion", xaxis_title="Quarter", font_family="Inter", title_font_size=24)
+    # Only show x-ticks for unique year_q
+    fig.update_xaxes(tickvals=sorted(occ_q["x_idx"].unique()), ticktext=sorted(occ_q["year_q"].unique()))
+    return fig
 
 # 2. Unemployment Trends (all states, monthly)
-unemp_m = unemployment.groupby(["year", "month", "state"]).agg({"unemployment_rate": "mean"}).reset_index()
-unemp_m["date"] = pd.to_datetime(unemp_m["year"].astype(str) + "-" + unemp_m["month"].astype(str).str.zfill(2) + "-01")
-unemp_m["date"] = unemp_m["date"].dt.to_pydatetime()
-
-fig_unemp = px.line(unemp_m, x="date", y="unemployment_rate", color="state", line_group="state", hover_name="state",
-                    line_shape="spline", render_mode="svg", template="plotly_white", title=None)
-fig_unemp.update_traces(line=dict(width=1), opacity=0.25)
-# Highlight US avg and key states
-us_avg = unemp_m.groupby("date").agg({"unemployment_rate": "mean"}).reset_index()
-# Ensure us_avg["date"] is native datetime
-us_avg["date"] = pd.to_datetime(us_avg["date"]).dt.to_pydatetime()
-fig_unemp.add_scatter(x=us_avg["date"], y=us_avg["unemployment_rate"], mode="lines", name="US Avg",
-                     line=dict(color="#222", width=3))
-for st, color in zip(["NY", "CA", "TX", "FL"], ["#0074D9", "#FF4136", "#2ECC40", "#FF851B"]):
-    st_data = unemp_m[unemp_m["state"]==st]
-    fig_unemp.add_scatter(x=st_data["date"], y=st_data["unemployment_rate"], mode="lines", name=st,
-                         line=dict(color=color, width=2))
-# Add COVID marker at March 2020 with updated label and style
-covid_date = pd.Timestamp("2020-03-01").to_pydatetime()
-# Get min/max y for the unemployment rate
-unemp_ymin = unemp_m["unemployment_rate"].min()
-unemp_ymax = unemp_m["unemployment_rate"].max()
-fig_unemp.add_shape(
-    type="line",
-    x0=covid_date, x1=covid_date,
-    y0=unemp_ymin, y1=unemp_ymax,
-    line=dict(color="red", width=2, dash="dot"),
-)
-fig_unemp.add_annotation(
-    x=covid_date, y=unemp_ymax,
-    text="COVID-19 Pandemic",
-    showarrow=False,
-    font=dict(color="red", size=12),
-    xanchor="left", yanchor="top"
-)
-fig_unemp.update_layout(
-    yaxis_title="Unemployment Rate (%)",
-    xaxis_title="Date",
-    font_family="Inter",
-    legend_title_text="State",
-    showlegend=True,
-    xaxis=dict(
-        tickformat="%Y-%b",
-        tickmode="auto",
-        range=[pd.Timestamp('2018-01-01').to_pydatetime(), pd.Timestamp('2024-12-31').to_pydatetime()]
+UNEMP_RANGE = (pd.Timestamp("2018-01-01"), pd.Timestamp("2024-12-31"))
+UNEMP_HIGHLIGHTS = {"US Avg": ("#222", 3), "NY": ("#0074D9", 2), "CA": ("#FF4136", 2),
+                    "TX": ("#2ECC40", 2), "FL": ("#FF851B", 2)}
+
+@memoized
+def unemp_monthly():
+    """Monthly rate per state plus the "US Avg" series, sorted by state then date."""
+    unemp_m = unemployment.groupby(["year", "month", "state"], observed=True).agg({"unemployment_rate": "mean"}).reset_index()
+    unemp_m["state"] = unemp_m["state"].astype(str)
+    unemp_m["date"] = month_start(unemp_m["year"], unemp_m["month"])
+    us_avg = unemp_m.groupby("date").agg({"unemployment_rate": "mean"}).reset_index().assign(state="US Avg")
+    series = pd.concat([unemp_m[["state", "date", "unemployment_rate"]], us_avg], ignore_index=True)
+    return series.sort_values(["state", "date"], ignore_index=True)
+
+def unemp_figure(x_range=None):
+    """All states' unemployment, decimated to what the x range can show.
+
+    Each trace keeps every point when few are in view and only the per-bin min/max
+    otherwise (decimate.py), so zooming in brings back full resolution for just that
+    window. Large views switch from SVG splines to WebGL lines.
+    """
+    series = unemp_monthly()
+    dates = series["date"].to_numpy()
+    window = None if x_range is None else [pd.Timestamp(v).to_datetime64().astype("M8[ns]").astype("int64") for v in x_range]
+    rows = minmax(dates.astype("M8[ns]").astype("int64"), series["unemployment_rate"].to_numpy(), series["state"].to_numpy(),
+                  x_range=window)
+    shown = series.iloc[rows]
+    webgl = len(shown) > WEBGL_POINTS
+    trace_type = go.Scattergl if webgl else go.Scatter
+    shape = "linear" if webgl else "spline"
+    colors = px.colors.qualitative.Plotly
+    fig = go.Figure()
+    states = [st for st in shown["state"].unique() if st != "US Avg"]
+    groups = dict(tuple(shown.groupby("state", sort=False)))
+    for i, st in enumerate(states):
+        part = groups[st]
+        fig.add_trace(trace_type(x=part["date"], y=part["unemployment_rate"], mode="lines", name=st, legendgroup=st,
+                                 line=dict(width=1, shape=shape, color=colors[i % len(colors)]), opacity=0.25,
+                                 hovertemplate=f"<b>{st}</b><br>date=%{{x}}<br>unemployment_rate=%{{y}}<extra></extra>"))
+    # Highlight US avg and key states
+    for st, (color, width) in UNEMP_HIGHLIGHTS.items():
+        if st in groups:
+            part = groups[st]
+            fig.add_trace(trace_type(x=part["date"], y=part["unemployment_rate"], mode="lines", name=st,
+                                     line=dict(color=color, width=width)))
+    # Add COVID marker at March 2020 with updated label and style
+    covid_date = pd.Timestamp("2020-03-01").to_pydatetime()
+    # Get min/max y for the unemployment rate
+    unemp_ymin = series["unemployment_rate"].min()
+    unemp_ymax = series["unemployment_rate"].max()
+    fig.add_shape(
+        type="line",
+        x0=covid_date, x1=covid_date,
+        y0=unemp_ymin, y1=unemp_ymax,
+        line=dict(color="red", width=2, dash="dot"),
+    )
+    fig.add_annotation(
+        x=covid_date, y=unemp_ymax,
+        text="COVID-19 Pandemic",
+        showarrow=False,
+        font=dict(color="red", size=12),
+        xanchor="left", yanchor="top"
     )
-)
+    fig.update_layout(
+        template="plotly_white",
+        yaxis_title="Unemployment Rate (%)",
+        xaxis_title="Date",
+        font_family="Inter",
+        legend_title_text="State",
+        showlegend=True,
+        # Keep hidden traces and the y zoom when the callback swaps in another resolution
+        uirevision="unemp",
+        xaxis=dict(
+            tickformat="%Y-%b",
+            tickmode="auto",
+            range=[pd.Timestamp(v).to_pydatetime() for v in (x_range or UNEMP_RANGE)]
+        )
+    )
+    return fig
+
+@memoized
+def fig_unemp():
+    return unemp_figure()
+
+def x_window(relayout):
+    """The x range a relayout event zoomed or panned to, "reset" on autorange, None otherwise."""
+    if not relayout:
+        return None
+    if relayout.get("xaxis.autorange"):
+        return "reset"
+    if "xaxis.range[0]" in relayout and "xaxis.range[1]" in relayout:
+        return relayout["xaxis.range[0]"], relayout["xaxis.range[1]"]
+    if "xaxis.range" in relayout:
+        return tuple(relayout["xaxis.range"])
+    return None
 
 # 3. Manhattan vs Other Regions (Average Leased Space)
 # Calculate average leased space per region per year
-if 'leasing' in price_avail.columns and 'region' in price_avail.columns:
-    region_leased = price_avail.groupby(["region", "year"]).agg({"leasing": "mean"}).reset_index()
-    fig_manh = px.bar(region_leased, x="year", y="leasing", color="region", barmode="group", template="plotly_white",
+@memoized
+def fig_manh():
+    if 'leasing' in price_avail.columns and 'region' in price_avail.columns:
+        region_leased = price_avail.groupby(["region", "year"], observed=True).agg({"leasing": "mean"}).reset_index()
+        region_leased["region"] = region_leased["region"].astype(str)
+        fig = px.bar(region_leased, x="year", y="leasing", color="region", barmode="group", template="plotly_white",
                      title="Average Leased Space per Region")
-    fig_manh.update_layout(yaxis_title="Avg Leased Space (sq ft)", xaxis_title="Year", font_family="Inter", legend_title_text="Region")
-else:
-    fig_manh = px.bar(title="Average Leased Space per Region (Data Missing)")
+        fig.update_layout(yaxis_title="Avg Leased Space (sq ft)", xaxis_title="Year", font_family="Inter", legend_title_text="Region")
+    else:
+        fig = px.bar(title="Average Leased Space per Region (Data Missing)")
+    return fig
 
 # 4. Correlation: Overlay Occupancy vs Unemployment (US Avg)
 # Align by quarter/year (since occupancy data is quarterly)
-occ_quarterly = occupancy.groupby(["year", "quarter"]).agg({"occupancy_proportion": "mean"}).reset_index()
-# Create a date for each quarter for merging
-quarter_map = {"Q1": "01", "Q2": "04", "Q3": "07", "Q4": "10"}
-occ_quarterly["date"] = pd.to_datetime(occ_quarterly["year"].astype(str) + "-" + occ_quarterly["quarter"].map(quarter_map) + "-01")
-
-fig_corr = px.line(occ_quarterly, x="date", y="occupancy_proportion", line_group="year", hover_name="year",
-                    line_shape="spline", render_mode="svg", template="plotly_white", title=None)
-fig_corr.update_traces(line=dict(width=1), opacity=0.25)
-# Highlight US avg and key states
-us_avg = occ_quarterly.groupby("date").agg({"occupancy_proportion": "mean"}).reset_index()
-# Ensure us_avg["date"] is native datetime
-us_avg["date"] = pd.to_datetime(us_avg["date"]).dt.to_pydatetime()
-fig_corr.add_scatter(x=us_avg["date"], y=us_avg["occupancy_proportion"], mode="lines", name="US Avg",
-                     line=dict(color="#222", width=3))
-# Add COVID marker at March 2020 with updated label and style
-covid_date = pd.Timestamp("2020-03-01").to_pydatetime()
-# Get min/max y for the correlation plot
-corr_ymin = occ_quarterly["occupancy_proportion"].min()
-corr_ymax = occ_quarterly["occupancy_proportion"].max()
-fig_corr.add_shape(
-    type="line",
-    x0=covid_date, x1=covid_date,
-    y0=corr_ymin, y1=corr_ymax,
-    line=dict(color="red", width=2, dash="dot"),
-)
-fig_corr.add_annotation(
-    x=covid_date, y=corr_ymax,
-    text="COVID-19 Pandemic",
-    showarrow=False,
-    font=dict(color="red", size=12),
-    xanchor="left", yanchor="top"
-)
-fig_corr.update_layout(
-    yaxis_title="Occupancy Proportion (%)",
-    xaxis_title="Date",
-    font_family="Inter",
-    legend_title_text="Year",
-    showlegend=True,
-    xaxis=dict(
-        tickformat="%Y-%b",
-        tickmode="auto",
-        range=[pd.Timestamp('2018-01-01').to_pydatetime(), pd.Timestamp('2024-12-31').to_pydatetime()]
+@memoized
+def fig_corr():
+    occ_quarterly = occupancy.groupby(["year", "quarter"], observed=True).agg({"occupancy_proportion": "mean"}).reset_index()
+    # Create a date for each quarter for merging
+    occ_quarterly["date"] = quarter_start(occ_quarterly["year"], occ_quarterly["quarter"])
+
+    fig = px.line(occ_quarterly, x="date", y="occupancy_proportion", line_group="year", hover_name="year",
+                  line_shape="spline", render_mode="svg", template="plotly_white", title=None)
+    fig.update_traces(line=dict(width=1), opacity=0.25)
+    # Highlight US avg and key states
+    us_avg = occ_quarterly.groupby("date").agg({"occupancy_proportion": "mean"}).reset_index()
+    # Ensure us_avg["date"] is native datetime
+    us_avg["date"] = pd.to_datetime(us_avg["date"]).dt.to_pydatetime()
+    fig.add_scatter(x=us_avg["date"], y=us_avg["occupancy_proportion"], mode="lines", name="US Avg",
+                    line=dict(color="#222", width=3))
+    # Add COVID marker at March 2020 with updated label and style
+    covid_date = pd.Timestamp("2020-03-01").to_pydatetime()
+    # Get min/max y for the correlation plot
+    corr_ymin = occ_quarterly["occupancy_proportion"].min()
+    corr_ymax = occ_quarterly["occupancy_proportion"].max()
+    fig.add_shape(
+        type="line",
+        x0=covid_date, x1=covid_date,
+        y0=corr_ymin, y1=corr_ymax,
+        line=dict(color="red", width=2, dash="dot"),
+    )
+    fig.add_annotation(
+        x=covid_date, y=corr_ymax,
+        text="COVID-19 Pandemic",
+        showarrow=False,
+        font=dict(color="red", size=12),
+        xanchor="left", yanchor="top"
     )
-)
+    fig.update_layout(
+        yaxis_title="Occupancy Proportion (%)",
+        xaxis_title="Date",
+        font_family="Inter",
+        legend_title_text="Year",
+        showlegend=True,
+        xaxis=dict(
+            tickformat="%Y-%b",
+            tickmode="auto",
+            range=[pd.Timestamp('2018-01-01').to_pydatetime(), pd.Timestamp('2024-12-31').to_pydatetime()]
+        )
+    )
+    return fig
 
 # 5. Leasing Activity by Quarter (Sun Belt vs Legacy)
-leases["region"] = leases["state"].map(lambda s: "Sun Belt" if s in ["TX", "FL", "GA", "AZ", "NC", "SC", "TN", "NV", "AL", "OK", "AR", "LA", "MS"] else ("Legacy" if s in ["NY", "IL", "CA", "MA", "NJ", "PA", "OH", "MI"] else "Other"))
-lease_q = leases.groupby(["year", "quarter", "region"]).agg({"leasing": "sum"}).reset_index()
-lease_q["year_q"] = lease_q["year"].astype(str) + " " + lease_q["quarter"]
-# Use integer index for x and set tick labels
-lease_q = lease_q.reset_index(drop=True)
-lease_q["x_idx"] = lease_q.index.astype(int)
-fig_lease = px.line(lease_q, x="x_idx", y="leasing", color="region", markers=True, template="plotly_white")
-if "2020 Q1" in lease_q["year_q"].values:
-    covid_idx = int(lease_q[lease_q["year_q"] == "2020 Q1"]["x_idx"].iloc[0])
-    fig_lease.add_vline(x=float(covid_idx), line_dash="dash", line_color="red", annotation_text="COVID-19", annotation_position="top left")
-else:
-    fig_lease.add_vline(x=float(10), line_dash="dash", line_color="red", annotation_text="COVID-19", annotation_position="top left")
-fig_lease.update_layout(yaxis_title="Leasing Activity (sq ft)", xaxis_title="Quarter", font_family="Inter", legend_title_text="Region")
-fig_lease.update_xaxes(tickvals=lease_q["x_idx"].tolist(), ticktext=lease_q["year_q"].tolist())
+@memoized
+def lease_q():
+    region = lease_cube["state"].map(lambda s: "Sun Belt" if s in ["TX", "FL", "GA", "AZ", "NC", "SC", "TN", "NV", "AL", "OK", "AR", "LA", "MS"] else ("Legacy" if s in ["NY", "IL", "CA", "MA", "NJ", "PA", "OH", "MI"] else "Other"))
+    lease_q = lease_cube.assign(region=region).groupby(["year", "quarter", "region"], observed=True).agg(leasing=("leasing_sum", "sum")).reset_index()
+    lease_q["year_q"] = lease_q["year"].astype(str) + " " + lease_q["quarter"].astype(str)
+    # Use integer index for x and set tick labels
+    lease_q = lease_q.reset_index(drop=True)
+    lease_q["x_idx"] = lease_q.index.astype(int)
+    return lease_q
+
+@memoized
+def fig_lease():
+    q = lease_q()
+    fig = px.line(q, x="x_idx", y="leasing", color="region", markers=True, template="plotly_white")
+    if "2020 Q1" in q["year_q"].values:
+        covid_idx = int(q[q["year_q"] == "2020 Q1"]["x_idx"].iloc[0])
+        fig.add_vline(x=float(covid_idx), line_dash="dash", line_color="red", annotation_text="COVID-19", annotation_position="top left")
+    else:
+        fig.add_vline(x=float(10), line_dash="dash", line_color="red", annotation_text="COVID-19", annotation_position="top left")
+    fig.update_layout(yaxis_title="Leasing Activity (sq ft)", xaxis_title="Quarter", font_family="Inter", legend_title_text="Region")
+    fig.update_xaxes(tickvals=q["x_idx"].tolist(), ticktext=q["year_q"].tolist())
+    return fig
 
 # 6. Migration Story: Net Leasing Change (Sun Belt vs Legacy)
-pre = lease_q[lease_q["year"] < 2020].groupby("region")["leasing"].mean()
-post = lease_q[lease_q["year"] >= 2020].groupby("region")["leasing"].mean()
-change = (post - pre).reset_index()
-change.columns = ["region", "net_change"]
-fig_migration = px.bar(change, x="region", y="net_change", color="region", template="plotly_white")
-fig_migration.update_layout(yaxis_title="Net Change in Leasing Activity (Post-COVID vs Pre-COVID)", font_family="Inter", showlegend=False)
+@memoized
+def fig_migration():
+    q = lease_q()
+    pre = q[q["year"] < 2020].groupby("region", observed=True)["leasing"].mean()
+    post = q[q["year"] >= 2020].groupby("region", observed=True)["leasing"].mean()
+    change = (post - pre).reset_index()
+    change.columns = ["region", "net_change"]
+    fig = px.bar(change, x="region", y="net_change", color="region", template="plotly_white")
+    fig.update_layout(yaxis_title="Net Change in Leasing Activity (Post-COVID vs Pre-COVID)", font_family="Inter", showlegend=False)
+    return fig
 
 # 7. Occupancy Heatmap (by market, quarter, year)
-heat = occupancy.pivot_table(index="quarter", columns="year", values="occupancy_proportion", aggfunc="mean")
-fig_heatmap = px.imshow(heat, labels=dict(x="Year", y="Quarter", color="Avg Occupancy Proportion"),
+@memoized
+def fig_heatmap():
+    heat = occupancy.pivot_table(index="quarter", columns="year", values="occupancy_proportion", aggfunc="mean", observed=True)
+    fig = px.imshow(heat, labels=dict(x="Year", y="Quarter", color="Avg Occupancy Proportion"),
                     title=None, aspect="auto", color_continuous_scale="Blues", template="plotly_white")
-fig_heatmap.update_layout(font_family="Inter")
+    fig.update_layout(font_family="Inter")
+    return fig
 
 # 8. Placeholder for External Data Overlay
 def make_external_overlay():
@@ -321,14 +448,91 @@ def make_external_overlay():
 # 1. Occupancy rebound: Sunbelt vs Coastal cities since 2020
 sunbelt_cities = ["Austin", "Dallas/Ft Worth", "Houston", "Atlanta", "Charlotte", "Nashville"]
 coastal_cities = ["Manhattan", "Los Angeles", "San Francisco", "South Bay/San Jose", "Philadelphia", "Washington D.C."]
-occ_since_2020 = occupancy[occupancy["year"] >= 2020]
-occ_cities = occ_since_2020[occ_since_2020["market"].isin(sunbelt_cities + coastal_cities)].copy()
-occ_cities["city_group"] = occ_cities["market"].apply(lambda x: "Sunbelt" if x in sunbelt_cities else "Coastal")
-occ_cities["year_q"] = occ_cities["year"].astype(str) + " " + occ_cities["quarter"]
-occ_cities = occ_cities.sort_values(["market", "year", "quarter"])
-fig_occ_cities = px.line(occ_cities, x="year_q", y="occupancy_proportion", color="market", line_dash="city_group",
-                        title="Occupancy Rebound: Sunbelt vs Coastal Cities (2020+)", markers=True, template="plotly_white")
-fig_occ_cities.update_layout(yaxis_title="Occupancy Proportion", xaxis_title="Quarter", font_family="Inter", legend_title_text="Market")
+
+@memoized
+def fig_occ_cities():
+    occ_since_2020 = occupancy[occupancy["year"] >= 2020]
+    occ_cities = occ_since_2020[occ_since_2020["market"].isin(sunbelt_cities + coastal_cities)].copy()
+    occ_cities["city_group"] = occ_cities["market"].apply(lambda x: "Sunbelt" if x in sunbelt_cities else "Coastal")
+    occ_cities["year_q"] = occ_cities["year"].astype(str) + " " + occ_cities["quarter"].astype(str)
+    occ_cities = occ_cities.sort_values(["market", "year", "quarter"])
+    occ_cities["market"] = occ_cities["market"].astype(str)
+    fig = px.line(occ_cities, x="year_q", y="occupancy_proportion", color="market", line_dash="city_group",
+                  title="Occupancy Rebound: Sunbelt vs Coastal Cities (2020+)", markers=True, template="plotly_white")
+    fig.update_layout(yaxis_title="Occupancy Proportion", xaxis_title="Quarter", font_family="Inter", legend_title_text="Market")
+    return fig
+
+# --- Figure store ---
+# Static figures are serialized once per data version, gzip-compressed, and sent to the
+# browser as stored bytes: no figure is rebuilt at boot or re-encoded on a tab switch.
+# scripts/build_figures.py fills the store ahead of time; a missing figure is built on first request.
+STORED_FIGURES = {
+    "occ": fig_occ, "unemp": fig_unemp, "heatmap": fig_heatmap, "occ_cities": fig_occ_cities,
+    "lease": fig_lease, "migration": fig_migration, "corr": fig_corr, "nyc_map": fig_nyc_map,
+    "rent_metro": fig_rent_metro, "space_metro": fig_space_metro,
+}
+DATASETS = ["lease_cube", "lease_map_points", "leases_clean", "major_market_occupancy_clean",
+            "price_and_availability_clean", "unemployment_clean"]
+
+def _input_version(name):
+    try:
+        return cleaned_version(name, CLEANED_DIR)
+    except FileNotFoundError:
+        return None
+
+@memoized
+def figure_store():
+    """Store for the current data: the cleaned files, the geocodes and this file's figure code."""
+    geocode_files = [file_version(path) for path in (STORE_PATH, STORE_PATH + "-wal", LEGACY_CSV)]
+    return FigureStore(data_version([_input_version(name) for name in DATASETS], geocode_files,
+                                    file_version(os.path.abspath(__file__))))
+
+def build_figures(names=None, prune=True):
+    """Write every stored figure missing for the current data version; returns the names built."""
+    store = figure_store()
+    built = [name for name in (names or STORED_FIGURES) if name not in store]
+    for name in built:
+        store.put(name, STORED_FIGURES[name]())
+    if prune:
+        store.prune()
+    return built
+
+def figure_url(name):
+    return app.get_relative_path(f"/figures/{figure_store().version}/{name}.json")
+
+@app.server.route("/figures/<version>/<name>.json")
+def stored_figure(version, name):
+    if name not in STORED_FIGURES:
+        abort(404)
+    store = figure_store()
+    if version != store.version:
+        # A page rendered before the data was reloaded
+        return redirect(figure_url(name))
+    data = store.get_or_build(name, STORED_FIGURES[name])
+    if "gzip" in request.accept_encodings:
+        response = Response(data, mimetype="application/json", headers={"Content-Encoding": "gzip"})
+    else:
+        response = Response(gzip.decompress(data), mimetype="application/json")
+    # The version is in the URL, so a stored figure never changes
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    response.vary.add("Accept-Encoding")
+    return response
+
+def stored_graph(name, graph_id=None):
+    """A graph the browser fills from the figure store; pass graph_id for graphs other callbacks update."""
+    if graph_id is None:
+        graph_id, url_id = {"type": "stored-figure", "name": name}, {"type": "figure-url", "name": name}
+    else:
+        url_id = f"{graph_id}-url"
+    return html.Div([dcc.Store(id=url_id, data=figure_url(name)), dcc.Graph(id=graph_id)])
+
+FETCH_FIGURE = "function(url) { return fetch(url).then(function(response) { return response.json(); }); }"
+
+app.clientside_callback(FETCH_FIGURE, Output({"type": "stored-figure", "name": MATCH}, "figure"),
+                        Input({"type": "figure-url", "name": MATCH}, "data"))
+# Graphs that server callbacks also update (on zoom) get fixed ids instead of the pattern
+for graph_id in ("nyc-map", "unemp-chart"):
+    app.clientside_callback(FETCH_FIGURE, Output(graph_id, "figure"), Input(f"{graph_id}-url", "data"))
 
 # --- Update Tab 2 Layout ---
 # Layout with Tabs for Multipage Story
@@ -348,60 +552,79 @@ def render_content(tab):
     if tab == "tab-1":
         return html.Div([
             html.H2("Shock & Macro Trends", style={"color": "#17BECF"}),
-            dcc.Graph(figure=fig_occ),
-            dcc.Graph(figure=fig_unemp),
-            dcc.Graph(figure=fig_heatmap),
+            stored_graph("occ"),
+            stored_graph("unemp", "unemp-chart"),
+            stored_graph("heatmap"),
         ])
     elif tab == "tab-2":
         return html.Div([
             html.H2("Regional Winners & Losers", style={"color": "#17BECF"}),
-            dcc.Graph(figure=fig_occ_cities),
-            dcc.Graph(figure=fig_lease),
-            dcc.Graph(figure=fig_migration),
+            stored_graph("occ_cities"),
+            stored_graph("lease"),
+            stored_graph("migration"),
         ])
     elif tab == "tab-3":
         return html.Div([
             html.H2("Connections & Correlations", style={"color": "#17BECF"}),
-            dcc.Graph(figure=fig_corr),
+            stored_graph("corr"),
             make_external_overlay(),
-            dcc.Graph(figure=fig_heatmap),
+            stored_graph("heatmap"),
         ])
     elif tab == "tab-4":
+        pivot = pivot_metro()
         return html.Div([
             html.H2("Job & Industry Insights", style={"color": "#17BECF"}),
             html.H4("Industry Distribution by Metro Area"),
             dash_table.DataTable(
-                data=pivot_metro.reset_index().to_dict('records'),
-                columns=[{"name": col, "id": col, "type": "numeric" if col != "metro" else "text", "format": Format(precision=1, scheme=Scheme.fixed)} for col in pivot_metro.reset_index().columns],
+                data=pivot.reset_index().to_dict('records'),
+                columns=[{"name": col, "id": col, "type": "numeric" if col != "metro" else "text", "format": Format(precision=1, scheme=Scheme.fixed)} for col in pivot.reset_index().columns],
                 style_data_conditional=[
                     {
                         'if': {'filter_query': f'{{{col}}} >= 30', 'column_id': col},
                         'backgroundColor': '#003366', 'color': 'white'
-                    } if col != "metro" else {} for col in pivot_metro.columns
+                    } if col != "metro" else {} for col in pivot.columns
                 ] + [
                     {
                         'if': {'filter_query': f'{{{col}}} >= 15 && {{{col}}} < 30', 'column_id': col},
                         'backgroundColor': '#6699cc', 'color': 'black'
-                    } if col != "metro" else {} for col in pivot_metro.columns
+                    } if col != "metro" else {} for col in pivot.columns
                 ] + [
                     {
                         'if': {'filter_query': f'{{{col}}} > 0 && {{{col}}} < 15', 'column_id': col},
                         'backgroundColor': '#cce0ff', 'color': 'black'
-                    } if col != "metro" else {} for col in pivot_metro.columns
+                    } if col != "metro" else {} for col in pivot.columns
                 ],
                 style_table={'overflowX': 'auto'},
                 style_cell={"minWidth": 90, "maxWidth": 200, "whiteSpace": "normal"},
                 page_size=10,
             ),
-            html.H4("NYC Metro: 300 Random Leases by Industry (Pin Map)"),
-            dcc.Graph(figure=fig_nyc_map),
+            html.H4("NYC Metro: Leases by Industry (Pin Map)"),
+            stored_graph("nyc_map", "nyc-map"),
             html.H4("Metro Areas by Commercial Rent (Indexed)"),
-            dcc.Graph(figure=fig_rent_metro),
+            stored_graph("rent_metro"),
             html.H4("Top 10 Metro Areas by Available Space"),
-            dcc.Graph(figure=fig_space_metro),
+            stored_graph("space_metro"),
         ])
     else:
         return html.Div("Select a story tab to begin.")
 
+@app.callback(Output("nyc-map", "figure", allow_duplicate=True), Input("nyc-map", "relayoutData"),
+              prevent_initial_call=True)
+def update_nyc_map(relayout):
+    view = map_view(relayout)
+    if view is None:
+        raise PreventUpdate
+    return nyc_map_figure(**view)
+
+@app.callback(Output("unemp-chart", "figure", allow_duplicate=True), Input("unemp-chart", "relayoutData"),
+              prevent_initial_call=True)
+def update_unemp(relayout):
+    window = x_window(relayout)
+    if window is None:
+        raise PreventUpdate
+    if window == "reset":
+        return unemp_figure().update_xaxes(range=None, autorange=True)
+    return unemp_figure(window)
+
 if __name__ == "__main__":
     app.run(debug=True, port=8051)